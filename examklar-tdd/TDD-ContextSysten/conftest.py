@@ -0,0 +1,46 @@
+"""Pytest fixtures for newtdd.py
+
+Every path newtdd.py uses is derived from the script's own location, so
+each test loads a copy of the script from a temporary directory and gets
+a private .tdd directory next to it.
+"""
+
+import importlib.util
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).with_name("newtdd.py")
+
+
+@pytest.fixture
+def load_newtdd(tmp_path, monkeypatch):
+    """Load a fresh newtdd module whose TDD_DIR lives under tmp_path/<name>"""
+    monkeypatch.delenv("TDD_AGENT_ID", raising=False)
+    monkeypatch.delenv("TDD_PROFILE", raising=False)
+    loaded = []
+
+    def load(name="workspace"):
+        workspace = tmp_path / name
+        workspace.mkdir()
+        shutil.copy(SCRIPT, workspace / SCRIPT.name)
+        module_name = f"newtdd_{name}_{len(loaded)}"
+        spec = importlib.util.spec_from_file_location(module_name, workspace / SCRIPT.name)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        module.TDD_DIR.mkdir()
+        loaded.append(module_name)
+        return module
+
+    yield load
+    for module_name in loaded:
+        sys.modules.pop(module_name, None)
+
+
+@pytest.fixture
+def newtdd(load_newtdd):
+    """newtdd module with an empty, private .tdd directory"""
+    return load_newtdd()
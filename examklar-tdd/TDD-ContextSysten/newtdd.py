@@ -6,21 +6,156 @@ EXAMKLAR TDD CONTEXT SYSTEM V6 - RED-GREEN-REFACTOR ENHANCED
 
 Usage: python3 newtdd.py "session_id" "action_description"
 Example: python3 newtdd.py "1.1" "🔴 RED: Created failing test for OnboardingData interface"
+
+Retried calls are deduplicated: identical session + action within a few minutes,
+or the same --key KEY (or $TDD_IDEMPOTENCY_KEY), is only logged once.
+Each writer appends to its own shard in .tdd/shards/ (--agent ID or $TDD_AGENT_ID).
+Add --profile (or set $TDD_PROFILE) to any command for a stage timing trace.
+
+In-process use: from newtdd import TDDStore (see the PYTHON API section).
 """
 
 import os
+import re
 import sys
+import io
+import csv
+import html
 import json
+import math
+import cProfile
+import threading
+import time
+import zlib
+import gzip
+import heapq
+import hashlib
+import ctypes
+import ctypes.util
+import select
+import socket
+import struct
+import subprocess
+import getpass
+import uuid
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.etree import ElementTree
+
+try:
+    import fcntl
+except ImportError:  # Windows - writers fall back to unlocked updates
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # optional - bundle reports then leave the brotli size out
+    brotli = None
 
 # Configuration
 WORKSPACE_ROOT = Path(__file__).parent
+PROJECT_ROOT = WORKSPACE_ROOT.parent
+PROJECT_TOP_LEVEL_DIRS = ("src", "tests", "e2e", "docs")
+PLAYWRIGHT_TEST_DIR = "e2e"
 TDD_DIR = WORKSPACE_ROOT / ".tdd"
 SESSION_LOG_FILE = TDD_DIR / "session_log.json"
 CURRENT_STATUS_FILE = TDD_DIR / "status.json"
 PROGRESS_FILE = TDD_DIR / "progress_summary.md"
 NEXT_STEPS_FILE = TDD_DIR / "next_steps_plan.md"
+REPORT_SECTIONS_FILE = TDD_DIR / "report_sections.json"
+REPORT_SECTIONS_VERSION = 1
+DASHBOARD_HTML_FILE = TDD_DIR / "status.html"
+TIMELINE_CSV_FILE = TDD_DIR / "timeline.csv"
+DASHBOARD_FILE = TDD_DIR / "dashboard.html"
+REPORT_RENDER_WORKERS = 4
+PROFILE_DIR = TDD_DIR / "profiles"
+METRICS_FILE = TDD_DIR / "metrics.prom"
+COMMAND_METRICS_FILE = TDD_DIR / "command_metrics.json"
+RED_TO_GREEN_BUCKETS = (60, 300, 900, 1800, 3600, 7200, 14400, 86400)
+COMMAND_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+TEST_RESULTS_FILE = TDD_DIR / "test_results.json"
+JSON_STREAM_CHUNK = 1 << 16
+JSON_WHITESPACE = re.compile(r"\s*")
+COVERAGE_DIR = PROJECT_ROOT / "coverage"
+COVERAGE_FILE = TDD_DIR / "coverage.json"
+COVERAGE_HISTORY_KEPT = 100
+IMPORT_GRAPH_FILE = TDD_DIR / "import_graph.json"
+IMPORT_GRAPH_DIRS = ("src", "tests")
+IMPORT_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx")
+VITEST_TEST_EXIT_CODES = (0, 1)
+VERIFY_CACHE_FILE = TDD_DIR / "verify_cache.json"
+WATCH_REPORT_FILES = ("test-results.json", "junit.xml", "playwright-report/results.json")
+WATCH_IGNORED_DIRS = {"node_modules", "dist", ".git"}
+WATCH_POLL_SECONDS = 0.5
+WATCH_DEBOUNCE_SECONDS = 0.75
+CONTEXT_BUNDLE_DIR = TDD_DIR / "context"
+CONTEXT_TRUNCATED_MARKER = "… (cut to fit the budget)\n"
+CONTEXT_CACHE_FILE = TDD_DIR / "context_cache.json"
+CONTEXT_CACHE_DIR = TDD_DIR / "context_cache"
+CONTEXT_TOKEN_BUDGET = 8000
+CONTEXT_LOG_ENTRIES = 10
+REPOMIX_BUNDLES_FILE = PROJECT_ROOT / ".repomix" / "bundles.json"
+BUNDLE_DIST_DIR = PROJECT_ROOT / "dist"
+BUNDLE_SIZES_FILE = TDD_DIR / "bundle_sizes.json"
+BUNDLE_BUDGETS_FILE = WORKSPACE_ROOT / "bundle_budgets.json"
+BUNDLE_SESSION = "4.3"
+BUNDLE_HISTORY_KEPT = 200
+BUNDLE_GROWTH_TOLERANCE = 0.05
+BUNDLE_WORKERS = 8
+BUNDLE_LISTED_CHUNKS = 10
+# Gzip bytes; roughly what loads in under 2s on a mid-range mobile connection
+DEFAULT_BUNDLE_BUDGETS = {
+    "total": 500 * 1024,
+    "js": 350 * 1024,
+    "css": 60 * 1024,
+    "largest_chunk": 200 * 1024
+}
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+SEARCH_INDEX_DIR = TDD_DIR / "search_index"
+SEARCH_META_FILE = SEARCH_INDEX_DIR / "meta.json"
+SEARCH_LOCK_FILE = SEARCH_INDEX_DIR / ".lock"
+SEARCH_BUCKETS = 64
+SEARCH_DELTA_FILE = SEARCH_INDEX_DIR / "delta.jsonl"
+SEARCH_DELTA_LIMIT = 256
+SEARCH_INDEX_VERSION = 2
+DEDUP_DIR = TDD_DIR / "dedup"
+DEDUP_WINDOW_SECONDS = 300
+DEDUP_GENERATION_SECONDS = 86400
+DEDUP_TABLE_SLOTS = 65536
+DEDUP_SLOT_SIZE = 8
+DEDUP_MAX_PROBES = 32
+DEDUP_RELEASED = 1
+DEDUP_LOCK_FILE = DEDUP_DIR / ".lock"
+CHECKPOINT_DIR = TDD_DIR / "checkpoints"
+CHECKPOINT_INTERVAL = 500
+CHECKPOINTS_KEPT = 3
+PROJECTION_VERSION = 8
+JOURNAL_DIR = TDD_DIR / "journals"
+JOURNAL_SYNC_INTERVAL = 16
+PROJECTION_LOCK_FILE = TDD_DIR / "projection.lock"
+SNAPSHOT_DIR = TDD_DIR / "snapshots"
+SNAPSHOT_POINTER_FILE = SNAPSHOT_DIR / "CURRENT"
+SNAPSHOTS_KEPT = 4
+SNAPSHOT_READ_RETRIES = 5
+SHARD_DIR = TDD_DIR / "shards"
+SHARD_COMPACT_THRESHOLD = 32
+SHARD_COMPACT_BATCH = 64
+SHARD_COMPACTED_PREFIX = "compacted-"
+MERGE_INDEX_BATCH = 1000
+SERVER_HOST = "127.0.0.1"
+SERVER_LOCAL_HOSTNAMES = {"localhost", "127.0.0.1"}
+SERVER_PORT = 8765
+SSE_POLL_SECONDS = 0.5
+SSE_KEEPALIVE_SECONDS = 15
 
 # ATOMIC PHASED ROADMAP DEFINITION
 ROADMAP_SESSIONS = {
@@ -376,13 +511,24 @@ def get_timestamp():
     """Generate ISO timestamp for logging"""
     return datetime.now(timezone.utc).isoformat()
 
+def new_entry_id():
+    """Generate a unique ID for a new log entry"""
+    return uuid.uuid4().hex[:12]
+
+def get_entry_id(entry):
+    """Get the stable ID of a log entry (derived for entries logged before IDs existed)"""
+    if entry.get("entry_id"):
+        return entry["entry_id"]
+    fingerprint = f"{entry.get('timestamp', '')}|{entry.get('session_id', '')}|{entry.get('action', '')}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
 def initialize_tdd_system():
     """Initialize TDD directory structure"""
     TDD_DIR.mkdir(exist_ok=True)
     
     # Initialize session log if not exists
     if not SESSION_LOG_FILE.exists():
-        SESSION_LOG_FILE.write_text(json.dumps([], indent=2))
+        write_file_atomic(SESSION_LOG_FILE, json.dumps([], indent=2))
     
     # Initialize status file
     if not CURRENT_STATUS_FILE.exists():
@@ -392,22 +538,42 @@ def initialize_tdd_system():
             "total_sessions": len(ROADMAP_SESSIONS),
             "last_updated": get_timestamp()
         }
-        CURRENT_STATUS_FILE.write_text(json.dumps(initial_status, indent=2))
+        write_file_atomic(CURRENT_STATUS_FILE, json.dumps(initial_status, indent=2))
+    
+    # Finish any multi-file update that was interrupted
+    return recover_journal()
 
-def log_session(session_id, action_description):
+def log_session(session_id, action_description, idempotency_key=None, dedup=True, agent_id=None, store=None):
     """Log a completed session with TDD workflow tracking"""
-    if session_id not in ROADMAP_SESSIONS:
-        print(f"❌ Unknown session: {session_id}")
+    result = (store or TDDStore(agent_id)).log(session_id, action_description, idempotency_key, dedup)
+    
+    if result.error:
+        print(f"{'🚨' if result.error.startswith('TDD VIOLATION') else '❌'} {result.error}")
         return False
+    if result.duplicate:
+        print(f"⏭️  Duplicate ignored: session {session_id} already logged this action")
+        return True
     
-    # Detect TDD phase from action description
-    tdd_phase = detect_tdd_phase(action_description)
+    if result.warning:
+        print(f"⚠️  TDD warning: {result.warning}")
+    
+    # Show TDD workflow guidance
+    show_tdd_guidance(result.tdd_phase, session_id)
     
-    # Load existing log
-    log_data = json.loads(SESSION_LOG_FILE.read_text())
+    print(f"✅ Session {session_id} logged: {action_description}")
+    print(f"💾 Context files: {len(result.writes['written'])} written, "
+          f"{len(result.writes['skipped'])} unchanged (write skipped)")
+    return True
+
+def build_log_entry(session_id, action_description, log_data, agent_id=None, idempotency_key=None,
+                    tdd_phase=None, source=None):
+    """Build a new log entry for a session action (tdd_phase overrides keyword detection)
     
-    # Add new session
+    Entries logged automatically (from test reports, say) name their source;
+    they are tracked like any other entry but do not complete a session.
+    """
     session_entry = {
+        "entry_id": new_entry_id(),
         "session_id": session_id,
         "title": ROADMAP_SESSIONS[session_id]["title"],
         "phase": ROADMAP_SESSIONS[session_id]["phase"],
@@ -415,21 +581,16 @@ def log_session(session_id, action_description):
         "timestamp": get_timestamp(),
         "duration": ROADMAP_SESSIONS[session_id]["duration"],
         "deliverables": ROADMAP_SESSIONS[session_id]["deliverables"],
-        "tdd_phase": tdd_phase,
-        "tdd_cycle": get_current_tdd_cycle(session_id, log_data)
+        "tdd_phase": tdd_phase or detect_tdd_phase(action_description),
+        "tdd_cycle": get_current_tdd_cycle(session_id, log_data),
+        "agent": get_agent_id(agent_id),
+        "lamport": next_lamport(log_data)
     }
-    
-    log_data.append(session_entry)
-    SESSION_LOG_FILE.write_text(json.dumps(log_data, indent=2))
-    
-    # Update status
-    update_status(session_id)
-    
-    # Show TDD workflow guidance
-    show_tdd_guidance(tdd_phase, session_id)
-    
-    print(f"✅ Session {session_id} logged: {action_description}")
-    return True
+    if idempotency_key:
+        session_entry["idempotency_key"] = idempotency_key
+    if source:
+        session_entry["source"] = source
+    return session_entry
 
 def detect_tdd_phase(action_description):
     """Detect TDD phase from action description"""
@@ -444,9 +605,9 @@ def detect_tdd_phase(action_description):
     else:
         return "UNKNOWN"
 
-def get_current_tdd_cycle(session_id, log_data):
-    """Get current TDD cycle number for session"""
-    session_entries = [entry for entry in log_data if entry.get("session_id") == session_id]
+def get_current_tdd_cycle(session_id, log_data=None):
+    """Get current TDD cycle number for session (streams the merged log when log_data is omitted)"""
+    session_entries = [entry for entry in get_live_entries(log_data) if entry.get("session_id") == session_id]
     
     # Count completed RED-GREEN-REFACTOR cycles
     cycles = 0
@@ -498,27 +659,17 @@ def show_tdd_guidance(current_phase, session_id):
     print(f"💡 Example: {phase_info['example']}")
     print(f"🧪 Remember: RED → GREEN → REFACTOR → REPEAT")
 
-def update_status(completed_session_id):
-    """Update current status after session completion"""
-    status = json.loads(CURRENT_STATUS_FILE.read_text())
+def update_status(log_data, new_entries=()):
+    """Project current status from the session log and write it with the reports
     
-    if completed_session_id not in status["completed_sessions"]:
-        status["completed_sessions"].append(completed_session_id)
-    
-    # Update current phase
-    current_phase = ROADMAP_SESSIONS[completed_session_id]["phase"]
-    status["current_phase"] = current_phase
-    status["last_updated"] = get_timestamp()
-    
-    CURRENT_STATUS_FILE.write_text(json.dumps(status, indent=2))
-    
-    # Generate reports
-    generate_progress_report()
-    generate_next_steps()
+    Returns the names of the files that were written and of those skipped as unchanged.
+    """
+    return write_reports(log_data, new_entries)
 
-def get_available_sessions():
+def get_available_sessions(status=None):
     """Get sessions that can be started based on completed dependencies"""
-    status = json.loads(CURRENT_STATUS_FILE.read_text())
+    if status is None:
+        status = read_status_snapshot()["status"]
     completed = set(status["completed_sessions"])
     available = []
     
@@ -543,24 +694,49 @@ def get_available_sessions():
     
     return sorted(available)
 
-def generate_progress_report():
-    """Generate markdown progress summary"""
-    status = json.loads(CURRENT_STATUS_FILE.read_text())
-    log_data = json.loads(SESSION_LOG_FILE.read_text())
+# Rendered report sections, loaded from REPORT_SECTIONS_FILE on first use
+_report_sections = None
+
+def _report_fingerprint(*parts):
+    """Fingerprint the inputs a report section is rendered from"""
+    payload = json.dumps([REPORT_SECTIONS_VERSION, *parts], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def _load_report_sections():
+    """Load the cached report sections, once per process"""
+    global _report_sections
+    if _report_sections is None:
+        cached = _load_json_file(REPORT_SECTIONS_FILE, {})
+        _report_sections = cached.get("sections", {}) if cached.get("version") == REPORT_SECTIONS_VERSION else {}
+    return _report_sections
+
+def render_report_sections(sections):
+    """Render (key, fingerprint, render) sections, reusing cached text where the fingerprint matches"""
+    cache = _load_report_sections()
+    rendered = []
+    changed = False
+    for key, fingerprint, render in sections:
+        cached = cache.get(key)
+        if cached is None or cached["fingerprint"] != fingerprint:
+            cached = cache[key] = {"fingerprint": fingerprint, "text": render()}
+            changed = True
+        rendered.append(cached["text"])
     
+    if changed:
+        # Drop sections that are no longer part of any report
+        live_keys = {key for key, _, _ in sections}
+        for key in [key for key in cache if key.split(":", 1)[0] == "progress" and key not in live_keys]:
+            del cache[key]
+        TDD_DIR.mkdir(exist_ok=True)
+        write_file_atomic(REPORT_SECTIONS_FILE, json.dumps({"version": REPORT_SECTIONS_VERSION, "sections": cache}))
+    return "".join(rendered)
+
+def _render_progress_header(status):
     completed_count = len(status["completed_sessions"])
     total_count = status["total_sessions"]
     progress_percent = (completed_count / total_count) * 100
     
-    # Group by phases
-    phases = {}
-    for session in log_data:
-        phase = session["phase"]
-        if phase not in phases:
-            phases[phase] = []
-        phases[phase].append(session)
-    
-    report = f"""# 🚀 EXAMKLAR TDD PROGRESS REPORT
+    return f"""# 🚀 EXAMKLAR TDD PROGRESS REPORT
 
 ## 📊 Overall Progress
 - **Completed**: {completed_count}/{total_count} sessions ({progress_percent:.1f}%)
@@ -569,23 +745,62 @@ def generate_progress_report():
 
 ## 📋 Phase Breakdown
 """
+
+def _render_phase_section(phase_name, phase_sessions):
+    section = f"\n### {phase_name}\n"
+    if not phase_sessions:
+        return section + "- 🔄 Not started\n"
+    for session_id, stats in phase_sessions:
+        entries = stats["entries"]
+        section += (f"- ✅ **{session_id}**: {ROADMAP_SESSIONS[session_id]['title']} "
+                    f"({entries} {'entry' if entries == 1 else 'entries'})\n")
+    return section
+
+def _render_session_section(session_id, stats):
+    phases = " · ".join(f"{phase} {count}" for phase, count in sorted(stats["phases"].items()))
+    return f"""
+### {session_id}: {ROADMAP_SESSIONS[session_id]['title']}
+- **Entries**: {stats["entries"]}
+- **TDD Cycles**: {stats["tdd_cycles"]}
+- **TDD Phase**: {stats.get("tdd_state", {}).get("phase", "PLANNING")}
+- **Phases**: {phases or "none"}
+"""
+
+def generate_progress_report(status):
+    """Generate markdown progress summary
     
-    for phase_name in ["FASE 1: FOUNDATION", "FASE 2: ONBOARDING ENHANCEMENT", 
-                       "FASE 3: DATABRIDGE MIGRATION", "FASE 4: INTEGRATION & POLISH", 
-                       "FASE 5: ENTERPRISE FEATURES"]:
-        phase_sessions = phases.get(phase_name, [])
-        report += f"\n### {phase_name}\n"
-        if phase_sessions:
-            for session in phase_sessions:
-                report += f"- ✅ **{session['session_id']}**: {session['title']}\n"
-        else:
-            report += "- 🔄 Not started\n"
+    The report is split into a header, one section per phase and one per
+    started session. Each section is cached by a fingerprint of its inputs,
+    so only the sections touched by new entries are rendered again.
+    """
+    session_stats = status.get("sessions", {})
+    phase_names = list(dict.fromkeys(session["phase"] for session in ROADMAP_SESSIONS.values()))
     
-    PROGRESS_FILE.write_text(report)
+    header = (status["completed_sessions"], status["total_sessions"],
+              status["current_phase"], status["last_updated"])
+    sections = [("progress:header", _report_fingerprint(header),
+                 lambda: _render_progress_header(status))]
+    
+    for phase_name in phase_names:
+        phase_sessions = [(session_id, session_stats[session_id]) for session_id, session in ROADMAP_SESSIONS.items()
+                          if session["phase"] == phase_name and session_id in status["completed_sessions"]]
+        sections.append((f"progress:phase:{phase_name}", _report_fingerprint(phase_name, phase_sessions),
+                         lambda phase_name=phase_name, phase_sessions=phase_sessions:
+                             _render_phase_section(phase_name, phase_sessions)))
+    
+    started = [session_id for session_id in ROADMAP_SESSIONS if session_id in session_stats]
+    if started:
+        sections.append(("progress:sessions", _report_fingerprint(), lambda: "\n## 🧪 Session Activity\n"))
+    for session_id in started:
+        stats = session_stats[session_id]
+        sections.append((f"progress:session:{session_id}", _report_fingerprint(session_id, stats),
+                         lambda session_id=session_id, stats=stats: _render_session_section(session_id, stats)))
+    
+    return render_report_sections(sections)
 
-def generate_next_steps():
+def generate_next_steps(status):
     """Generate next steps plan"""
-    available = get_available_sessions()
+    available = get_available_sessions(status)
     
     next_steps = """# 🎯 NEXT STEPS PLAN
 
@@ -609,51 +824,3740 @@ def generate_next_steps():
             for deliverable in session['deliverables']:
                 next_steps += f"- {deliverable}\n"
     
-    NEXT_STEPS_FILE.write_text(next_steps)
+    return next_steps
 
-def show_status():
+def show_status(store=None):
     """Show current status"""
-    status = json.loads(CURRENT_STATUS_FILE.read_text())
-    available = get_available_sessions()
+    status = (store or TDDStore()).status()
     
     print(f"\n🎯 EXAMKLAR TDD STATUS")
-    print(f"📊 Progress: {len(status['completed_sessions'])}/{status['total_sessions']} sessions")
-    print(f"🔄 Current Phase: {status['current_phase']}")
-    print(f"🚀 Available Sessions: {len(available)}")
+    print(f"📊 Progress: {len(status.completed_sessions)}/{status.total_sessions} sessions")
+    print(f"🔄 Current Phase: {status.current_phase}")
+    print(f"🚀 Available Sessions: {len(status.available)}")
+    checks = verify_deliverables(status=status.raw)
+    if checks:
+        problems = sum(1 for check in checks if check.problems)
+        print(f"🔍 Deliverables: {sum(1 for check in checks if check.exists)}/{len(checks)} present, "
+              f"{problems} with problems (python3 newtdd.py verify)")
+    test_summary = load_test_summary()
+    if test_summary:
+        passed = sum(summary["passed"] for summary in test_summary.values())
+        total = sum(summary["passed"] + summary["failed"] for summary in test_summary.values())
+        print(f"🧪 Tests: {passed}/{total} passing across {len(test_summary)} session(s)")
     
-    if available:
+    if status.available:
         print(f"\n📋 Next Recommended:")
-        next_session = available[0]
-        session_info = ROADMAP_SESSIONS[next_session]
-        print(f"   {next_session}: {session_info['title']}")
-        print(f"   Duration: {session_info['duration']} min | {session_info['risk']}")
+        session_info = status.available[0]
+        print(f"   {session_info.session_id}: {session_info.title}")
+        print(f"   Duration: {session_info.duration} min | {session_info.risk}")
+
+def show_available(store=None):
+    """Show sessions whose dependencies are completed"""
+    available = (store or TDDStore()).available_sessions()
+    print(f"\n🚀 Available Sessions ({len(available)}):")
+    for session in available:
+        print(f"  {session.session_id}: {session.title} ({session.duration}min)")
+
+# ============================================================
+# ⏱️ PROFILING
+# --profile (or $TDD_PROFILE) records wall time per stage, bytes
+# read and written and entry counts, and writes a Chrome trace-event
+# file (chrome://tracing, Perfetto). When profiling is off every hook
+# is a single None check.
+# ============================================================
+
+class Profiler:
+    """Stage timings and I/O counters for one run"""
+    
+    def __init__(self, use_cprofile=False):
+        self.started = time.perf_counter()
+        self.events = []
+        self.stage_totals = {}
+        self.counters = {"bytes_read": 0, "bytes_written": 0, "entries": 0}
+        self.lock = threading.Lock()
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        if self.cprofile:
+            self.cprofile.enable()
+    
+    @contextmanager
+    def stage(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                                    "ts": round((begin - self.started) * 1e6, 1),
+                                    "dur": round((end - begin) * 1e6, 1)})
+                self.stage_totals[name] = self.stage_totals.get(name, 0) + end - begin
+    
+    def count(self, counter, amount):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+    
+    def finish(self):
+        """Write the trace (and cProfile stats) and return a one-line summary"""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        
+        trace_file = PROFILE_DIR / f"trace-{stamp}.json"
+        write_file_atomic(trace_file, json.dumps({"traceEvents": self.events, "otherData": self.counters}))
+        parts = [f"{total_ms:.1f} ms total",
+                 ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.stage_totals.items()),
+                 f"{self.counters['bytes_read'] / 1024:.1f} KB read, "
+                 f"{self.counters['bytes_written'] / 1024:.1f} KB written, {self.counters['entries']} entries",
+                 f"trace {trace_file}"]
+        if self.cprofile:
+            self.cprofile.disable()
+            stats_file = PROFILE_DIR / f"cprofile-{stamp}.pstats"
+            self.cprofile.dump_stats(stats_file)
+            parts.append(f"cProfile {stats_file}")
+        return " | ".join(part for part in parts if part)
+
+# The active profiler, or None when profiling is off
+_profiler = None
+_NO_STAGE = nullcontext()
+
+def start_profiling(use_cprofile=False):
+    """Turn on profiling for the rest of this process"""
+    global _profiler
+    _profiler = Profiler(use_cprofile)
+
+def finish_profiling():
+    """Stop profiling and return the summary line (None if profiling was off)"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler.finish() if profiler else None
+
+def profile_stage(name):
+    """Context manager timing one stage"""
+    return _NO_STAGE if _profiler is None else _profiler.stage(name)
+
+def profile_count(counter, amount):
+    """Add to a profiling counter"""
+    if _profiler is not None:
+        _profiler.count(counter, amount)
+
+# ============================================================
+# 🔎 FULL-TEXT SEARCH INDEX
+# Inverted index (token → entry IDs) split into hash buckets, so a
+# query only reads the buckets of its own tokens. New entries are
+# appended to a small delta file that is folded into the buckets in
+# batches; reverted entries are filtered out when a query is ranked.
+# ============================================================
+
+SEARCH_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+SEARCH_CAMEL_CASE_PATTERN = re.compile(r"[A-ZÆØÅ]?[a-zæøåé]+|[A-ZÆØÅ]+(?![a-zæøåé])|\d+")
+
+SEARCH_STOPWORDS = {
+    # English
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "into", "is", "it", "its", "now", "of", "on", "or", "so", "that", "the",
+    "then", "this", "to", "was", "were", "will", "with",
+    # Danish
+    "af", "alle", "at", "de", "den", "der", "det", "du", "efter", "eller", "en",
+    "er", "et", "fra", "for", "har", "hele", "hvis", "i", "ikke", "med", "mellem",
+    "men", "og", "om", "på", "som", "til", "ud", "udvid", "var", "vi",
+}
+
+# Light suffix stripping for English and Danish - applied identically to
+# documents and queries, so "tests"/"test" and "testene"/"test" meet.
+SEARCH_SUFFIXES = sorted([
+    # English
+    "ations", "ation", "ings", "ing", "edly", "ed", "es", "s", "ly",
+    # Danish
+    "ernes", "erne", "ene", "ende", "heden", "hed", "er", "en", "et", "e",
+], key=len, reverse=True)
+
+def stem_search_token(token):
+    """Strip the longest known English/Danish suffix, keeping a stem of 3+ chars"""
+    if token.isdigit():
+        return token
+    for suffix in SEARCH_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize_search_text(text):
+    """Tokenize mixed Danish/English text into normalized search terms"""
+    terms = []
+    for word in SEARCH_TOKEN_PATTERN.findall(text):
+        parts = [word]
+        camel_parts = SEARCH_CAMEL_CASE_PATTERN.findall(word)
+        if len(camel_parts) > 1:
+            # "OnboardingStore" is searchable as a whole and as "onboarding" + "store"
+            parts.extend(camel_parts)
+        for part in parts:
+            term = part.lower()
+            if term in SEARCH_STOPWORDS or (len(term) < 2 and not term.isdigit()):
+                continue
+            terms.append(stem_search_token(term))
+    return terms
+
+def _search_bucket_file(kind, key):
+    """Get the bucket file holding a token ('terms') or a document ('docs')"""
+    bucket = zlib.crc32(key.encode("utf-8")) % SEARCH_BUCKETS
+    return SEARCH_INDEX_DIR / f"{kind}_{bucket:02d}.json"
+
+def _load_json_file(path, default):
+    """Load a JSON file, falling back to default when it does not exist"""
+    if not path.exists():
+        return default
+    return json.loads(path.read_text())
+
+def _search_document_text(entry):
+    """Text of a log entry that is made searchable"""
+    return f"{entry.get('session_id', '')} {entry.get('title', '')} {entry.get('action', '')}"
+
+def _search_document(entry):
+    """Term counts, length and display fields of one log entry"""
+    terms = tokenize_search_text(_search_document_text(entry))
+    term_counts = {}
+    for term in terms:
+        term_counts[term] = term_counts.get(term, 0) + 1
+    return {
+        "id": get_entry_id(entry),
+        "terms": term_counts,
+        "length": len(terms),
+        "doc": {
+            "session_id": entry.get("session_id"),
+            "timestamp": entry.get("timestamp"),
+            "action": entry.get("action", ""),
+            "agent": entry.get("agent")
+        }
+    }
+
+def build_search_index(log_data):
+    """Rebuild the whole search index from the session log"""
+    with file_lock(SEARCH_LOCK_FILE):
+        return _build_search_index(log_data)
+
+def _build_search_index(log_data):
+    """Rebuild the index - caller holds the index lock"""
+    if SEARCH_INDEX_DIR.exists():
+        for bucket_file in SEARCH_INDEX_DIR.glob("*.json*"):
+            bucket_file.unlink()
+    SEARCH_INDEX_DIR.mkdir(exist_ok=True)
+    meta = {"version": SEARCH_INDEX_VERSION, "doc_count": 0, "total_length": 0, "delta_count": 0, "reverted": []}
+    documents = []
+    for entry in log_data:
+        if is_revert_event(entry):
+            meta["reverted"].append(entry["reverts"])
+        else:
+            documents.append(_search_document(entry))
+    _write_search_postings(documents, meta)
+    write_file_atomic(SEARCH_META_FILE, json.dumps(meta, indent=2))
+    return meta["doc_count"]
+
+def index_entries(entries, log_data):
+    """Add new log entries to the search index (building it on first use)
+
+    New documents are appended to a small delta file, so the cost of
+    logging one entry does not grow with the index; the delta is folded
+    into the term buckets once it holds SEARCH_DELTA_LIMIT documents.
+    """
+    with file_lock(SEARCH_LOCK_FILE):
+        meta = _load_json_file(SEARCH_META_FILE, {})
+        if meta.get("version") != SEARCH_INDEX_VERSION:
+            _build_search_index(log_data)
+            return
+        
+        lines = []
+        for entry in entries:
+            if is_revert_event(entry):
+                meta["reverted"].append(entry["reverts"])
+                continue
+            document = _search_document(entry)
+            lines.append(json.dumps(document, ensure_ascii=False) + "\n")
+            meta["delta_count"] += 1
+        if lines:
+            with open(SEARCH_DELTA_FILE, "a", encoding="utf-8") as delta:
+                delta.writelines(lines)
+        
+        if meta["delta_count"] >= SEARCH_DELTA_LIMIT:
+            _write_search_postings(_read_search_delta(), meta)
+            SEARCH_DELTA_FILE.unlink()
+            meta["delta_count"] = 0
+        write_file_atomic(SEARCH_META_FILE, json.dumps(meta, indent=2))
+
+def _read_search_delta():
+    """Documents appended since the delta was last folded into the buckets"""
+    if not SEARCH_DELTA_FILE.exists():
+        return []
+    with open(SEARCH_DELTA_FILE, encoding="utf-8") as delta:
+        return [json.loads(line) for line in delta if line.strip()]
+
+def _write_search_postings(documents, meta):
+    """Merge postings for documents into the bucket files and update index stats"""
+    term_buckets = {}
+    doc_buckets = {}
+    
+    for document in documents:
+        entry_id = document["id"]
+        for term, count in document["terms"].items():
+            path = _search_bucket_file("terms", term)
+            if path not in term_buckets:
+                term_buckets[path] = _load_json_file(path, {})
+            term_buckets[path].setdefault(term, {})[entry_id] = [count, document["length"]]
+        
+        path = _search_bucket_file("docs", entry_id)
+        if path not in doc_buckets:
+            doc_buckets[path] = _load_json_file(path, {})
+        if entry_id not in doc_buckets[path]:
+            meta["doc_count"] += 1
+            meta["total_length"] += document["length"]
+        doc_buckets[path][entry_id] = document["doc"]
+    
+    for path, bucket in {**term_buckets, **doc_buckets}.items():
+        write_file_atomic(path, json.dumps(bucket, ensure_ascii=False))
+
+def search_log(query, limit=10):
+    """Rank log entries against a query with BM25 over the inverted index"""
+    meta = _load_json_file(SEARCH_META_FILE, {})
+    if meta.get("version") != SEARCH_INDEX_VERSION:
+        build_search_index(iter_log())
+        meta = json.loads(SEARCH_META_FILE.read_text())
+    delta = _read_search_delta()
+    doc_count = meta["doc_count"] + len(delta)
+    if not doc_count:
+        return []
+    
+    k1, b = 1.2, 0.75
+    average_length = (meta["total_length"] + sum(document["length"] for document in delta)) / doc_count or 1
+    reverted = set(meta["reverted"])
+    scores = {}
+    loaded_buckets = {}
+    
+    for term in set(tokenize_search_text(query)):
+        path = _search_bucket_file("terms", term)
+        if path not in loaded_buckets:
+            loaded_buckets[path] = _load_json_file(path, {})
+        postings = dict(loaded_buckets[path].get(term, {}))
+        for document in delta:
+            if term in document["terms"]:
+                postings[document["id"]] = [document["terms"][term], document["length"]]
+        if not postings:
+            continue
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        for entry_id, (count, length) in postings.items():
+            if entry_id in reverted:
+                continue
+            weight = count * (k1 + 1) / (count + k1 * (1 - b + b * length / average_length))
+            scores[entry_id] = scores.get(entry_id, 0.0) + idf * weight
+    
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    results = []
+    delta_docs = {document["id"]: document["doc"] for document in delta}
+    loaded_docs = {}
+    for entry_id, score in ranked:
+        doc = delta_docs.get(entry_id)
+        if doc is None:
+            path = _search_bucket_file("docs", entry_id)
+            if path not in loaded_docs:
+                loaded_docs[path] = _load_json_file(path, {})
+            doc = loaded_docs[path].get(entry_id, {})
+        results.append({"entry_id": entry_id, "score": round(score, 3), **doc})
+    return results
+
+def show_search_results(query, limit=10, store=None):
+    """Print ranked search results for a query"""
+    started = time.perf_counter()
+    results = (store or TDDStore()).search(query, limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    print(f"\n🔎 Search: \"{query}\" ({len(results)} hits, {elapsed_ms:.1f} ms)")
+    for rank, result in enumerate(results, start=1):
+        agent = f" · {result.agent}" if result.agent else ""
+        print(f"  {rank}. [{result.session_id}] {(result.timestamp or '')[:16]} ({result.score}){agent}")
+        print(f"     {result.action}")
+        print(f"     id: {result.entry_id}")
+
+# ============================================================
+# 🔁 IDEMPOTENT LOGGING
+# Retried calls are recognised by an idempotency key: either given
+# explicitly (--key) or derived from session + action + time bucket.
+# Seen keys live in fixed-size open-addressing hash tables on disk,
+# one per day, so a lookup is a handful of 8-byte reads. A key is
+# claimed under the dedup lock before its entry is written, so an
+# overlapping retry is caught too; a failed write releases it again.
+# ============================================================
+
+def _dedup_digest(text):
+    """64-bit digest of an idempotency key (0 marks an empty slot, DEDUP_RELEASED a released one)"""
+    digest = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:DEDUP_SLOT_SIZE], "big")
+    return max(digest, DEDUP_RELEASED + 1)
+
+def get_idempotency_digests(session_id, action_description, idempotency_key=None, now=None):
+    """Digests identifying a logging call - the first one is recorded, all are checked"""
+    if idempotency_key:
+        return [_dedup_digest(f"key|{idempotency_key}")]
+    action = " ".join(action_description.split())
+    bucket = int((now if now is not None else time.time()) // DEDUP_WINDOW_SECONDS)
+    # Also check the previous bucket so a retry straddling a bucket boundary is caught
+    return [_dedup_digest(f"{session_id}|{action}|{window}") for window in (bucket, bucket - 1)]
+
+def _dedup_table_file(generation):
+    """Hash table file holding the keys seen in one generation (day)"""
+    return DEDUP_DIR / f"{generation}.keys"
+
+def _probe_dedup_table(table, digest, insert=False, release=False):
+    """Look up (and optionally insert or release) a digest with linear probing
+    
+    A released slot keeps the probe chain intact; it is never reused.
+    """
+    slot = digest % DEDUP_TABLE_SLOTS
+    for _ in range(DEDUP_MAX_PROBES):
+        table.seek(slot * DEDUP_SLOT_SIZE)
+        stored = int.from_bytes(table.read(DEDUP_SLOT_SIZE) or bytes(DEDUP_SLOT_SIZE), "big")
+        if stored == digest:
+            if release:
+                table.seek(slot * DEDUP_SLOT_SIZE)
+                table.write(DEDUP_RELEASED.to_bytes(DEDUP_SLOT_SIZE, "big"))
+            return True
+        if stored == 0:
+            if insert:
+                table.seek(slot * DEDUP_SLOT_SIZE)
+                table.write(digest.to_bytes(DEDUP_SLOT_SIZE, "big"))
+            return False
+        slot = (slot + 1) % DEDUP_TABLE_SLOTS
+    # Probe limit reached - the table is saturated, treat the key as unseen
+    return False
+
+def is_duplicate_call(digests, now=None):
+    """Check whether any digest was recorded in the current or previous generation"""
+    generation = int((now if now is not None else time.time()) // DEDUP_GENERATION_SECONDS)
+    for table_generation in (generation, generation - 1):
+        path = _dedup_table_file(table_generation)
+        if not path.exists():
+            continue
+        with open(path, "rb") as table:
+            if any(_probe_dedup_table(table, digest) for digest in digests):
+                return True
+    return False
+
+def record_idempotency_digest(digest, now=None):
+    """Remember a digest and drop generations that have rotated out"""
+    generation = int((now if now is not None else time.time()) // DEDUP_GENERATION_SECONDS)
+    DEDUP_DIR.mkdir(exist_ok=True)
+    path = _dedup_table_file(generation)
+    if not path.exists():
+        with open(path, "wb") as table:
+            table.truncate(DEDUP_TABLE_SLOTS * DEDUP_SLOT_SIZE)
+    with open(path, "r+b") as table:
+        _probe_dedup_table(table, digest, insert=True)
+    
+    for old_table in DEDUP_DIR.glob("*.keys"):
+        if old_table.stem.isdigit() and int(old_table.stem) < generation - 1:
+            old_table.unlink()
+
+def claim_idempotency_digests(digests, now=None):
+    """Record a call's digest unless it was seen before - False for a duplicate
+    
+    Check and insert happen under one lock, so of two overlapping retries only one claims the key.
+    """
+    with file_lock(DEDUP_LOCK_FILE):
+        if is_duplicate_call(digests, now):
+            return False
+        record_idempotency_digest(digests[0], now)
+        return True
+
+def release_idempotency_digest(digest, now=None):
+    """Forget a claimed digest whose entry was not written, so a retry is logged"""
+    generation = int((now if now is not None else time.time()) // DEDUP_GENERATION_SECONDS)
+    with file_lock(DEDUP_LOCK_FILE):
+        for table_generation in (generation, generation - 1):
+            path = _dedup_table_file(table_generation)
+            if path.exists():
+                with open(path, "r+b") as table:
+                    _probe_dedup_table(table, digest, release=True)
+
+# ============================================================
+# 🧮 EVENT-SOURCED STATE
+# session_log.json is the source of truth. status.json, cycles and
+# aggregates are projections folded from it; checkpoints of the fold
+# every CHECKPOINT_INTERVAL events keep a replay short. Reverts are
+# appended as compensating events, so the log stays append-only.
+# ============================================================
+
+def is_revert_event(entry):
+    """Check whether a log entry is a compensating revert event"""
+    return entry.get("type") == "revert"
+
+def get_live_entries(log_data=None):
+    """Log entries that are neither revert events nor reverted (streamed when log_data is omitted)"""
+    read_entries = iter_log if log_data is None else lambda: log_data
+    reverted = {entry["reverts"] for entry in read_entries() if is_revert_event(entry)}
+    return (entry for entry in read_entries()
+            if not is_revert_event(entry) and get_entry_id(entry) not in reverted)
+
+def new_projection():
+    """Empty projection state before any event has been applied"""
+    return {
+        "version": PROJECTION_VERSION,
+        "event_count": 0,
+        "last_entry_id": None,
+        "last_updated": None,
+        "sessions": {},
+        "agents": {},
+        "daily": {},
+        "metrics": {"phase_seconds": {}, "red_to_green": {}, "open": {}},
+        "reverted": []
+    }
+
+def apply_event(state, event):
+    """Fold one log event into the projection state"""
+    state["event_count"] += 1
+    state["last_entry_id"] = get_entry_id(event)
+    state["last_updated"] = event.get("timestamp", state["last_updated"])
+    
+    if is_revert_event(event):
+        if event["reverts"] in state["reverted"]:
+            return
+        state["reverted"].append(event["reverts"])
+        sign = -1
+    else:
+        sign = 1
+    
+    tdd_phase = event.get("tdd_phase", "UNKNOWN")
+    stats = state["sessions"].setdefault(event["session_id"], {"entries": 0, "completing_entries": 0, "phases": {}})
+    stats["entries"] += sign
+    # Automatic entries (test runs, bundle checks) never complete a session
+    if not event.get("source"):
+        stats["completing_entries"] += sign
+    stats["phases"][tdd_phase] = stats["phases"].get(tdd_phase, 0) + sign
+    if sign > 0 and event.get("timestamp"):
+        stats["first_entry"] = min(stats.get("first_entry") or event["timestamp"], event["timestamp"])
+        stats["last_entry"] = max(stats.get("last_entry") or event["timestamp"], event["timestamp"])
+    if tdd_phase in TDD_PHASES and sign > 0:
+        _fold_tdd_state(stats, tdd_phase)
+    
+    # A revert takes the entry away from the agent that wrote it, not from the reverting agent
+    agents = state.setdefault("agents", {})
+    agent_id = event.get("reverts_agent" if sign < 0 else "agent", "unattributed")
+    agents[agent_id] = agents.get(agent_id, 0) + sign
+    
+    # Daily aggregates feed the dashboard charts; a revert is taken off the reverted entry's day
+    timestamp = event.get("reverts_timestamp" if sign < 0 else "timestamp")
+    day = state.setdefault("daily", {}).setdefault(
+        (timestamp or "unknown")[:10],
+        {"phases": {}, "roadmap_phases": {}, "completed_minutes": 0, "completed_sessions": 0})
+    day["phases"][tdd_phase] = day["phases"].get(tdd_phase, 0) + sign
+    roadmap_phase = event.get("phase") or "UNKNOWN"
+    day["roadmap_phases"][roadmap_phase] = day["roadmap_phases"].get(roadmap_phase, 0) + sign
+    # A session burns down its planned minutes on the day it gets its first completing entry,
+    # and they return on that same day when its last completing entry is reverted
+    if (event["session_id"] in ROADMAP_SESSIONS and not event.get("source")
+            and stats["completing_entries"] == (1 if sign > 0 else 0)):
+        if sign > 0:
+            stats["burn_day"] = day_key = (timestamp or "unknown")[:10]
+        else:
+            day_key = stats.pop("burn_day", (timestamp or "unknown")[:10])
+        burn_day = state["daily"].setdefault(
+            day_key, {"phases": {}, "roadmap_phases": {}, "completed_minutes": 0, "completed_sessions": 0})
+        burn_day["completed_minutes"] += sign * ROADMAP_SESSIONS[event["session_id"]]["duration"]
+        burn_day["completed_sessions"] += sign
+    
+    # Phase timing follows the live event stream and is not unwound by reverts
+    if sign > 0 and tdd_phase != "UNKNOWN":
+        _fold_phase_timing(state, event, tdd_phase)
+
+def _checkpoint_file(event_count):
+    """Checkpoint file for the projection after event_count events"""
+    return CHECKPOINT_DIR / f"checkpoint_{event_count:09d}.json"
+
+def save_checkpoint(state):
+    """Persist the projection state and keep only the newest checkpoints"""
+    CHECKPOINT_DIR.mkdir(exist_ok=True)
+    write_file_atomic(_checkpoint_file(state["event_count"]), json.dumps(state))
+    for old_checkpoint in sorted(CHECKPOINT_DIR.glob("checkpoint_*.json"))[:-CHECKPOINTS_KEPT]:
+        old_checkpoint.unlink()
+
+def load_nearest_checkpoint(log_data):
+    """Load the newest checkpoint that is still a valid prefix of the log"""
+    if CHECKPOINT_DIR.exists():
+        for checkpoint in sorted(CHECKPOINT_DIR.glob("checkpoint_*.json"), reverse=True):
+            state = json.loads(checkpoint.read_text())
+            if state.get("version") != PROJECTION_VERSION:
+                # Written by an older projection - replay past it
+                continue
+            count = state["event_count"]
+            # A checkpoint only applies if the log still has the event it ended on
+            if 0 < count <= len(log_data) and get_entry_id(log_data[count - 1]) == state["last_entry_id"]:
+                return state
+    return new_projection()
+
+def project_log(log_data, use_checkpoints=True):
+    """Replay the log from the nearest checkpoint into a projection state"""
+    state = load_nearest_checkpoint(log_data) if use_checkpoints else new_projection()
+    targets = None
+    for position in range(state["event_count"], len(log_data)):
+        event = log_data[position]
+        if is_revert_event(event) and not ("reverts_agent" in event and "reverts_timestamp" in event):
+            # Written before reverts recorded their target's author and time - look them up once
+            if targets is None:
+                targets = {get_entry_id(entry): entry for entry in log_data if not is_revert_event(entry)}
+            target = targets.get(event["reverts"], {})
+            event = {"reverts_agent": target.get("agent", "unattributed"),
+                     "reverts_timestamp": target.get("timestamp"), **event}
+        apply_event(state, event)
+        if is_revert_event(event) and event["session_id"] in state["sessions"]:
+            # The reverted entry may sit anywhere in the session's cycle - refold its phase and streak
+            _refold_tdd_state(state["sessions"][event["session_id"]], event["session_id"],
+                              itertools.islice(log_data, position), set(state["reverted"]))
+        if state["event_count"] % CHECKPOINT_INTERVAL == 0:
+            save_checkpoint(state)
+    return state
+
+def build_status(state):
+    """Build the status.json document from a projection state"""
+    completed = [session_id for session_id in ROADMAP_SESSIONS
+                 if state["sessions"].get(session_id, {}).get("completing_entries", 0) > 0]
+    sessions = {}
+    for session_id, stats in state["sessions"].items():
+        if stats["entries"] <= 0:
+            continue
+        sessions[session_id] = {
+            "entries": stats["entries"],
+            "tdd_cycles": stats["phases"].get("RED", 0),
+            "phases": {phase: count for phase, count in stats["phases"].items() if count > 0},
+            "first_entry": stats.get("first_entry"),
+            "last_entry": stats.get("last_entry")
+        }
+        if stats.get("tdd_state"):
+            sessions[session_id]["tdd_state"] = dict(stats["tdd_state"])
+    
+    return {
+        "completed_sessions": completed,
+        "current_phase": ROADMAP_SESSIONS[completed[-1]]["phase"] if completed else "FASE 1: FOUNDATION",
+        "total_sessions": len(ROADMAP_SESSIONS),
+        "last_updated": state["last_updated"] or get_timestamp(),
+        "event_count": state["event_count"],
+        "sessions": sessions,
+        "aggregates": {
+            "live_entries": sum(stats["entries"] for stats in sessions.values()),
+            "reverted_entries": len(state["reverted"]),
+            "completed_minutes": sum(ROADMAP_SESSIONS[session_id]["duration"] for session_id in completed)
+        },
+        "agents": {agent_id: count for agent_id, count in state.get("agents", {}).items() if count > 0},
+        "daily": {day: state["daily"][day] for day in sorted(state.get("daily", {}))},
+        "metrics": {key: value for key, value in state.get("metrics", {}).items() if key != "open"}
+    }
+
+def rebuild_state(full=False):
+    """Rebuild status.json and reports by replaying the session log"""
+    started = time.perf_counter()
+    with file_lock(PROJECTION_LOCK_FILE):
+        log_data = load_log()
+        if full and CHECKPOINT_DIR.exists():
+            for checkpoint in CHECKPOINT_DIR.glob("checkpoint_*.json"):
+                checkpoint.unlink()
+        
+        state = load_nearest_checkpoint(log_data)
+        replayed = len(log_data) - state["event_count"]
+        writes = update_status(log_data)
+    return RebuildResult(len(log_data), replayed, (time.perf_counter() - started) * 1000, writes)
+
+def find_log_entry(log_data, entry_reference):
+    """Find a log entry by entry ID or unique ID prefix"""
+    matches = [entry for entry in log_data
+               if not is_revert_event(entry) and get_entry_id(entry).startswith(entry_reference)]
+    return matches[0] if len(matches) == 1 else None
+
+def revert_entry(entry_reference=None, agent_id=None):
+    """Append a revert event for an entry (the latest live entry when omitted)"""
+    with file_lock(PROJECTION_LOCK_FILE):
+        return _revert_entry(entry_reference, agent_id)
+
+def _revert_entry(entry_reference, agent_id):
+    log_data = load_log()
+    live_entries = list(get_live_entries(log_data))
+    
+    if entry_reference is None:
+        if not live_entries:
+            return RevertResult(False, error="Nothing to undo")
+        target = live_entries[-1]
+    else:
+        target = find_log_entry(log_data, entry_reference)
+        if target is None:
+            return RevertResult(False, error=f"Unknown or ambiguous entry: {entry_reference}")
+        if target not in live_entries:
+            return RevertResult(False, target=target, error=f"Entry {get_entry_id(target)} is already reverted")
+    
+    revert_event = {
+        "entry_id": new_entry_id(),
+        "type": "revert",
+        "reverts": get_entry_id(target),
+        "session_id": target["session_id"],
+        "title": target.get("title"),
+        "phase": target.get("phase"),
+        "action": f"REVERTED: {target.get('action', '')}",
+        "timestamp": get_timestamp(),
+        "tdd_phase": target.get("tdd_phase", "UNKNOWN"),
+        **({"source": target["source"]} if "source" in target else {}),
+        "agent": get_agent_id(agent_id),
+        "reverts_agent": target.get("agent", "unattributed"),
+        "reverts_timestamp": target.get("timestamp"),
+        "lamport": next_lamport(log_data)
+    }
+    log_data.append(revert_event)
+    update_status(log_data, [revert_event])
+    index_entries([revert_event], log_data)
+    return RevertResult(True, target=target, event=revert_event)
+
+# ============================================================
+# 🚦 TDD STATE MACHINE
+# Each session moves through PLANNING → RED → GREEN → REFACTOR on its
+# own, so parallel sessions never trip over each other. Transitions
+# are looked up in a table built from a rule set (after tdd_rules in
+# the original TDD system); strict rules reject a violating entry,
+# lenient rules log it with a warning.
+# ============================================================
+
+TDD_PHASES = ("RED", "GREEN", "REFACTOR")
+TDD_RULE_SETS = {
+    "strict": {
+        "enforce_red_first": True,
+        "require_test_before_code": True,
+        "minimum_coverage": 90,
+        "max_refactor_without_test": 0,
+        "reject_violations": True
+    },
+    "lenient": {
+        "enforce_red_first": False,
+        "require_test_before_code": False,
+        "minimum_coverage": 80,
+        "max_refactor_without_test": None,
+        "reject_violations": False
+    }
+}
+
+def build_transition_table(rules):
+    """Map (current phase, next phase) to the violated rule, or None if allowed"""
+    table = {(current, next_phase): None
+             for current in ("PLANNING", *TDD_PHASES) for next_phase in TDD_PHASES}
+    
+    # Rule: GREEN must follow RED, REFACTOR must follow GREEN
+    table[("RED", "REFACTOR")] = "REFACTOR phase must follow GREEN phase - implement code to pass tests first"
+    table[("REFACTOR", "GREEN")] = "GREEN phase must follow RED phase - write a failing test first"
+    if rules["enforce_red_first"]:
+        # Rule: Must start with RED phase
+        table[("PLANNING", "GREEN")] = table[("PLANNING", "REFACTOR")] = \
+            "Must start with RED phase - write a failing test first"
+    if rules["require_test_before_code"]:
+        table[("GREEN", "GREEN")] = "More code without a new failing test - write a failing test first"
+    return table
+
+class TDDStateMachine:
+    """Current TDD phase per session, validated against a rule set"""
+    
+    def __init__(self, rule_set="lenient", states=None):
+        if rule_set not in TDD_RULE_SETS:
+            raise ValueError(f"Unknown TDD rule set: {rule_set} (available: {', '.join(TDD_RULE_SETS)})")
+        self.rule_set = rule_set
+        self.rules = TDD_RULE_SETS[rule_set]
+        self.table = build_transition_table(self.rules)
+        # session_id -> [phase, consecutive REFACTOR entries]
+        self.states = {session_id: list(state) for session_id, state in (states or {}).items()}
+    
+    @classmethod
+    def from_status(cls, status, rule_set="lenient"):
+        """Seed the machine with each session's phase from a status document"""
+        return cls(rule_set, {session_id: (stats["tdd_state"]["phase"], stats["tdd_state"]["refactor_streak"])
+                              for session_id, stats in status.get("sessions", {}).items() if "tdd_state" in stats})
+    
+    def current_phase(self, session_id):
+        return self.states.get(session_id, ("PLANNING", 0))[0]
+    
+    def check(self, session_id, tdd_phase):
+        """The rule an entry of this phase would violate, or None"""
+        if tdd_phase not in TDD_PHASES:
+            return None
+        current, streak = self.states.get(session_id, ("PLANNING", 0))
+        violation = self.table[(current, tdd_phase)]
+        limit = self.rules["max_refactor_without_test"]
+        if violation is None and tdd_phase == "REFACTOR" and limit is not None and streak > limit:
+            violation = f"More than {limit + 1} REFACTOR step(s) without a test - go back to RED"
+        return violation
+    
+    def advance(self, session_id, tdd_phase):
+        """Move a session to the phase of an accepted entry"""
+        if tdd_phase not in TDD_PHASES:
+            return
+        state = self.states.setdefault(session_id, ["PLANNING", 0])
+        state[1] = next_refactor_streak(state[0], state[1], tdd_phase)
+        state[0] = tdd_phase
+    
+    def validate(self, events):
+        """Check a batch of events in one pass, returning the violations
+        
+        Under rejecting rules a violating event does not move its session on.
+        """
+        violations = []
+        for position, event in enumerate(events):
+            if is_revert_event(event):
+                continue
+            tdd_phase = event.get("tdd_phase", "UNKNOWN")
+            violation = self.check(event["session_id"], tdd_phase)
+            if violation:
+                violations.append(TransitionViolation(
+                    position=position, entry_id=get_entry_id(event), session_id=event["session_id"],
+                    from_phase=self.current_phase(event["session_id"]), to_phase=tdd_phase,
+                    rule=violation, rejected=self.rules["reject_violations"]))
+                if self.rules["reject_violations"]:
+                    continue
+            self.advance(event["session_id"], tdd_phase)
+        return violations
+
+def next_refactor_streak(current, streak, tdd_phase):
+    """Consecutive REFACTOR entries after moving from current to tdd_phase"""
+    if tdd_phase != "REFACTOR":
+        return 0
+    return streak + 1 if current == "REFACTOR" else 1
+
+def _fold_tdd_state(stats, tdd_phase):
+    """Move a session's state machine phase and REFACTOR streak on by one classified entry"""
+    current = stats.get("tdd_state") or {"phase": "PLANNING", "refactor_streak": 0}
+    stats["tdd_state"] = {"phase": tdd_phase,
+                          "refactor_streak": next_refactor_streak(current["phase"], current["refactor_streak"], tdd_phase)}
+
+def _refold_tdd_state(stats, session_id, events, reverted):
+    """Recompute a session's phase and streak from its live classified entries (after a revert)"""
+    stats.pop("tdd_state", None)
+    for event in events:
+        if (event.get("session_id") == session_id and event.get("tdd_phase") in TDD_PHASES
+                and not is_revert_event(event) and get_entry_id(event) not in reverted):
+            _fold_tdd_state(stats, event["tdd_phase"])
+
+# ============================================================
+# 📒 WRITE-AHEAD JOURNAL
+# One logged action updates the log, status and both reports. The
+# whole update is first appended to the writer's journal (one fsync),
+# then the files are replaced atomically and a commit marker is
+# written. The target files themselves are only fsynced every
+# JOURNAL_SYNC_INTERVAL commits, after which the journal is truncated.
+# Loading the log, projecting it and committing the result happen
+# under one shared projection lock, so status.json and the snapshots
+# never fall behind an entry another writer committed meanwhile.
+# ============================================================
+
+def write_file_atomic(path, content):
+    """Replace a file's content atomically via a temp file in the same directory"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    data = content.encode("utf-8")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+    profile_count("bytes_written", len(data))
+
+def file_content_matches(path, content):
+    """Check whether a file already holds exactly this content"""
+    data = content.encode("utf-8")
+    try:
+        # A size mismatch settles it without reading the file
+        if path.stat().st_size != len(data):
+            return False
+        return path.read_bytes() == data
+    except FileNotFoundError:
+        return False
+
+@contextmanager
+def file_lock(lock_path, blocking=True):
+    """Hold an advisory lock on lock_path - yields False if non-blocking and already held"""
+    lock_path.parent.mkdir(exist_ok=True)
+    while True:
+        with open(lock_path, "a") as lock_file:
+            if fcntl is None:
+                yield True
+                return
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                # The holder we waited for may have removed the lock file - lock the new one instead
+                try:
+                    current = os.stat(lock_path)
+                except FileNotFoundError:
+                    continue
+                if not os.path.samestat(current, os.fstat(lock_file.fileno())):
+                    continue
+                yield True
+                return
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _journal_file(agent_id):
+    """Journal of one writer"""
+    return JOURNAL_DIR / f"{agent_id}.log"
+
+def _journal_checksum(ops):
+    """Checksum of a transaction's operations, used to detect torn records"""
+    return hashlib.sha256(json.dumps(ops, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _append_journal_record(journal_path, record, sync=False):
+    """Append one JSON record to a journal"""
+    data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(journal_path, "ab") as journal:
+        journal.write(data)
+        if sync:
+            journal.flush()
+            os.fsync(journal.fileno())
+    profile_count("bytes_written", len(data))
+
+def read_journal(journal_path):
+    """Read complete transactions from a journal, and whether a torn tail was dropped"""
+    if not journal_path.exists():
+        return [], False
+    transactions = []
+    for line in journal_path.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            return transactions, True
+        if "commit" in record:
+            for transaction in transactions:
+                if transaction["txn"] == record["commit"]:
+                    transaction["committed"] = True
+        elif record.get("checksum") == _journal_checksum(record.get("ops")):
+            transactions.append({**record, "committed": False})
+        else:
+            return transactions, True
+    return transactions, False
+
+def _apply_journal_op(op, replay=False):
+    """Apply one journaled operation (idempotent, so it can be replayed), returning the entries it appended"""
+    path = TDD_DIR / op["file"]
+    if op["op"] == "append_shard":
+        return append_to_shard(path, op["entries"], replay)
+    if op["op"] == "write":
+        write_file_atomic(path, op["content"])
+    return []
+
+def commit_context_update(new_entries, files, agent_id=None):
+    """Journal, apply and commit a multi-file update of the context files
+    
+    Generated files whose content is unchanged are left untouched, so editors
+    and file watchers only see real changes.
+    """
+    ops = []
+    writes = {"written": [], "skipped": []}
+    shards = {}
+    for entry in new_entries:
+        shards.setdefault(entry["agent"], []).append(entry)
+    for shard_agent_id, entries in shards.items():
+        shard_path = _shard_file(shard_agent_id).relative_to(TDD_DIR).as_posix()
+        ops.append({"op": "append_shard", "file": shard_path, "entries": entries})
+    for path, content in files.items():
+        if file_content_matches(path, content):
+            writes["skipped"].append(path.name)
+            continue
+        ops.append({"op": "write", "file": path.name, "content": content})
+        writes["written"].append(path.name)
+    if not ops:
+        return writes
+    
+    agent_id = get_agent_id(agent_id or next(iter(shards), None))
+    journal_path = _journal_file(agent_id)
+    with file_lock(journal_path.with_suffix(".lock")):
+        txn_id = new_entry_id()
+        _append_journal_record(journal_path, {"txn": txn_id, "ops": ops, "checksum": _journal_checksum(ops)}, sync=True)
+        for op in ops:
+            _apply_journal_op(op)
+        _append_journal_record(journal_path, {"commit": txn_id})
+        
+        if len(read_journal(journal_path)[0]) >= JOURNAL_SYNC_INTERVAL:
+            flush_journal(journal_path)
+    compact_shards()
+    return writes
+
+def flush_journal(journal_path):
+    """Make all journaled files durable with one batch of fsyncs, then truncate the journal"""
+    transactions, _ = read_journal(journal_path)
+    touched = {op["file"] for transaction in transactions for op in transaction["ops"]}
+    for file_name in touched:
+        path = TDD_DIR / file_name
+        if path.exists():
+            with open(path, "rb") as target:
+                os.fsync(target.fileno())
+    if hasattr(os, "O_DIRECTORY"):
+        for directory_path in {TDD_DIR, SHARD_DIR} & {(TDD_DIR / name).parent for name in touched}:
+            directory = os.open(directory_path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+    if journal_path.exists():
+        journal_path.unlink()
+    # Waiting writers notice the removed lock file and lock a fresh one
+    journal_path.with_suffix(".lock").unlink(missing_ok=True)
+
+def recover_journal():
+    """Finish updates interrupted mid-way, returning how many were recovered"""
+    if not JOURNAL_DIR.exists():
+        return 0
+    
+    interrupted = 0
+    torn_records = 0
+    recovered_entries = []
+    for journal_path in sorted(JOURNAL_DIR.glob("*.log")):
+        # A journal whose lock is held belongs to a writer that is still running
+        with file_lock(journal_path.with_suffix(".lock"), blocking=False) as acquired:
+            if not acquired:
+                continue
+            transactions, torn = read_journal(journal_path)
+            # The journal still exists, so even its committed appends were never fsynced and
+            # may have been lost with the page cache. Log appends are replayed idempotently;
+            # everything else is re-projected below.
+            for transaction in transactions:
+                appends = [op for op in transaction["ops"] if op["op"] == "append_shard"]
+                restored = [entry for op in appends for entry in _apply_journal_op(op, replay=True)]
+                if transaction["committed"] and not restored:
+                    continue
+                interrupted += 1
+                # An uncommitted transaction was never indexed, even where its append reached the shard
+                recovered_entries.extend(restored if transaction["committed"]
+                                         else [entry for op in appends for entry in op["entries"]])
+            flush_journal(journal_path)
+            torn_records += torn
+    
+    if not interrupted and not torn_records:
+        return 0
+    
+    # Status and reports are projections of the log, so rebuilding them finishes the update
+    with file_lock(PROJECTION_LOCK_FILE):
+        log_data = load_log()
+        update_status(log_data)
+    if recovered_entries:
+        index_entries(recovered_entries, log_data)
+    
+    return max(interrupted, 1 if torn_records else 0)
+
+# ============================================================
+# 🖨️ REPORT RENDERERS
+# Every report is a renderer registered under a format name. All of
+# them render from one in-memory snapshot (status + log) on a small
+# thread pool. Context files go through the journal with the log;
+# exports are derived data and are written atomically on their own.
+# ============================================================
+
+REPORT_RENDERERS = {}
+
+def register_report_renderer(name, path, journaled=False, automatic=True):
+    """Register a function rendering a report snapshot to the content of path
+    
+    Automatic renderers run on every status update; the others only on request.
+    """
+    def register(render):
+        REPORT_RENDERERS[name] = {"path": path, "render": render, "journaled": journaled, "automatic": automatic}
+        return render
+    return register
+
+@register_report_renderer("status", CURRENT_STATUS_FILE, journaled=True)
+def render_status_json(snapshot):
+    return json.dumps(snapshot["status"], indent=2)
+
+@register_report_renderer("progress", PROGRESS_FILE, journaled=True)
+def render_progress_markdown(snapshot):
+    return generate_progress_report(snapshot["status"])
+
+@register_report_renderer("next-steps", NEXT_STEPS_FILE, journaled=True)
+def render_next_steps_markdown(snapshot):
+    return generate_next_steps(snapshot["status"])
+
+@register_report_renderer("timeline", TIMELINE_CSV_FILE)
+def render_timeline_csv(snapshot):
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(["entry_id", "timestamp", "session_id", "phase", "tdd_phase", "agent", "action"])
+    for entry in get_live_entries(snapshot["log_data"]):
+        writer.writerow([get_entry_id(entry), entry.get("timestamp", ""), entry["session_id"],
+                         entry.get("phase", ""), entry.get("tdd_phase", "UNKNOWN"),
+                         entry.get("agent", "unattributed"), entry.get("action", "")])
+    return output.getvalue()
+
+@register_report_renderer("html", DASHBOARD_HTML_FILE)
+def render_status_html(snapshot):
+    status = snapshot["status"]
+    completed = status["completed_sessions"]
+    progress_percent = len(completed) / status["total_sessions"] * 100
+    
+    rows = []
+    for session_id, session in ROADMAP_SESSIONS.items():
+        stats = status["sessions"].get(session_id)
+        phases = ", ".join(f"{phase} {count}" for phase, count in sorted(stats["phases"].items())) if stats else ""
+        rows.append(f"<tr><td>{'✅' if stats else '⬜'}</td><td>{session_id}</td>"
+                    f"<td>{html.escape(session['title'])}</td><td>{html.escape(session['phase'])}</td>"
+                    f"<td>{stats['entries'] if stats else 0}</td><td>{html.escape(phases)}</td></tr>")
+    
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>ExamKlar TDD Status</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; color: #1f2933; }}
+.bar {{ background: #e4e7eb; border-radius: 4px; height: 1rem; width: 100%; max-width: 40rem; }}
+.bar div {{ background: #3ebd93; border-radius: 4px; height: 100%; width: {progress_percent:.1f}%; }}
+table {{ border-collapse: collapse; margin-top: 1.5rem; }}
+td, th {{ border-bottom: 1px solid #e4e7eb; padding: 0.3rem 0.8rem; text-align: left; }}
+</style>
+</head>
+<body>
+<h1>🚀 ExamKlar TDD Status</h1>
+<p><strong>{len(completed)}/{status["total_sessions"]}</strong> sessions ({progress_percent:.1f}%) ·
+{html.escape(status["current_phase"])} · last updated {html.escape(status["last_updated"])}</p>
+<div class="bar"><div></div></div>
+<table>
+<tr><th></th><th>Session</th><th>Title</th><th>Phase</th><th>Entries</th><th>TDD phases</th></tr>
+{chr(10).join(rows)}
+</table>
+</body>
+</html>
+"""
+
+def render_reports(snapshot, formats=None):
+    """Render the requested report formats (default: all automatic ones) concurrently"""
+    names = ([name for name, renderer in REPORT_RENDERERS.items() if renderer["automatic"]]
+             if formats is None else list(formats))
+    unknown = [name for name in names if name not in REPORT_RENDERERS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s): {', '.join(unknown)} "
+                         f"(available: {', '.join(REPORT_RENDERERS)})")
+    
+    def render(name):
+        with profile_stage(f"render:{name}"):
+            return REPORT_RENDERERS[name]["render"](snapshot)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(REPORT_RENDER_WORKERS, len(names)))) as pool:
+        futures = {name: pool.submit(render, name) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+
+def write_report_exports(rendered):
+    """Atomically write rendered exports that are not journaled, skipping unchanged files"""
+    writes = {"written": [], "skipped": []}
+    for name, content in rendered.items():
+        path = REPORT_RENDERERS[name]["path"]
+        if file_content_matches(path, content):
+            writes["skipped"].append(path.name)
+        else:
+            write_file_atomic(path, content)
+            writes["written"].append(path.name)
+    return writes
+
+def write_reports(log_data, new_entries=(), formats=None):
+    """Render reports from one snapshot of the log and write them
+    
+    Journaled context files are committed together with new_entries;
+    the remaining exports are written after the commit.
+    """
+    with profile_stage("project"):
+        status = build_status(project_log(log_data))
+    rendered = render_reports({"status": status, "log_data": log_data}, formats)
+    
+    context_files = {REPORT_RENDERERS[name]["path"]: content for name, content in rendered.items()
+                     if REPORT_RENDERERS[name]["journaled"]}
+    with profile_stage("commit"):
+        writes = commit_context_update(new_entries, context_files)
+    with profile_stage("exports"):
+        exports = write_report_exports({name: content for name, content in rendered.items()
+                                        if not REPORT_RENDERERS[name]["journaled"]})
+    for kind in ("written", "skipped"):
+        writes[kind].extend(exports[kind])
+    
+    if CURRENT_STATUS_FILE.name in writes["written"]:
+        with profile_stage("snapshot"):
+            publish_status_snapshot(status)
+    return writes
+
+# ============================================================
+# 📈 DASHBOARD
+# A self-contained HTML page with inline SVG charts. It is drawn
+# from the daily aggregates kept in status.json by the projection
+# fold, so rendering it never rescans the log.
+# ============================================================
+
+CHART_WIDTH = 640
+CHART_HEIGHT = 220
+CHART_PADDING = 40
+TDD_PHASE_COLORS = {"RED": "#e12d39", "GREEN": "#3ebd93", "REFACTOR": "#2186eb"}
+
+def _chart_points(values, max_value):
+    """Map a series onto chart coordinates"""
+    span = max(len(values) - 1, 1)
+    inner_width = CHART_WIDTH - 2 * CHART_PADDING
+    inner_height = CHART_HEIGHT - 2 * CHART_PADDING
+    return [(CHART_PADDING + index * inner_width / span,
+             CHART_HEIGHT - CHART_PADDING - (value / max_value if max_value else 0) * inner_height)
+            for index, value in enumerate(values)]
+
+def _svg_frame(title, days, max_value, body):
+    """Wrap chart content with axes and labels"""
+    bottom = CHART_HEIGHT - CHART_PADDING
+    first, last = (days[0], days[-1]) if days else ("", "")
+    return f"""<figure>
+<figcaption>{html.escape(title)}</figcaption>
+<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" width="{CHART_WIDTH}" height="{CHART_HEIGHT}" role="img">
+<line x1="{CHART_PADDING}" y1="{CHART_PADDING}" x2="{CHART_PADDING}" y2="{bottom}" stroke="#9aa5b1"/>
+<line x1="{CHART_PADDING}" y1="{bottom}" x2="{CHART_WIDTH - CHART_PADDING}" y2="{bottom}" stroke="#9aa5b1"/>
+<text x="{CHART_PADDING - 4}" y="{CHART_PADDING + 4}" text-anchor="end">{max_value}</text>
+<text x="{CHART_PADDING - 4}" y="{bottom}" text-anchor="end">0</text>
+<text x="{CHART_PADDING}" y="{bottom + 16}">{first}</text>
+<text x="{CHART_WIDTH - CHART_PADDING}" y="{bottom + 16}" text-anchor="end">{last}</text>
+{body}
+</svg>
+</figure>"""
+
+def render_burndown_svg(days, daily, total_minutes):
+    """Remaining planned minutes at the end of each active day"""
+    remaining = []
+    left = total_minutes
+    for day in days:
+        left -= daily[day].get("completed_minutes", 0)
+        remaining.append(left)
+    points = _chart_points([total_minutes] + remaining, total_minutes)
+    polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    body = f'<polyline points="{polyline}" fill="none" stroke="#e12d39" stroke-width="2"/>'
+    return _svg_frame(f"Burndown: {remaining[-1] if remaining else total_minutes} of {total_minutes} planned minutes remaining",
+                      days, total_minutes, body)
+
+def render_cumulative_flow_svg(days, daily):
+    """Cumulative RED/GREEN/REFACTOR entries, stacked per day"""
+    totals = {phase: 0 for phase in TDD_PHASE_COLORS}
+    stacks = {phase: [] for phase in TDD_PHASE_COLORS}
+    for day in days:
+        base = 0
+        for phase in TDD_PHASE_COLORS:
+            totals[phase] += daily[day]["phases"].get(phase, 0)
+            base += totals[phase]
+            stacks[phase].append(base)
+    max_value = max([stacks["REFACTOR"][-1]] if days else [0]) or 1
+    
+    body = []
+    lower = [0] * len(days)
+    for phase, color in TDD_PHASE_COLORS.items():
+        upper_points = _chart_points(stacks[phase], max_value)
+        lower_points = _chart_points(lower, max_value)
+        polygon = " ".join(f"{x:.1f},{y:.1f}" for x, y in upper_points + lower_points[::-1])
+        body.append(f'<polygon points="{polygon}" fill="{color}" fill-opacity="0.7"><title>{phase}: {totals[phase]}</title></polygon>')
+        lower = stacks[phase]
+    legend = " · ".join(f"{phase} {count}" for phase, count in totals.items())
+    return _svg_frame(f"Cumulative flow ({legend})", days, max_value, "\n".join(body))
+
+def render_throughput_svg(days, daily):
+    """Live entries and active days per roadmap phase"""
+    phase_names = list(dict.fromkeys(session["phase"] for session in ROADMAP_SESSIONS.values()))
+    entries = {phase: 0 for phase in phase_names}
+    active_days = {phase: 0 for phase in phase_names}
+    for day in days:
+        for phase, count in daily[day]["roadmap_phases"].items():
+            if phase in entries and count > 0:
+                entries[phase] += count
+                active_days[phase] += 1
+    
+    max_value = max(entries.values()) or 1
+    bar_height = (CHART_HEIGHT - 2 * CHART_PADDING) / len(phase_names)
+    inner_width = CHART_WIDTH - 2 * CHART_PADDING - 200
+    body = []
+    for index, phase in enumerate(phase_names):
+        y = CHART_PADDING + index * bar_height
+        width = entries[phase] / max_value * inner_width
+        rate = entries[phase] / active_days[phase] if active_days[phase] else 0
+        body.append(f'<text x="{CHART_PADDING}" y="{y + bar_height * 0.65:.1f}">{html.escape(phase.split(":")[0])}</text>'
+                    f'<rect x="{CHART_PADDING + 60}" y="{y + 2:.1f}" width="{width:.1f}" height="{bar_height - 4:.1f}" fill="#2186eb"/>'
+                    f'<text x="{CHART_PADDING + 66 + width:.1f}" y="{y + bar_height * 0.65:.1f}">'
+                    f'{entries[phase]} entries, {rate:.1f}/active day</text>')
+    return f"""<figure>
+<figcaption>Throughput per phase</figcaption>
+<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" width="{CHART_WIDTH}" height="{CHART_HEIGHT}" role="img">
+{chr(10).join(body)}
+</svg>
+</figure>"""
+
+@register_report_renderer("dashboard", DASHBOARD_FILE, automatic=False)
+def render_dashboard_html(snapshot):
+    status = snapshot["status"]
+    daily = status.get("daily", {})
+    days = sorted(daily)
+    total_minutes = sum(session["duration"] for session in ROADMAP_SESSIONS.values())
+    completed = status["completed_sessions"]
+    
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>ExamKlar TDD Dashboard</title>
+<style>
+body {{ font-family: system-ui, sans-serif; margin: 2rem; color: #1f2933; }}
+figure {{ margin: 2rem 0; }}
+figcaption {{ font-weight: 600; margin-bottom: 0.5rem; }}
+svg text {{ font-size: 11px; fill: #52606d; }}
+</style>
+</head>
+<body>
+<h1>📈 ExamKlar TDD Dashboard</h1>
+<p><strong>{len(completed)}/{status["total_sessions"]}</strong> sessions · {len(days)} active days ·
+{html.escape(status["current_phase"])} · last updated {html.escape(status["last_updated"])}</p>
+{render_burndown_svg(days, daily, total_minutes)}
+{render_cumulative_flow_svg(days, daily)}
+{render_throughput_svg(days, daily)}
+</body>
+</html>
+"""
+
+# ============================================================
+# 📊 METRICS
+# OpenMetrics / Prometheus text exposition. Counters are folded into
+# the projection as entries are logged (and published in status.json);
+# CLI command latencies are added to a small histogram file after each
+# run. A scrape only reads those two files, never the log.
+# ============================================================
+
+def observe_histogram(histogram, buckets, value):
+    """Add one observation to a histogram of per-bucket counts (last slot is +Inf)"""
+    if not histogram:
+        histogram.update({"buckets": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0})
+    slot = next((index for index, bound in enumerate(buckets) if value <= bound), len(buckets))
+    histogram["buckets"][slot] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+def _fold_phase_timing(state, event, tdd_phase):
+    """Accumulate time spent in each TDD phase and RED→GREEN latency for a session"""
+    try:
+        moment = datetime.fromisoformat(event["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return
+    metrics = state.setdefault("metrics", new_projection()["metrics"])
+    current = metrics["open"].get(event["session_id"])
+    if current and moment >= current["since"]:
+        metrics["phase_seconds"][current["phase"]] = \
+            metrics["phase_seconds"].get(current["phase"], 0) + moment - current["since"]
+    
+    red_since = current["red_since"] if current else None
+    if tdd_phase == "GREEN" and red_since is not None and moment >= red_since:
+        observe_histogram(metrics["red_to_green"], RED_TO_GREEN_BUCKETS, moment - red_since)
+        red_since = None
+    elif tdd_phase == "RED" and red_since is None:
+        red_since = moment
+    metrics["open"][event["session_id"]] = {"phase": tdd_phase, "since": moment, "red_since": red_since}
+
+def record_command_latency(command, seconds):
+    """Add one CLI run to the command latency histograms"""
+    if not TDD_DIR.exists():
+        return
+    with file_lock(COMMAND_METRICS_FILE.with_suffix(".lock")):
+        metrics = _load_json_file(COMMAND_METRICS_FILE, {"commands": {}})
+        observe_histogram(metrics["commands"].setdefault(command, {}), COMMAND_LATENCY_BUCKETS, seconds)
+        write_file_atomic(COMMAND_METRICS_FILE, json.dumps(metrics))
+
+def _histogram_lines(name, labels, histogram, buckets):
+    """OpenMetrics samples for one histogram with cumulative buckets"""
+    prefix = f"{labels}," if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, count in zip([*buckets, "+Inf"], histogram.get("buckets", [0] * (len(buckets) + 1))):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.get('sum', 0.0)}")
+    lines.append(f"{name}_count{suffix} {histogram.get('count', 0)}")
+    return lines
+
+def render_openmetrics(status, prometheus=False):
+    """Render status counters and command latencies as OpenMetrics text
+    
+    With prometheus=True the Prometheus text format is written instead, as read by
+    node_exporter's textfile collector: counter families are named with their
+    _total suffix and there is no # EOF line.
+    """
+    counter = (lambda family: f"{family}_total") if prometheus else (lambda family: family)
+    metrics = status.get("metrics", {})
+    sessions = status.get("sessions", {})
+    live_entries = status.get("aggregates", {}).get("live_entries", 0)
+    unknown_entries = sum(stats["phases"].get("UNKNOWN", 0) for stats in sessions.values())
+    
+    lines = ["# TYPE tdd_session_cycles gauge",
+             "# HELP tdd_session_cycles TDD cycles (RED entries) per roadmap session"]
+    lines += [f'tdd_session_cycles{{session="{session_id}"}} {stats["tdd_cycles"]}'
+              for session_id, stats in sessions.items()]
+    
+    lines += [f"# TYPE {counter('tdd_phase_seconds')} counter",
+              f"# HELP {counter('tdd_phase_seconds')} Time sessions spent in each TDD phase, until their next classified entry"]
+    lines += [f'tdd_phase_seconds_total{{phase="{phase}"}} {seconds:.3f}'
+              for phase, seconds in sorted(metrics.get("phase_seconds", {}).items())]
+    
+    lines += ["# TYPE tdd_red_to_green_seconds histogram",
+              "# HELP tdd_red_to_green_seconds Time from the first RED entry of a cycle to its GREEN entry"]
+    lines += _histogram_lines("tdd_red_to_green_seconds", "", metrics.get("red_to_green", {}), RED_TO_GREEN_BUCKETS)
+    
+    # Live entries drop after an undo, so they are a gauge; appended events only ever grow
+    lines += ["# TYPE tdd_live_entries gauge",
+              "# HELP tdd_live_entries Live log entries by phase classification"]
+    lines.append(f'tdd_live_entries{{classification="unknown"}} {unknown_entries}')
+    lines.append(f'tdd_live_entries{{classification="classified"}} {live_entries - unknown_entries}')
+    lines += [f"# TYPE {counter('tdd_log_events')} counter",
+              f"# HELP {counter('tdd_log_events')} Events appended to the log, reverts included",
+              f"tdd_log_events_total {status.get('event_count', 0)}"]
+    lines += ["# TYPE tdd_unknown_classification_ratio gauge",
+              "# HELP tdd_unknown_classification_ratio Share of live entries without a RED/GREEN/REFACTOR marker",
+              f"tdd_unknown_classification_ratio {unknown_entries / live_entries if live_entries else 0:.4f}"]
+    
+    lines += ["# TYPE tdd_sessions_completed gauge",
+              "# HELP tdd_sessions_completed Roadmap sessions completed",
+              f"tdd_sessions_completed {len(status.get('completed_sessions', []))}"]
+    
+    lines += ["# TYPE tdd_command_duration_seconds histogram",
+              "# HELP tdd_command_duration_seconds Wall time of newtdd.py commands"]
+    for command, histogram in sorted(_load_json_file(COMMAND_METRICS_FILE, {"commands": {}})["commands"].items()):
+        lines += _histogram_lines("tdd_command_duration_seconds", f'command="{command}"',
+                                  histogram, COMMAND_LATENCY_BUCKETS)
+    
+    if not prometheus:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+@register_report_renderer("openmetrics", METRICS_FILE, automatic=False)
+def render_openmetrics_textfile(snapshot):
+    # node_exporter's textfile collector parses the Prometheus text format
+    return render_openmetrics(snapshot["status"], prometheus=True)
+
+# ============================================================
+# 🗂️ SESSION ATTRIBUTION
+# Deliverables start with the file they produce (src/stores/
+# onboardingStore.ts - ...). A trie over their path segments maps a
+# changed file, a test file or a coverage entry to its sessions in
+# one walk of the path, independent of the size of the roadmap.
+# ============================================================
+
+def project_relative_path(path):
+    """Path relative to the project root, also for reports written on another machine"""
+    path = str(path).replace("\\", "/")
+    root = PROJECT_ROOT.as_posix().rstrip("/") + "/"
+    if path.startswith(root):
+        return path[len(root):]
+    parts = path.split("/")
+    if path.startswith("/") or re.match(r"^[A-Za-z]:/", path):
+        for index, part in enumerate(parts):
+            if part in PROJECT_TOP_LEVEL_DIRS:
+                return "/".join(parts[index:])
+    return path[2:] if path.startswith("./") else path
+
+def deliverable_path(deliverable):
+    """The file path a deliverable starts with, if any"""
+    match = re.match(r"((?:%s)/[\w./@-]+)" % "|".join(PROJECT_TOP_LEVEL_DIRS), deliverable)
+    return match.group(1) if match else None
+
+def test_subject_path(test_path):
+    """Source file a test file covers: tests/x/Foo.test.tsx and src/x/__tests__/Foo.test.tsx -> src/x/Foo.tsx"""
+    parts = [part for part in test_path.split("/") if part != "__tests__"]
+    if parts[0] == "tests":
+        parts[0] = "src"
+    parts[-1] = re.sub(r"\.(test|spec)(?=\.[^.]+$)", "", parts[-1])
+    return "/".join(parts)
+
+class DeliverableTrie:
+    """Path-segment trie from deliverable files to the sessions that own them"""
+    
+    def __init__(self):
+        self.root = {"children": {}, "sessions": []}
+    
+    def insert(self, path, session_id):
+        node = self.root
+        for segment in path.split("/"):
+            node = node["children"].setdefault(segment, {"children": {}, "sessions": []})
+        if session_id not in node["sessions"]:
+            node["sessions"].append(session_id)
+    
+    def lookup(self, path):
+        """Sessions owning path itself or a directory above it"""
+        node = self.root
+        sessions = []
+        for segment in path.split("/"):
+            node = node["children"].get(segment)
+            if node is None:
+                break
+            sessions.extend(session_id for session_id in node["sessions"] if session_id not in sessions)
+        return sessions
+    
+
+# The trie over ROADMAP_SESSIONS, built on first use
+_deliverable_trie = None
+
+def get_deliverable_trie():
+    """Trie of every deliverable file path in the roadmap"""
+    global _deliverable_trie
+    if _deliverable_trie is None:
+        _deliverable_trie = DeliverableTrie()
+        for session_id, session in ROADMAP_SESSIONS.items():
+            for deliverable in session["deliverables"]:
+                path = deliverable_path(deliverable)
+                if path:
+                    _deliverable_trie.insert(path, session_id)
+    return _deliverable_trie
+
+def _nearest_deliverables(test_path, graph, follow):
+    """Breadth-first walk over the imports follow() accepts, up to the first level with a deliverable"""
+    trie = get_deliverable_trie()
+    seen = {test_path}
+    level = [test_path]
+    while level:
+        reached = [target for path in level for target in graph.get(path, ())
+                   if target not in seen and follow(target)]
+        seen.update(reached)
+        deliverables = [target for target in reached if trie.lookup(target)]
+        if deliverables:
+            return deliverables
+        level = reached
+    return []
+
+def nearest_imported_deliverables(test_path, graph):
+    """The nearest deliverable files a test file reaches through its imports
+    
+    The walk stops at the first level that reaches a deliverable, so a store
+    test covers the store and not what the store imports. Type-only modules
+    (src/types/...) are neither counted nor walked through: a component test
+    is not a test of the types the component uses. Only a test that imports
+    nothing but types is attributed to them, through barrels like
+    src/types/index.ts.
+    """
+    type_only = getattr(graph, "type_only", frozenset())
+    imports = graph.get(test_path, ())
+    if imports and all(target in type_only for target in imports):
+        return _nearest_deliverables(test_path, graph, lambda target: target in type_only)
+    return _nearest_deliverables(test_path, graph, lambda target: target not in type_only)
+
+def imported_deliverable_sessions(test_path, graph):
+    """Sessions of the nearest deliverables a test file reaches through its imports"""
+    trie = get_deliverable_trie()
+    sessions = []
+    for deliverable in nearest_imported_deliverables(test_path, graph):
+        sessions.extend(session_id for session_id in trie.lookup(deliverable) if session_id not in sessions)
+    return sessions
+
+def attribute_path(path, import_graph=None):
+    """Roadmap sessions a file belongs to: directly, as the test of a deliverable by name,
+    or through the deliverables a test imports
+    
+    import_graph is a callable returning the import graph; it is only called for
+    test files that are not named after a deliverable. A test that reaches no
+    deliverable stays unattributed.
+    """
+    trie = get_deliverable_trie()
+    path = project_relative_path(path.strip())
+    sessions = trie.lookup(path) or trie.lookup(test_subject_path(path))
+    if sessions or not is_test_file(path):
+        return sessions
+    return imported_deliverable_sessions(path, (import_graph or load_import_graph)())
+
+def attribute_paths(paths):
+    """Attribute changed files (e.g. git diff --name-only) to sessions"""
+    by_path = {}
+    by_session = {}
+    import_graph = functools.lru_cache(maxsize=None)(load_import_graph)
+    for path in paths:
+        path = path.strip()
+        if not path:
+            continue
+        by_path[path] = attribute_path(path, import_graph)
+        for session_id in by_path[path]:
+            by_session.setdefault(session_id, []).append(path)
+    return AttributionResult(paths=by_path, sessions=by_session,
+                             unattributed=[path for path, sessions in by_path.items() if not sessions])
+
+# ============================================================
+# 🧪 TEST RESULT INGESTION
+# Vitest JSON, JUnit XML and Playwright JSON reports are streamed
+# (an incremental JSON array reader and iterparse), so a huge report
+# is never held in memory. Each test is attributed to roadmap sessions
+# through its file path and stored as one outcome letter per test;
+# sessions flip to RED or GREEN from real failures and passes.
+# ============================================================
+
+TEST_OUTCOMES = {"P": "passed", "F": "failed", "S": "skipped"}
+
+def iter_json_array(path, key):
+    """Stream the items of the array stored under key, one decoded item at a time"""
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    with open(path, encoding="utf-8") as source:
+        buffer = ""
+        while True:
+            chunk = source.read(JSON_STREAM_CHUNK)
+            buffer += chunk
+            start = buffer.find(marker)
+            bracket = buffer.find("[", start + len(marker)) if start >= 0 else -1
+            if bracket >= 0:
+                buffer = buffer[bracket + 1:]
+                break
+            if not chunk:
+                raise ValueError(f'No "{key}" array in {path} (incomplete report?)')
+            # Keep just enough to find a marker split across chunks
+            buffer = buffer[start:] if start >= 0 else buffer[-len(marker):]
+        
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,")
+            if buffer.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                chunk = source.read(JSON_STREAM_CHUNK)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+def _iter_vitest_tests(report_path):
+    for file_result in iter_json_array(report_path, "testResults"):
+        test_file = project_relative_path(file_result.get("name", ""))
+        for assertion in file_result.get("assertionResults", []):
+            status = assertion.get("status")
+            yield test_file, assertion.get("fullName") or assertion.get("title", ""), \
+                "P" if status == "passed" else "F" if status == "failed" else "S"
+
+def _iter_playwright_suite(suite, test_file=None):
+    test_file = suite.get("file", test_file)
+    for spec in suite.get("specs", []):
+        for test in spec.get("tests", []):
+            status = test.get("status")
+            outcome = "P" if status in ("expected", "flaky") else "F" if status == "unexpected" else "S"
+            name = spec.get("title", "")
+            if test.get("projectName"):
+                name += f" [{test['projectName']}]"
+            yield f"{PLAYWRIGHT_TEST_DIR}/{spec.get('file', test_file)}", name, outcome
+    for child in suite.get("suites", []):
+        yield from _iter_playwright_suite(child, test_file)
+
+def _iter_playwright_tests(report_path):
+    for suite in iter_json_array(report_path, "suites"):
+        yield from _iter_playwright_suite(suite)
+
+def _iter_junit_tests(report_path):
+    suite_name = ""
+    outcome = "P"
+    for event, element in ElementTree.iterparse(report_path, events=("start", "end")):
+        if event == "start":
+            if element.tag == "testsuite":
+                suite_name = element.get("name", suite_name)
+            elif element.tag == "testcase":
+                outcome = "P"
+            continue
+        if element.tag in ("failure", "error"):
+            outcome = "F"
+        elif element.tag == "skipped" and outcome != "F":
+            outcome = "S"
+        elif element.tag == "testcase":
+            test_file = element.get("file") or element.get("classname") or suite_name
+            yield project_relative_path(test_file), element.get("name", ""), outcome
+            element.clear()
+
+TEST_REPORT_PARSERS = {
+    "vitest": _iter_vitest_tests,
+    "junit": _iter_junit_tests,
+    "playwright": _iter_playwright_tests
+}
+
+def detect_test_report_format(report_path):
+    """Guess a report's format from its extension and first bytes"""
+    if report_path.suffix.lower() == ".xml":
+        return "junit"
+    with open(report_path, encoding="utf-8") as source:
+        head = source.read(JSON_STREAM_CHUNK)
+    if '"testResults"' in head or '"numTotalTests"' in head:
+        return "vitest"
+    if '"suites"' in head or '"config"' in head:
+        return "playwright"
+    raise ValueError(f"Cannot tell the format of {report_path} - pass --format vitest|junit|playwright")
+
+def ingest_test_report(report_path, report_format=None, store=None):
+    """Record a test report's outcomes and log RED/GREEN for sessions whose tests flipped"""
+    store = store or TDDStore()
+    report_path = Path(report_path)
+    report_format = report_format or detect_test_report_format(report_path)
+    if report_format not in TEST_REPORT_PARSERS:
+        raise ValueError(f"Unknown test report format: {report_format} (available: {', '.join(TEST_REPORT_PARSERS)})")
+    
+    files = {}
+    sessions = {}
+    counts = {"P": 0, "F": 0, "S": 0}
+    unattributed = 0
+    attributions = {}
+    import_graph = functools.lru_cache(maxsize=None)(load_import_graph)
+    with profile_stage(f"ingest:{report_format}"):
+        for test_file, name, outcome in TEST_REPORT_PARSERS[report_format](report_path):
+            counts[outcome] += 1
+            record = files.setdefault(test_file, {"outcomes": "", "failing": []})
+            record["outcomes"] += outcome
+            if outcome == "F":
+                record["failing"].append(name)
+            
+            if test_file not in attributions:
+                attributions[test_file] = attribute_path(test_file, import_graph)
+            session_ids = attributions[test_file]
+            if not session_ids:
+                unattributed += 1
+            for session_id in session_ids:
+                summary = sessions.setdefault(session_id, {"passed": 0, "failed": 0, "skipped": 0, "failing": []})
+                summary[TEST_OUTCOMES[outcome]] += 1
+                if outcome == "F" and len(summary["failing"]) < 3:
+                    summary["failing"].append(name)
+    
+    results = _load_json_file(TEST_RESULTS_FILE, {"sources": {}})
+    results["sources"][report_format] = {
+        "report": str(report_path), "ingested_at": get_timestamp(), "files": files, "sessions": sessions
+    }
+    write_file_atomic(TEST_RESULTS_FILE, json.dumps(results, ensure_ascii=False))
+    
+    # Failing tests move a session to RED; once they all pass a RED session moves to GREEN
+    requests = []
+    run_digest = hashlib.sha1(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    for session_id, summary in sessions.items():
+        current = store.current_phase(session_id)
+        if summary["failed"] and current != "RED":
+            failing = ", ".join(summary["failing"])
+            action = f"🔴 RED: {summary['failed']} failing {report_format} test(s) - {failing}"
+            tdd_phase = "RED"
+        elif not summary["failed"] and summary["passed"] and current == "RED":
+            action = f"🟢 GREEN: all {summary['passed']} {report_format} test(s) passing"
+            tdd_phase = "GREEN"
+        else:
+            continue
+        requests.append(LogRequest(session_id, action, f"tests:{report_format}:{run_digest}:{session_id}",
+                                   tdd_phase=tdd_phase, source="tests"))
+    
+    return TestIngestResult(source=str(report_path), format=report_format, total=sum(counts.values()),
+                            passed=counts["P"], failed=counts["F"], skipped=counts["S"],
+                            unattributed=unattributed, sessions=sessions,
+                            logged=store.log_batch(requests) if requests else [])
+
+def load_test_summary():
+    """Passing and total tests per session, combined over the latest report of every format"""
+    sessions = {}
+    for source in _load_json_file(TEST_RESULTS_FILE, {"sources": {}})["sources"].values():
+        for session_id, summary in source["sessions"].items():
+            combined = sessions.setdefault(session_id, {"passed": 0, "failed": 0, "skipped": 0})
+            for outcome in combined:
+                combined[outcome] += summary[outcome]
+    return sessions
+
+# ============================================================
+# 📈 COVERAGE
+# Coverage reports (lcov.info, coverage-summary.json and the json
+# reporter's coverage-final.json) are streamed per file and mapped
+# onto deliverable paths for per-session coverage and its trend.
+# A report whose size and mtime match the last import is skipped
+# without being read; a touched but identical one after one hash.
+# ============================================================
+
+def iter_json_object(path):
+    """Stream the (key, value) members of a top-level JSON object"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as source:
+        buffer = source.read(JSON_STREAM_CHUNK).lstrip()
+        if not buffer.startswith("{"):
+            raise ValueError(f"{path} is not a JSON object")
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip(" \t\r\n,")
+            if buffer.startswith("}"):
+                return
+            try:
+                key, position = decoder.raw_decode(buffer)
+                position = JSON_WHITESPACE.match(buffer, position).end()
+                if buffer[position:position + 1] != ":":
+                    raise json.JSONDecodeError("Expecting ':' delimiter", buffer, position)
+                value, end = decoder.raw_decode(buffer, JSON_WHITESPACE.match(buffer, position + 1).end())
+            except json.JSONDecodeError:
+                chunk = source.read(JSON_STREAM_CHUNK)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield key, value
+            buffer = buffer[end:]
+
+def _iter_lcov_files(report_path):
+    with open(report_path, encoding="utf-8") as report:
+        source, found, hit = None, 0, 0
+        for line in report:
+            if line.startswith("SF:"):
+                source, found, hit = line[3:].strip(), 0, 0
+            elif line.startswith("LF:"):
+                found = int(line[3:])
+            elif line.startswith("LH:"):
+                hit = int(line[3:])
+            elif line.startswith("end_of_record") and source:
+                yield project_relative_path(source), hit, found
+                source = None
+
+def _iter_coverage_summary_files(report_path):
+    for path, metrics in iter_json_object(report_path):
+        if path != "total":
+            yield project_relative_path(path), metrics["lines"]["covered"], metrics["lines"]["total"]
+
+def _iter_istanbul_files(report_path):
+    for path, file_coverage in iter_json_object(report_path):
+        statements = file_coverage.get("s", {})
+        yield (project_relative_path(file_coverage.get("path", path)),
+               sum(1 for count in statements.values() if count), len(statements))
+
+COVERAGE_PARSERS = {
+    "lcov": _iter_lcov_files,
+    "summary": _iter_coverage_summary_files,
+    "istanbul": _iter_istanbul_files
+}
+
+def detect_coverage_format(report_path):
+    """Coverage report format from its file name"""
+    if report_path.name == "coverage-summary.json":
+        return "summary"
+    if report_path.suffix == ".json":
+        return "istanbul"
+    return "lcov"
+
+def default_coverage_reports():
+    """Coverage reports vitest --coverage leaves in the project"""
+    return [path for path in (COVERAGE_DIR / "lcov.info", COVERAGE_DIR / "coverage-summary.json",
+                              COVERAGE_DIR / "coverage-final.json") if path.exists()]
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(JSON_STREAM_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def import_coverage_report(report_path):
+    """Import one coverage report into per-session coverage, unless it is unchanged"""
+    report_path = Path(report_path).resolve()
+    report_format = detect_coverage_format(report_path)
+    stat = report_path.stat()
+    coverage = _load_json_file(COVERAGE_FILE, {"reports": {}, "history": []})
+    known = coverage["reports"].get(str(report_path))
+    
+    # Same size and mtime: skip without reading; otherwise an identical hash still skips the parse
+    if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+        return CoverageImportResult(str(report_path), report_format, skipped=True)
+    digest = _file_digest(report_path)
+    if known and known["sha1"] == digest:
+        known.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        write_file_atomic(COVERAGE_FILE, json.dumps(coverage))
+        return CoverageImportResult(str(report_path), report_format, skipped=True)
+    
+    totals = {"covered": 0, "total": 0}
+    sessions = {}
+    files = 0
+    with profile_stage(f"coverage:{report_format}"):
+        for path, covered, total in COVERAGE_PARSERS[report_format](report_path):
+            files += 1
+            totals["covered"] += covered
+            totals["total"] += total
+            for session_id in attribute_path(path):
+                session = sessions.setdefault(session_id, {"covered": 0, "total": 0})
+                session["covered"] += covered
+                session["total"] += total
+    
+    percent = lambda counts: round(counts["covered"] / counts["total"] * 100, 2) if counts["total"] else None
+    result = CoverageImportResult(str(report_path), report_format, skipped=False, files=files,
+                                  total=percent(totals),
+                                  sessions={session_id: percent(counts) for session_id, counts in sessions.items()})
+    coverage["reports"][str(report_path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+    coverage["history"] = (coverage["history"] + [{
+        "timestamp": get_timestamp(), "report": str(report_path), "total": result.total, "sessions": result.sessions
+    }])[-COVERAGE_HISTORY_KEPT:]
+    write_file_atomic(COVERAGE_FILE, json.dumps(coverage))
+    return result
+
+def coverage_trend(session_id=None):
+    """(timestamp, percent) points for a session, or for the whole project"""
+    history = _load_json_file(COVERAGE_FILE, {"history": []})["history"]
+    if session_id is None:
+        return [(point["timestamp"], point["total"]) for point in history if point["total"] is not None]
+    return [(point["timestamp"], point["sessions"][session_id]) for point in history
+            if point["sessions"].get(session_id) is not None]
+
+# ============================================================
+# 🎯 TEST IMPACT SELECTION
+# The import graph of src/ and tests/ is scanned with a regex per
+# TS/TSX file and cached per file by mtime and size, so only edited
+# files are read again. A session's tests are the test files that
+# reach one of its deliverables through the reversed graph.
+# ============================================================
+
+IMPORT_PATTERN = re.compile(
+    r"""(?:import|export)\s[^'"]*?from\s*['"]([^'"]+)['"]"""
+    r"""|import\s*['"]([^'"]+)['"]"""
+    r"""|(?:import|require|vi\.mock)\s*\(\s*['"]([^'"]+)['"]""")
+
+# A module is type-only when it exports types but no values (Vitest never loads it)
+TYPE_EXPORT_PATTERN = re.compile(r"^\s*export\s+(?:interface\b|type\b|\*)", re.M)
+VALUE_EXPORT_PATTERN = re.compile(
+    r"^\s*export\s+(?:default|const|let|var|function|async|class|enum|abstract)\b|^\s*export\s*[{=]", re.M)
+
+class ImportGraph(dict):
+    """Import edges per file, plus the set of type-only modules"""
+    
+    def __init__(self, edges=(), type_only=()):
+        super().__init__(edges)
+        self.type_only = frozenset(type_only)
+
+def is_type_only_module(path, source):
+    """Declaration file, or a module exporting only interfaces, types and re-exports"""
+    return path.endswith(".d.ts") or bool(TYPE_EXPORT_PATTERN.search(source)
+                                          and not VALUE_EXPORT_PATTERN.search(source))
+
+def is_test_file(path):
+    """Vitest test file (*.test.* / *.spec.* or under __tests__)"""
+    return bool(re.search(r"\.(test|spec)\.[jt]sx?$", path)) or "/__tests__/" in f"/{path}"
+
+def resolve_import(importer, specifier, known_files):
+    """Project-relative file an import specifier points at, or None for packages"""
+    if specifier.startswith("@/"):
+        base = "src/" + specifier[2:]
+    elif specifier.startswith("."):
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), specifier)).replace("\\", "/")
+    else:
+        return None
+    for candidate in (base, *(base + extension for extension in IMPORT_EXTENSIONS),
+                      *(f"{base}/index{extension}" for extension in IMPORT_EXTENSIONS)):
+        if candidate in known_files:
+            return candidate
+    # Not written yet (e.g. a RED test for a missing deliverable) - keep the likely path
+    return base if os.path.splitext(base)[1] else base + ".ts"
+
+def _scan_source_files():
+    """(path, stat) for every TS/JS file under the scanned directories, via os.scandir"""
+    pending = [PROJECT_ROOT / directory for directory in IMPORT_GRAPH_DIRS]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ("node_modules", "dist", "coverage"):
+                    pending.append(entry.path)
+            elif entry.name.endswith(IMPORT_EXTENSIONS):
+                yield Path(entry.path).relative_to(PROJECT_ROOT).as_posix(), entry.stat()
+
+def load_import_graph():
+    """Import edges of every scanned file, re-reading only files whose mtime or size changed"""
+    cache = _load_json_file(IMPORT_GRAPH_FILE, {"files": {}})
+    files = {}
+    changed = []
+    for path, stat in _scan_source_files():
+        cached = cache["files"].get(path)
+        if (cached and "type_only" in cached
+                and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size):
+            files[path] = cached
+        else:
+            files[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "specifiers": [], "type_only": False}
+            changed.append(path)
+    
+    for path in changed:
+        source = (PROJECT_ROOT / path).read_text(encoding="utf-8", errors="replace")
+        files[path]["specifiers"] = sorted({next(group for group in match.groups() if group)
+                                            for match in IMPORT_PATTERN.finditer(source)})
+        files[path]["type_only"] = is_type_only_module(path, source)
+    if changed or len(files) != len(cache["files"]):
+        write_file_atomic(IMPORT_GRAPH_FILE, json.dumps({"files": files}))
+    
+    # Resolve against the current file set, so new files are picked up by unchanged importers
+    return ImportGraph({path: [target for target in (resolve_import(path, specifier, files)
+                                                     for specifier in record["specifiers"]) if target]
+                        for path, record in files.items()},
+                       type_only=[path for path, record in files.items() if record["type_only"]])
+
+def select_impacted_tests(session_id):
+    """Test files that depend on a session's deliverables (directly or transitively)"""
+    graph = load_import_graph()
+    dependents = {}
+    for path, targets in graph.items():
+        for target in targets:
+            dependents.setdefault(target, set()).add(path)
+    
+    deliverables = [path for path in (deliverable_path(deliverable)
+                                      for deliverable in ROADMAP_SESSIONS[session_id]["deliverables"]) if path]
+    seen = set(deliverables)
+    queue = deque(deliverables)
+    while queue:
+        for dependent in dependents.get(queue.popleft(), ()):
+            if dependent not in seen:
+                seen.add(dependent)
+                queue.append(dependent)
+    
+    # Test files named after a deliverable count even before they import anything
+    trie = get_deliverable_trie()
+    seen.update(path for path in graph
+                if is_test_file(path) and session_id in trie.lookup(test_subject_path(path)))
+    return ImpactResult(session_id=session_id, deliverables=deliverables,
+                        tests=sorted(path for path in seen if is_test_file(path) and path in graph),
+                        scanned=len(graph))
+
+def run_impacted_tests(result, store=None):
+    """Run vitest on the selected test files and ingest its JSON report"""
+    report_path = TDD_DIR / "vitest-impact.json"
+    # A report left over from an earlier run must never be ingested as this run's outcome
+    report_path.unlink(missing_ok=True)
+    command = ["npx", "vitest", "run", "--reporter=json", f"--outputFile={report_path}", *result.tests]
+    completed = subprocess.run(command, cwd=PROJECT_ROOT)
+    # vitest exits with 1 when tests fail; anything else means the run itself failed
+    if completed.returncode not in VITEST_TEST_EXIT_CODES or not report_path.exists():
+        raise OSError(f"vitest exited with {completed.returncode}"
+                      f"{'' if report_path.exists() else f' without writing {report_path}'}")
+    return ingest_test_report(report_path, "vitest", store)
+
+# ============================================================
+# ✅ DELIVERABLE VERIFICATION
+# Checks that each deliverable file exists, is not empty, was touched
+# while its session was being logged and, for code, has a test next to
+# it or a test that imports it. Each
+# directory involved is listed once with os.scandir; listings are
+# cached by directory mtime, so an unchanged directory costs a single
+# stat and the check is cheap enough to run with every status.
+# ============================================================
+
+def _test_file_candidates(path):
+    """(directory, file name) pairs where a test for a deliverable may live"""
+    directory, name = os.path.split(path)
+    stem, extension = os.path.splitext(name)
+    directories = [directory, f"{directory}/__tests__"]
+    if directory == "src" or directory.startswith("src/"):
+        directories.append("tests" + directory[3:])
+    names = list(dict.fromkeys(f"{stem}.{kind}{suffix}" for kind in ("test", "spec")
+                               for suffix in (extension, ".ts", ".tsx")))
+    return [(test_directory, test_name) for test_directory in directories for test_name in names]
+
+def _list_directories(directories):
+    """File names per directory, reusing cached listings of directories whose mtime is unchanged"""
+    cache = _load_json_file(VERIFY_CACHE_FILE, {"dirs": {}})
+    listings = {}
+    changed = False
+    for directory in directories:
+        try:
+            mtime_ns = os.stat(PROJECT_ROOT / directory).st_mtime_ns
+        except FileNotFoundError:
+            listings[directory] = set()
+            continue
+        cached = cache["dirs"].get(directory)
+        if cached and cached["mtime_ns"] == mtime_ns:
+            listings[directory] = set(cached["names"])
+            continue
+        with os.scandir(PROJECT_ROOT / directory) as entries:
+            names = sorted(entry.name for entry in entries if entry.is_file())
+        cache["dirs"][directory] = {"mtime_ns": mtime_ns, "names": names}
+        listings[directory] = set(names)
+        changed = True
+    if changed and TDD_DIR.exists():
+        write_file_atomic(VERIFY_CACHE_FILE, json.dumps(cache))
+    return listings
+
+def _entry_time(timestamp):
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def verify_deliverables(session_ids=None, status=None):
+    """Check the deliverable files of sessions (default: every session with log entries)"""
+    status = status or read_status_snapshot()["status"]
+    session_stats = status.get("sessions", {})
+    session_ids = list(session_ids) if session_ids else [session_id for session_id in ROADMAP_SESSIONS
+                                                         if session_id in session_stats]
+    
+    targets = [(session_id, path) for session_id in session_ids
+               for path in (deliverable_path(deliverable) for deliverable in ROADMAP_SESSIONS[session_id]["deliverables"])
+               if path]
+    directories = {os.path.dirname(path) for _, path in targets}
+    for _, path in targets:
+        directories.update(directory for directory, _ in _test_file_candidates(path))
+    listings = _list_directories(sorted(directories))
+    
+    checks = []
+    tested_by = None
+    for session_id, path in targets:
+        directory, name = os.path.split(path)
+        check = DeliverableCheck(session_id=session_id, path=path, exists=name in listings[directory])
+        stats = session_stats.get(session_id, {})
+        if check.exists:
+            file_stat = os.stat(PROJECT_ROOT / path)
+            check.size = file_stat.st_size
+            check.modified = datetime.fromtimestamp(file_stat.st_mtime, timezone.utc).isoformat()
+            if not check.size:
+                check.problems.append("empty")
+            first_entry, last_entry = _entry_time(stats.get("first_entry")), _entry_time(stats.get("last_entry"))
+            if first_entry and file_stat.st_mtime < first_entry:
+                check.problems.append("not modified since the session started")
+            elif last_entry and file_stat.st_mtime > last_entry:
+                check.notes.append("changed since the last log entry")
+        else:
+            check.problems.append("missing")
+        
+        if is_test_file(path):
+            check.test_path = path
+        elif path.endswith(IMPORT_EXTENSIONS):
+            check.test_path = next((f"{test_directory}/{test_name}" for test_directory, test_name in _test_file_candidates(path)
+                                    if test_name in listings[test_directory]), None)
+            if check.test_path is None:
+                # Not named after the deliverable - look for a test that imports it
+                if tested_by is None:
+                    tested_by = _tests_by_deliverable()
+                check.test_path = tested_by.get(path)
+            if check.test_path is None:
+                check.problems.append("no test file")
+        # Documents and other non-code deliverables have no test to check
+        checks.append(check)
+    return checks
+
+def _tests_by_deliverable():
+    """First test file (in path order) whose nearest imported deliverables include each deliverable"""
+    graph = load_import_graph()
+    tested_by = {}
+    for path in sorted(graph):
+        if is_test_file(path):
+            for deliverable in nearest_imported_deliverables(path, graph):
+                tested_by.setdefault(deliverable, path)
+    return tested_by
+
+# ============================================================
+# 👀 WATCH MODE
+# Watches src/, tests/ and the test report files with inotify on
+# Linux (through ctypes) and falls back to polling mtimes elsewhere.
+# Bursts of changes are debounced; changed sources are attributed to
+# sessions and their impacted tests re-run, and rewritten reports are
+# ingested, so RED/GREEN entries follow the real test outcomes. A
+# source change in a green session whose tests pass again is logged
+# as REFACTOR.
+# ============================================================
+
+class InotifyWatcher:
+    """Recursive directory watcher on Linux inotify"""
+    
+    MASK = 0x00000002 | 0x00000008 | 0x00000080 | 0x00000100 | 0x00000200  # MODIFY, CLOSE_WRITE, MOVED_TO, CREATE, DELETE
+    IN_ISDIR = 0x40000000
+    
+    def __init__(self, directories, flat_directories=()):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.recursive = set()
+        for directory in directories:
+            self._add_tree(directory)
+        for directory in flat_directories:
+            self._add(directory)
+    
+    def _add(self, directory):
+        descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if descriptor >= 0:
+            self.watches[descriptor] = directory
+        return descriptor
+    
+    def _add_tree(self, directory):
+        for root, subdirectories, _ in os.walk(directory):
+            subdirectories[:] = [name for name in subdirectories if name not in WATCH_IGNORED_DIRS]
+            self.recursive.add(self._add(root))
+    
+    def poll(self, timeout):
+        """Changed paths seen within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset + 16 <= len(data):
+            descriptor, mask, _, name_length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + name_length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += 16 + name_length
+            path = os.path.join(self.watches.get(descriptor, ""), name)
+            if not mask & self.IN_ISDIR:
+                changed.add(path)
+            elif descriptor in self.recursive and name not in WATCH_IGNORED_DIRS:
+                self._add_tree(path)
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Portable watcher comparing file mtimes and sizes between scans"""
+    
+    def __init__(self, directories, flat_directories=()):
+        self.directories = directories
+        self.flat_directories = flat_directories
+        self.snapshot = self._scan()
+    
+    def _scan(self):
+        snapshot = {}
+        for directory, recursive in [(directory, True) for directory in self.directories] + \
+                                    [(directory, False) for directory in self.flat_directories]:
+            for root, subdirectories, names in os.walk(directory):
+                subdirectories[:] = [name for name in subdirectories
+                                     if recursive and name not in WATCH_IGNORED_DIRS]
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def poll(self, timeout):
+        time.sleep(timeout)
+        snapshot = self._scan()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed
+    
+    def close(self):
+        pass
+
+def create_watcher(directories, flat_directories=()):
+    """inotify where available, polling otherwise"""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories, flat_directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories, flat_directories)
+
+def ingest_watched_report(path, store, errors):
+    """Ingest a report, or note why it could not be read (e.g. caught mid-write) and return None"""
+    try:
+        return store.ingest_tests(path)
+    except (OSError, ValueError, ElementTree.ParseError) as error:
+        errors.append(f"{project_relative_path(path)}: {error}")
+        return None
+
+def handle_watch_changes(paths, report_paths, run_tests, store, errors=None):
+    """Ingest rewritten reports, re-run the tests of sessions whose files changed and
+    log REFACTOR for green sessions whose source changed with their tests still passing
+    
+    Reports that cannot be parsed are skipped and described in errors; the
+    next write to them triggers another ingest.
+    """
+    errors = [] if errors is None else errors
+    changed = sorted(project_relative_path(path) for path in paths - report_paths
+                     if path.endswith(IMPORT_EXTENSIONS))
+    attribution = attribute_paths(changed)
+    phases_before = {session_id: store.current_phase(session_id) for session_id in attribution.sessions}
+    
+    ingested = [result for result in (ingest_watched_report(path, store, errors)
+                                      for path in sorted(paths & report_paths) if Path(path).exists()) if result]
+    if run_tests and attribution.sessions:
+        tests = {path for path in changed if is_test_file(path)}
+        for session_id in attribution.sessions:
+            tests.update(select_impacted_tests(session_id).tests)
+        if tests:
+            ingested.append(run_impacted_tests(ImpactResult(", ".join(sorted(attribution.sessions)), [],
+                                                            sorted(tests), 0), store))
+    
+    # A source change in a GREEN (or REFACTOR) session whose tests ran green again is a refactor
+    requests = []
+    for session_id, session_paths in sorted(attribution.sessions.items()):
+        sources = [path for path in session_paths if not is_test_file(path)]
+        outcomes = [result.sessions[session_id] for result in ingested if session_id in result.sessions]
+        if (not sources or not outcomes or phases_before[session_id] not in ("GREEN", "REFACTOR")
+                or any(outcome["failed"] for outcome in outcomes)):
+            continue
+        passed = sum(outcome["passed"] for outcome in outcomes)
+        action = f"🔵 REFACTOR: {', '.join(sources)} changed, all {passed} test(s) still passing"
+        digest = hashlib.sha1("|".join(f"{path}:{os.stat(PROJECT_ROOT / path).st_mtime_ns}"
+                                       for path in sources if (PROJECT_ROOT / path).exists()).encode("utf-8")).hexdigest()[:12]
+        requests.append(LogRequest(session_id, action, f"watch:refactor:{session_id}:{digest}",
+                                   tdd_phase="REFACTOR", source="watch"))
+    refactors = store.log_batch(requests) if requests else []
+    return attribution, ingested, refactors
+
+def watch_project(report_paths=None, run_tests=False, store=None):
+    """Watch the project until interrupted"""
+    store = store or TDDStore()
+    report_paths = {str((PROJECT_ROOT / path).resolve()) for path in (report_paths or WATCH_REPORT_FILES)}
+    directories = [str(PROJECT_ROOT / directory) for directory in IMPORT_GRAPH_DIRS]
+    # Report directories are watched without their subdirectories
+    report_directories = sorted({os.path.dirname(path) for path in report_paths if os.path.isdir(os.path.dirname(path))})
+    watcher = create_watcher(directories, report_directories)
+    print(f"👀 Watching {', '.join(IMPORT_GRAPH_DIRS)} and {len(report_paths)} report file(s) "
+          f"({'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'}) - Ctrl+C to stop")
+    
+    pending = set()
+    last_change = 0.0
+    try:
+        while True:
+            changed = watcher.poll(WATCH_POLL_SECONDS)
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                continue
+            if not pending or time.monotonic() - last_change < WATCH_DEBOUNCE_SECONDS:
+                continue
+            
+            errors = []
+            try:
+                attribution, ingested, refactors = handle_watch_changes(pending, report_paths, run_tests,
+                                                                        store, errors)
+            except (OSError, ValueError, ElementTree.ParseError) as error:
+                # A crashed or interrupted test run, or its half-written report - keep watching
+                print(f"❌ {error}")
+                pending = set()
+                continue
+            pending = set()
+            for error in errors:
+                print(f"⚠️  Skipped {error} - ingesting it again on its next write")
+            if attribution.paths:
+                print(f"📝 {len(attribution.paths)} file(s) changed → "
+                      f"{', '.join(sorted(attribution.sessions)) or 'no session'}")
+            for result in ingested:
+                print(f"🧪 {result.source}: {result.passed} passed, {result.failed} failed")
+                for logged in result.logged:
+                    if logged.logged:
+                        print(f"   [{logged.session_id}] {logged.action}")
+            for logged in refactors:
+                if logged.logged:
+                    print(f"   [{logged.session_id}] {logged.action}")
+    finally:
+        watcher.close()
+
+# ============================================================
+# 🧳 CONTEXT BUNDLES
+# A handoff bundle for the next AI session: the active session's
+# roadmap entry, its latest log entries, the next steps and its
+# deliverable and test files, packed in that order of priority into
+# a token (or byte) budget. Rendered file blocks are cached by content
+# hash, and the hash by mtime and size, so unchanged files are not
+# read again when the bundle is rebuilt.
+# ============================================================
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+def active_session(status):
+    """The session with the most recent log entry, else the next available one"""
+    sessions = status.get("sessions", {})
+    if sessions:
+        return max(sessions, key=lambda session_id: sessions[session_id].get("last_entry") or "")
+    available = get_available_sessions(status)
+    return available[0] if available else None
+
+def cached_file_block(path, cache):
+    """Markdown block with a file's content, reused while its content hash is unchanged"""
+    full_path = PROJECT_ROOT / path
+    stat = full_path.stat()
+    known = cache["files"].get(path)
+    if not (known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size):
+        data = full_path.read_bytes()
+        known = cache["files"][path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                                        "sha1": hashlib.sha1(data).hexdigest()}
+        cache["changed"] = True
+        block_file = CONTEXT_CACHE_DIR / f"{known['sha1']}.md"
+        if not block_file.exists():
+            language = os.path.splitext(path)[1].lstrip(".")
+            CONTEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            write_file_atomic(block_file, f"```{language}\n{data.decode('utf-8', 'replace').rstrip()}\n```\n")
+    return (CONTEXT_CACHE_DIR / f"{known['sha1']}.md").read_text(encoding="utf-8")
+
+def _session_section(session_id, status):
+    session = ROADMAP_SESSIONS[session_id]
+    stats = status.get("sessions", {}).get(session_id, {})
+    tests = load_test_summary().get(session_id)
+    trend = coverage_trend(session_id)
+    lines = [f"## Session {session_id}: {session['title']}",
+             f"- **Phase**: {session['phase']}",
+             f"- **Duration**: {session['duration']} min | {session['risk']}",
+             f"- **Objective**: {session['objective']}",
+             f"- **Dependencies**: {', '.join(session['dependencies']) or 'none'}",
+             f"- **Testing**: {session['testing']}",
+             f"- **TDD Phase**: {stats.get('tdd_state', {}).get('phase', 'PLANNING')} "
+             f"({stats.get('entries', 0)} entries, {stats.get('tdd_cycles', 0)} cycles)"]
+    if tests:
+        lines.append(f"- **Tests**: {tests['passed']} passed, {tests['failed']} failed")
+    if trend:
+        lines.append(f"- **Coverage**: {trend[-1][1]}%")
+    lines.append("\n**Deliverables**:")
+    lines += [f"- {deliverable}" for deliverable in session["deliverables"]]
+    return "\n".join(lines) + "\n"
+
+def _log_section(session_id, limit):
+    entries = [entry for entry in recent_entries(limit, session_id) if not is_revert_event(entry)]
+    lines = ["## Recent Log Entries (newest first)"]
+    lines += [f"- {entry.get('timestamp', '')[:16]} [{entry.get('tdd_phase', 'UNKNOWN')}] {entry.get('action', '')}"
+              for entry in reversed(entries)] or ["- (none yet)"]
+    return "\n".join(lines) + "\n"
+
+def _fit_section(text, remaining, size_of):
+    """text if it fits in remaining, else its leading lines with a truncation marker (or nothing)"""
+    if size_of(text) <= remaining:
+        return text
+    kept = ""
+    for line in text.splitlines(keepends=True):
+        if size_of(kept + line + CONTEXT_TRUNCATED_MARKER) > remaining:
+            break
+        kept += line
+    return kept + CONTEXT_TRUNCATED_MARKER if size_of(kept + CONTEXT_TRUNCATED_MARKER) <= remaining else ""
+
+def context_bundle_file(session_id):
+    """Bundle file of one session"""
+    return CONTEXT_BUNDLE_DIR / f"session-{session_id}.md"
+
+def build_context_bundle(session_id=None, token_budget=CONTEXT_TOKEN_BUDGET, byte_budget=None,
+                         log_limit=CONTEXT_LOG_ENTRIES):
+    """Pack the handoff context for a session into a budget
+    
+    Sections are added in priority order; the first one that does not fit is
+    cut at a line boundary. Files that do not fit whole are listed as omitted.
+    """
+    status = read_status_snapshot()["status"]
+    session_id = session_id or active_session(status)
+    if session_id is None:
+        raise ValueError("No active or available session")
+    if session_id not in ROADMAP_SESSIONS:
+        raise ValueError(f"Unknown session: {session_id}")
+    size_of = (lambda text: len(text.encode("utf-8"))) if byte_budget else estimate_tokens
+    budget = byte_budget or token_budget
+    
+    sections = []
+    remaining = budget
+    for text in (f"# 🧳 TDD CONTEXT HANDOFF - SESSION {session_id}\n\n",
+                 _session_section(session_id, status) + "\n",
+                 _log_section(session_id, log_limit) + "\n",
+                 NEXT_STEPS_FILE.read_text(encoding="utf-8") if NEXT_STEPS_FILE.exists() else ""):
+        fitted = _fit_section(text, remaining, size_of)
+        sections.append(fitted)
+        remaining -= size_of(fitted)
+    
+    # Deliverables first, then their tests; whatever does not fit is listed as omitted
+    checks = verify_deliverables([session_id], status)
+    files = [check.path for check in checks if check.exists]
+    files += [check.test_path for check in checks if check.test_path and check.test_path not in files]
+    
+    cache = _load_json_file(CONTEXT_CACHE_FILE, {"files": {}})
+    included, omitted = [], []
+    for path in files:
+        block = f"\n### {path}\n" + cached_file_block(path, cache)
+        cost = size_of(block)
+        if cost <= remaining:
+            sections.append(block)
+            remaining -= cost
+            included.append(path)
+        else:
+            omitted.append(path)
+    if cache.pop("changed", False):
+        write_file_atomic(CONTEXT_CACHE_FILE, json.dumps(cache))
+    if omitted:
+        sections.append(_fit_section("\n## Omitted (over budget)\n" + "".join(f"- {path}\n" for path in omitted),
+                                     remaining, size_of))
+    
+    content = "".join(sections)
+    bundle_file = context_bundle_file(session_id)
+    CONTEXT_BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    write_file_atomic(bundle_file, content)
+    _register_bundle(session_id, bundle_file, included)
+    return ContextBundle(session_id=session_id, path=str(bundle_file), content=content,
+                         size=size_of(content), unit="bytes" if byte_budget else "tokens",
+                         budget=budget, files=included, omitted=omitted)
+
+def _register_bundle(session_id, bundle_file, files):
+    """Record the bundle in .repomix/bundles.json"""
+    if not REPOMIX_BUNDLES_FILE.parent.exists():
+        return
+    bundles = _load_json_file(REPOMIX_BUNDLES_FILE, {"bundles": {}})
+    bundles.setdefault("bundles", {})[f"tdd-session-{session_id}"] = {
+        "name": f"TDD session {session_id}: {ROADMAP_SESSIONS[session_id]['title']}",
+        "created": get_timestamp(),
+        "output": bundle_file.relative_to(PROJECT_ROOT).as_posix(),
+        "files": files
+    }
+    write_file_atomic(REPOMIX_BUNDLES_FILE, json.dumps(bundles, indent=2) + "\n")
+
+# ============================================================
+# 📦 BUNDLE SIZE BUDGETS
+# Raw, gzip and brotli sizes of every chunk in the Vite dist/ output,
+# compressed in parallel (zlib and brotli release the GIL) and kept as
+# a time series keyed by git commit. Totals are checked against the
+# budgets behind the "<2s initial load time" goal; a budget overrun or
+# a jump since the previous commit is logged on session 4.3
+# (Performance Optimization).
+# ============================================================
+
+def format_bytes(size):
+    return f"{size / 1024:.1f} KB"
+
+def git_commit():
+    """Short hash of HEAD, marked dirty when the work tree has changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "src", "public", "index.html"],
+                               cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+def load_bundle_budgets(overrides=None):
+    """Default gzip budgets, overridden by bundle_budgets.json and then by the command line"""
+    budgets = dict(DEFAULT_BUNDLE_BUDGETS)
+    budgets.update(_load_json_file(BUNDLE_BUDGETS_FILE, {}))
+    budgets.update(overrides or {})
+    unknown = set(budgets) - set(DEFAULT_BUNDLE_BUDGETS)
+    if unknown:
+        raise ValueError(f"Unknown bundle budget: {', '.join(sorted(unknown))} "
+                         f"(available: {', '.join(DEFAULT_BUNDLE_BUDGETS)})")
+    return budgets
+
+def _dist_files(dist_dir):
+    """Relative paths of the built files, without source maps"""
+    pending = [dist_dir]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif not entry.name.endswith(".map"):
+                    yield Path(entry.path).relative_to(dist_dir).as_posix()
+
+def _measure_chunk(dist_dir, path):
+    data = (dist_dir / path).read_bytes()
+    return path, {
+        "raw": len(data),
+        "gzip": len(gzip.compress(data, 9, mtime=0)),
+        "brotli": len(brotli.compress(data)) if brotli else None
+    }
+
+def measure_bundle(dist_dir=None):
+    """Raw, gzip and brotli size of every file in dist/"""
+    dist_dir = Path(dist_dir or BUNDLE_DIST_DIR)
+    if not dist_dir.is_dir():
+        raise ValueError(f"No build output at {dist_dir} - run npm run build first")
+    paths = sorted(_dist_files(dist_dir))
+    with profile_stage("bundle:compress"), ThreadPoolExecutor(max_workers=BUNDLE_WORKERS) as pool:
+        chunks = dict(pool.map(lambda path: _measure_chunk(dist_dir, path), paths))
+    
+    totals = {"total": 0, "js": 0, "css": 0, "largest_chunk": 0}
+    for path, sizes in chunks.items():
+        totals["total"] += sizes["gzip"]
+        kind = os.path.splitext(path)[1].lstrip(".")
+        if kind in ("js", "css"):
+            totals[kind] += sizes["gzip"]
+            totals["largest_chunk"] = max(totals["largest_chunk"], sizes["gzip"])
+    return chunks, totals
+
+def bundle_report(dist_dir=None, budget_overrides=None, store=None):
+    """Measure dist/, record it under the current commit and log regressions"""
+    budgets = load_bundle_budgets(budget_overrides)
+    chunks, totals = measure_bundle(dist_dir)
+    commit = git_commit()
+    
+    history = _load_json_file(BUNDLE_SIZES_FILE, {"commits": {}})
+    previous_commit = next((known for known in reversed(history["commits"]) if known != commit), None)
+    previous = history["commits"][previous_commit]["totals"] if previous_commit else None
+    history["commits"].pop(commit, None)
+    history["commits"][commit] = {"measured_at": get_timestamp(), "totals": totals, "chunks": chunks}
+    for stale in list(history["commits"])[:-BUNDLE_HISTORY_KEPT]:
+        del history["commits"][stale]
+    write_file_atomic(BUNDLE_SIZES_FILE, json.dumps(history))
+    
+    regressions = []
+    for metric, budget in budgets.items():
+        if totals[metric] > budget:
+            regressions.append(f"{metric} {format_bytes(totals[metric])} over {format_bytes(budget)} budget")
+        elif previous and previous.get(metric) and totals[metric] > previous[metric] * (1 + BUNDLE_GROWTH_TOLERANCE):
+            regressions.append(f"{metric} grew {format_bytes(previous[metric])} -> "
+                               f"{format_bytes(totals[metric])} since {previous_commit}")
+    
+    logged = []
+    if regressions:
+        store = store or TDDStore()
+        action = f"📦 Bundle size regression at {commit} (gzip): {'; '.join(regressions)}"
+        logged = store.log_batch([LogRequest(BUNDLE_SESSION, action, f"bundle:{commit}:{'|'.join(regressions)}",
+                                             source="bundle")])
+    return BundleReport(commit=commit, previous_commit=previous_commit, chunks=chunks, totals=totals,
+                        previous=previous, budgets=budgets, regressions=regressions, logged=logged)
+
+# ============================================================
+# 📸 STATUS SNAPSHOTS
+# Writers publish each status as an immutable, generation-numbered
+# snapshot and then atomically swap the CURRENT pointer. Readers
+# follow the pointer without locking and never see a partial write;
+# a few old generations are kept so in-flight readers can finish.
+# ============================================================
+
+def _snapshot_file(generation):
+    """Immutable snapshot file for one status generation"""
+    return SNAPSHOT_DIR / f"status.{generation:08d}.json"
+
+def _snapshot_generations():
+    """Generation numbers of all snapshots on disk, oldest first"""
+    generations = []
+    for snapshot in SNAPSHOT_DIR.glob("status.*.json"):
+        generation = snapshot.name.split(".")[1]
+        if generation.isdigit():
+            generations.append(int(generation))
+    return sorted(generations)
+
+def publish_status_snapshot(status):
+    """Write a new snapshot generation and point CURRENT at the newest one"""
+    SNAPSHOT_DIR.mkdir(exist_ok=True)
+    generations = _snapshot_generations()
+    generation = (generations[-1] if generations else 0) + 1
+    
+    # The snapshot is written in full to a temp file first; os.link then claims the
+    # generation number for exactly one writer, so only complete snapshots are visible
+    temp_path = SNAPSHOT_DIR / f".status.{os.getpid()}.{threading.get_ident()}.tmp"
+    snapshot = {"generation": generation, "status": status, "available": get_available_sessions(status)}
+    try:
+        while True:
+            snapshot["generation"] = generation
+            temp_path.write_text(json.dumps(snapshot, indent=2), encoding="utf-8")
+            try:
+                os.link(temp_path, _snapshot_file(generation))
+                break
+            except FileExistsError:
+                generation += 1
+    finally:
+        temp_path.unlink(missing_ok=True)
+    
+    # Point at the newest generation on disk, so a slower writer never rolls CURRENT back
+    generations = _snapshot_generations()
+    write_file_atomic(SNAPSHOT_POINTER_FILE, str(generations[-1]))
+    
+    for old_generation in generations[:-SNAPSHOTS_KEPT]:
+        try:
+            _snapshot_file(old_generation).unlink()
+        except FileNotFoundError:
+            pass
+    return generation
+
+def read_status_snapshot():
+    """Read the current status snapshot without locking"""
+    if SNAPSHOT_POINTER_FILE.exists():
+        for _ in range(SNAPSHOT_READ_RETRIES):
+            try:
+                generation = int(SNAPSHOT_POINTER_FILE.read_text())
+                return json.loads(_snapshot_file(generation).read_text())
+            except (FileNotFoundError, ValueError):
+                # The pointer moved on and the generation was collected - follow it again
+                continue
+    
+    # Nothing published yet - fall back to status.json
+    status = json.loads(CURRENT_STATUS_FILE.read_text())
+    return {"generation": 0, "status": status, "available": get_available_sessions(status)}
+
+# ============================================================
+# 🧵 PER-AGENT LOG SHARDS
+# Each writer appends JSON lines to its own shard in .tdd/shards/,
+# so agents never rewrite (or contend on) a shared file. Readers see
+# one log: session_log.json (entries from before sharding) and all
+# shards, k-way merged by timestamp as a stream. Idle shards are
+# compacted once there are too many to keep open at once.
+# ============================================================
+
+def get_agent_id(agent_id=None):
+    """Writer identity: explicit, $TDD_AGENT_ID, or derived from host and user
+    
+    The default is stable across calls, so an agent that starts a new shell per
+    command keeps writing to one shard and journal.
+    """
+    if not (agent_id or os.environ.get("TDD_AGENT_ID")):
+        try:
+            user = getpass.getuser()
+        except (KeyError, OSError):
+            user = "user"
+        agent_id = f"{socket.gethostname()}-{user}"
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", agent_id or os.environ["TDD_AGENT_ID"])
+
+def _shard_file(agent_id):
+    """Append-only shard file for one writer"""
+    return SHARD_DIR / f"{agent_id}.jsonl"
+
+def _iter_shard(path, shard=None):
+    """Stream entries from one shard (or its already open file), tagging each with the shard's agent"""
+    with shard or open(path, encoding="utf-8") as shard:
+        for line in shard:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn append from a writer that crashed mid-line
+                continue
+            entry.setdefault("agent", path.stem)
+            yield entry
+    if _profiler is not None:
+        profile_count("bytes_read", path.stat().st_size)
+
+def _iter_base_log(tdd_dir=TDD_DIR):
+    """Stream entries from session_log.json"""
+    base_log_file = tdd_dir / SESSION_LOG_FILE.name
+    if base_log_file.exists():
+        content = base_log_file.read_text()
+        profile_count("bytes_read", len(content))
+        yield from json.loads(content)
+
+def _log_order_key(entry):
+    """Deterministic merge order: Lamport clock, then timestamp, then entry ID"""
+    return (entry.get("lamport", 0), entry.get("timestamp", ""), get_entry_id(entry))
+
+def _shard_streams(shard_dir):
+    """One stream per shard, opened up front so a concurrent compaction cannot remove one mid-read
+    
+    Shards beyond SHARD_COMPACT_THRESHOLD (before a compaction has caught up) are
+    read one at a time into a single sorted stream, keeping open files bounded.
+    """
+    while True:
+        paths = sorted(shard_dir.glob("*.jsonl"))
+        opened = []
+        try:
+            for path in paths[:SHARD_COMPACT_THRESHOLD]:
+                opened.append((path, open(path, encoding="utf-8")))
+            overflow = [entry for path in paths[SHARD_COMPACT_THRESHOLD:] for entry in _iter_shard(path)]
+        except FileNotFoundError:
+            # Compacted away between listing and opening - list again
+            for _, shard in opened:
+                shard.close()
+            continue
+        overflow.sort(key=_log_order_key)
+        return [_iter_shard(path, shard) for path, shard in opened] + [iter(overflow)]
+
+def iter_log(tdd_dir=TDD_DIR):
+    """Stream the whole log as a k-way merge of the base log and every shard"""
+    streams = [_iter_base_log(tdd_dir)]
+    shard_dir = tdd_dir / SHARD_DIR.name
+    if shard_dir.exists():
+        streams.extend(_shard_streams(shard_dir))
+    previous_key = None
+    for entry in heapq.merge(*streams, key=_log_order_key):
+        # An entry seen both in a compacted shard and in its source shard is adjacent
+        key = _log_order_key(entry)
+        if key != previous_key:
+            previous_key = key
+            yield entry
+
+def compact_shards():
+    """Fold idle shards together once there are more than SHARD_COMPACT_THRESHOLD of them
+    
+    A shard is idle when its writer's journal lock is free and its journal has
+    been flushed. Shards are folded in batches, so neither the compaction nor a
+    later read needs more than a bounded number of open files.
+    """
+    if not SHARD_DIR.exists():
+        return 0
+    compacted = 0
+    while True:
+        shards = sorted(SHARD_DIR.glob("*.jsonl"))
+        if len(shards) <= SHARD_COMPACT_THRESHOLD:
+            return compacted
+        with ExitStack() as locks:
+            idle = []
+            for path in shards:
+                lock_path = _journal_file(path.stem).with_suffix(".lock")
+                if locks.enter_context(file_lock(lock_path, blocking=False)) and not _journal_file(path.stem).exists():
+                    idle.append(path)
+                    if len(idle) == SHARD_COMPACT_BATCH:
+                        break
+            if len(idle) < 2:
+                return compacted
+            
+            entries = sorted((entry for path in idle for entry in _iter_shard(path)), key=_log_order_key)
+            compacted_path = SHARD_DIR / f"{SHARD_COMPACTED_PREFIX}{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{new_entry_id()[:6]}.jsonl"
+            write_file_atomic(compacted_path, "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+            for path in idle:
+                path.unlink()
+                _journal_file(path.stem).with_suffix(".lock").unlink(missing_ok=True)
+            compacted += len(idle)
+
+def next_lamport(log_data):
+    """Lamport clock for a new entry: one past every entry seen so far"""
+    return max((entry.get("lamport", 0) for entry in log_data), default=0) + 1
+
+def load_log():
+    """Materialize the merged log as a list"""
+    with profile_stage("load_log"):
+        log_data = list(iter_log())
+    profile_count("entries", len(log_data))
+    return log_data
+
+def append_to_shard(path, entries, replay=False):
+    """Append entries as JSON lines to a shard (skipping known ones on replay), returning those written"""
+    path.parent.mkdir(exist_ok=True)
+    if replay and path.exists():
+        known_ids = {get_entry_id(entry) for entry in _iter_shard(path)}
+        entries = [entry for entry in entries if get_entry_id(entry) not in known_ids]
+    if not entries:
+        return []
+    
+    lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    with open(path, "a+b") as shard:
+        # Start on a fresh line if a previous append was torn
+        if shard.tell() > 0:
+            shard.seek(-1, os.SEEK_END)
+            if shard.read(1) != b"\n":
+                lines = "\n" + lines
+        data = lines.encode("utf-8")
+        shard.write(data)
+    profile_count("bytes_written", len(data))
+    return entries
+
+# ============================================================
+# 🔀 MERGING .tdd DIRECTORIES
+# Two histories of the same roadmap are unioned by a streaming sorted
+# merge on (Lamport clock, timestamp, entry ID): the same entry sorts
+# to the same place on both sides, so duplicates are adjacent and are
+# dropped without holding either log in memory.
+# ============================================================
+
+def resolve_tdd_directory(path):
+    """Accept either a .tdd directory or the directory containing one"""
+    path = Path(path)
+    if (path / TDD_DIR.name).is_dir():
+        path = path / TDD_DIR.name
+    if not (path / SESSION_LOG_FILE.name).exists() and not (path / SHARD_DIR.name).is_dir():
+        return None
+    return path
+
+def merge_tdd_directory(other_path):
+    """Import entries from another .tdd directory that are missing locally"""
+    started = time.perf_counter()
+    other_dir = resolve_tdd_directory(other_path)
+    if other_dir is None:
+        return MergeResult(False, str(other_path), error=f"No TDD history found at: {other_path}")
+    if other_dir.resolve() == TDD_DIR.resolve():
+        return MergeResult(False, str(other_dir), error="Cannot merge a .tdd directory into itself")
+    
+    # Tag each stream with its side; on equal keys the local copy sorts first
+    local_stream = ((_log_order_key(entry), 0, entry) for entry in iter_log())
+    remote_stream = ((_log_order_key(entry), 1, entry) for entry in iter_log(other_dir))
+    
+    SHARD_DIR.mkdir(exist_ok=True)
+    import_name = f"imported-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{new_entry_id()[:6]}.jsonl"
+    temp_path = SHARD_DIR / f".{import_name}.tmp"
+    imported = 0
+    already_present = 0
+    previous_key = None
+    
+    with open(temp_path, "w", encoding="utf-8") as import_shard:
+        for key, side, entry in heapq.merge(local_stream, remote_stream, key=lambda item: item[:2]):
+            if key == previous_key:
+                already_present += side
+                continue
+            previous_key = key
+            if side == 1:
+                entry.setdefault("entry_id", get_entry_id(entry))
+                entry.setdefault("agent", "imported")
+                import_shard.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                imported += 1
+    
+    if not imported:
+        temp_path.unlink()
+        return MergeResult(True, str(other_dir), 0, already_present, (time.perf_counter() - started) * 1000)
+    
+    # The import shard is already in merge order, so it is a valid sorted stream
+    import_path = SHARD_DIR / import_name
+    os.replace(temp_path, import_path)
+    
+    batch = []
+    for entry in _iter_shard(import_path):
+        batch.append(entry)
+        if len(batch) >= MERGE_INDEX_BATCH:
+            index_entries(batch, iter_log())
+            batch = []
+    if batch:
+        index_entries(batch, iter_log())
+    
+    # Status and cycles are re-projected from the merged log
+    with file_lock(PROJECTION_LOCK_FILE):
+        update_status(load_log())
+    return MergeResult(True, str(other_dir), imported, already_present, (time.perf_counter() - started) * 1000)
+
+# ============================================================
+# 🐍 PYTHON API
+# TDDStore exposes the context system in-process, with structured
+# results instead of console output, so tooling can batch many
+# operations without paying interpreter startup per call:
+#
+#     sys.path.insert(0, "TDD-ContextSysten")
+#     from newtdd import TDDStore, LogRequest
+#     store = TDDStore(agent_id="ci")
+#     store.log_batch([LogRequest("1.3", "🔴 RED: ..."), ...])
+#
+# The CLI in main() is a thin wrapper over this class.
+# ============================================================
+
+@dataclass
+class SessionInfo:
+    """A roadmap session"""
+    session_id: str
+    title: str
+    phase: str
+    duration: int
+    risk: str
+    objective: str
+    deliverables: List[str]
+    dependencies: List[str]
+    
+    @classmethod
+    def from_roadmap(cls, session_id: str) -> "SessionInfo":
+        session = ROADMAP_SESSIONS[session_id]
+        return cls(session_id, session["title"], session["phase"], session["duration"], session["risk"],
+                   session["objective"], list(session["deliverables"]), list(session["dependencies"]))
+
+@dataclass
+class StatusSummary:
+    """Projected roadmap status as published in the current snapshot"""
+    completed_sessions: List[str]
+    total_sessions: int
+    current_phase: str
+    last_updated: Optional[str]
+    available: List[SessionInfo]
+    generation: int
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+    
+    @property
+    def progress_percent(self) -> float:
+        return len(self.completed_sessions) / self.total_sessions * 100 if self.total_sessions else 0.0
+
+@dataclass
+class LogRequest:
+    """One action to log"""
+    session_id: str
+    action: str
+    idempotency_key: Optional[str] = None
+    dedup: bool = True
+    tdd_phase: Optional[str] = None
+    source: Optional[str] = None
+
+@dataclass
+class LogResult:
+    """Outcome of logging one action"""
+    session_id: str
+    action: str
+    logged: bool
+    duplicate: bool = False
+    error: Optional[str] = None
+    entry: Optional[Dict[str, Any]] = None
+    writes: Dict[str, List[str]] = field(default_factory=dict)
+    warning: Optional[str] = None
+    
+    @property
+    def tdd_phase(self) -> Optional[str]:
+        return self.entry["tdd_phase"] if self.entry else None
+
+@dataclass
+class TransitionViolation:
+    """An entry that breaks the TDD rules for its session"""
+    position: int
+    entry_id: str
+    session_id: str
+    from_phase: str
+    to_phase: str
+    rule: str
+    rejected: bool
+
+@dataclass
+class TestIngestResult:
+    """Outcome of ingesting one test report"""
+    source: str
+    format: str
+    total: int
+    passed: int
+    failed: int
+    skipped: int
+    unattributed: int
+    sessions: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    logged: List[LogResult] = field(default_factory=list)
+
+@dataclass
+class CoverageImportResult:
+    """Outcome of importing one coverage report"""
+    report: str
+    format: str
+    skipped: bool
+    files: int = 0
+    total: Optional[float] = None
+    sessions: Dict[str, Optional[float]] = field(default_factory=dict)
+
+@dataclass
+class AttributionResult:
+    """Changed files attributed to roadmap sessions"""
+    paths: Dict[str, List[str]]
+    sessions: Dict[str, List[str]]
+    unattributed: List[str]
+    
+    def check_claim(self, session_id: str) -> bool:
+        """Whether the changes touched any file the session claims as a deliverable"""
+        return session_id in self.sessions
+
+@dataclass
+class ImpactResult:
+    """Test files selected for a session"""
+    session_id: str
+    deliverables: List[str]
+    tests: List[str]
+    scanned: int
+
+@dataclass
+class DeliverableCheck:
+    """Verification of one deliverable file"""
+    session_id: str
+    path: str
+    exists: bool
+    size: Optional[int] = None
+    modified: Optional[str] = None
+    test_path: Optional[str] = None
+    problems: List[str] = field(default_factory=list)
+    notes: List[str] = field(default_factory=list)
+
+@dataclass
+class ContextBundle:
+    """A packed handoff bundle"""
+    session_id: str
+    path: str
+    content: str
+    size: int
+    unit: str
+    budget: int
+    files: List[str] = field(default_factory=list)
+    omitted: List[str] = field(default_factory=list)
+
+@dataclass
+class BundleReport:
+    """Sizes of one build of dist/ and the regressions found in it"""
+    commit: str
+    previous_commit: Optional[str]
+    chunks: Dict[str, Dict[str, Optional[int]]]
+    totals: Dict[str, int]
+    previous: Optional[Dict[str, int]]
+    budgets: Dict[str, int]
+    regressions: List[str] = field(default_factory=list)
+    logged: List[LogResult] = field(default_factory=list)
+
+@dataclass
+class SearchHit:
+    """One ranked search result"""
+    entry_id: str
+    score: float
+    session_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    action: str = ""
+    agent: Optional[str] = None
+
+@dataclass
+class RebuildResult:
+    """Outcome of replaying the log into status"""
+    events: int
+    replayed: int
+    elapsed_ms: float
+    writes: Dict[str, List[str]] = field(default_factory=dict)
+
+@dataclass
+class RevertResult:
+    """Outcome of reverting an entry"""
+    reverted: bool
+    target: Optional[Dict[str, Any]] = None
+    event: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+@dataclass
+class MergeResult:
+    """Outcome of merging another .tdd directory"""
+    merged: bool
+    source: str
+    imported: int = 0
+    already_present: int = 0
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+class TDDStore:
+    """In-process API over the TDD context files"""
+    
+    def __init__(self, agent_id: Optional[str] = None, rules: Optional[str] = None) -> None:
+        self.agent_id = get_agent_id(agent_id)
+        self.rules = rules or os.environ.get("TDD_RULES", "lenient")
+        if self.rules not in TDD_RULE_SETS:
+            raise ValueError(f"Unknown TDD rule set: {self.rules} (available: {', '.join(TDD_RULE_SETS)})")
+        self.recovered = initialize_tdd_system()
+    
+    def log(self, session_id: str, action: str, idempotency_key: Optional[str] = None,
+            dedup: bool = True) -> LogResult:
+        """Log one action for a roadmap session"""
+        return self.log_batch([LogRequest(session_id, action, idempotency_key, dedup)])[0]
+    
+    def log_batch(self, requests: Iterable[LogRequest]) -> List[LogResult]:
+        """Log several actions as one journaled update with a single status projection"""
+        with file_lock(PROJECTION_LOCK_FILE):
+            return self._log_batch(requests)
+    
+    def _log_batch(self, requests):
+        log_data = load_log()
+        results = []
+        new_entries = []
+        claimed = []
+        machine = TDDStateMachine.from_status(read_status_snapshot()["status"], self.rules)
+        
+        with profile_stage("prepare"):
+            for request in requests:
+                if request.session_id not in ROADMAP_SESSIONS:
+                    results.append(LogResult(request.session_id, request.action, False,
+                                             error=f"Unknown session: {request.session_id}"))
+                    continue
+                
+                # Ignore retried calls that were already logged (in an earlier call, this batch,
+                # or a call still being written) - the key is claimed before anything is written
+                digests = get_idempotency_digests(request.session_id, request.action, request.idempotency_key)
+                if request.dedup:
+                    with profile_stage("dedup"):
+                        if not claim_idempotency_digests(digests):
+                            results.append(LogResult(request.session_id, request.action, False, duplicate=True))
+                            continue
+                
+                entry = build_log_entry(request.session_id, request.action, log_data,
+                                        self.agent_id, request.idempotency_key, request.tdd_phase, request.source)
+                violation = machine.check(request.session_id, entry["tdd_phase"])
+                if violation and machine.rules["reject_violations"]:
+                    if request.dedup:
+                        release_idempotency_digest(digests[0])
+                    results.append(LogResult(request.session_id, request.action, False,
+                                             error=f"TDD VIOLATION: {violation}"))
+                    continue
+                machine.advance(request.session_id, entry["tdd_phase"])
+                log_data.append(entry)
+                new_entries.append(entry)
+                if request.dedup:
+                    claimed.append(digests[0])
+                results.append(LogResult(request.session_id, request.action, True, entry=entry, warning=violation))
+        
+        if new_entries:
+            # Write log, status and reports as one journaled update
+            try:
+                writes = update_status(log_data, new_entries)
+            except BaseException:
+                # Nothing was logged - let a retry through
+                for digest in claimed:
+                    release_idempotency_digest(digest)
+                raise
+            for result in results:
+                if result.logged:
+                    result.writes = writes
+            
+            # Keep the search index in step with the log
+            with profile_stage("index"):
+                index_entries(new_entries, log_data)
+        return results
+    
+    def current_phase(self, session_id: str) -> str:
+        """A session's current TDD phase (PLANNING before its first RED/GREEN/REFACTOR entry)"""
+        stats = read_status_snapshot()["status"].get("sessions", {}).get(session_id, {})
+        return stats.get("tdd_state", {}).get("phase", "PLANNING")
+    
+    def validate(self, rules: Optional[str] = None) -> List[TransitionViolation]:
+        """Check the whole log against a TDD rule set in one pass"""
+        return TDDStateMachine(rules or self.rules).validate(list(get_live_entries(load_log())))
+    
+    def status(self) -> StatusSummary:
+        """Current status, read lock-free from the latest snapshot"""
+        snapshot = read_status_snapshot()
+        status = snapshot["status"]
+        return StatusSummary(
+            completed_sessions=list(status["completed_sessions"]),
+            total_sessions=status["total_sessions"],
+            current_phase=status["current_phase"],
+            last_updated=status.get("last_updated"),
+            available=[SessionInfo.from_roadmap(session_id) for session_id in snapshot["available"]],
+            generation=snapshot["generation"],
+            raw=status
+        )
+    
+    def available_sessions(self) -> List[SessionInfo]:
+        """Sessions whose dependencies are completed"""
+        return self.status().available
+    
+    def entries(self, live_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """Stream log entries in merge order"""
+        return get_live_entries() if live_only else iter_log()
+    
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Ranked full-text search over logged actions"""
+        with profile_stage("search"):
+            hits = search_log(query, limit)
+        return [SearchHit(entry_id=hit["entry_id"], score=hit["score"], session_id=hit.get("session_id"),
+                          timestamp=hit.get("timestamp"), action=hit.get("action", ""), agent=hit.get("agent"))
+                for hit in hits]
+    
+    def reindex(self) -> int:
+        """Rebuild the search index, returning the number of indexed entries"""
+        return build_search_index(iter_log())
+    
+    def rebuild(self, full: bool = False) -> RebuildResult:
+        """Replay the log into status and reports"""
+        return rebuild_state(full)
+    
+    def revert(self, entry_reference: Optional[str] = None) -> RevertResult:
+        """Revert an entry by ID (or ID prefix), or the latest live entry"""
+        return revert_entry(entry_reference, self.agent_id)
+    
+    def merge(self, other_path: str) -> MergeResult:
+        """Import the entries of another .tdd directory"""
+        return merge_tdd_directory(other_path)
+    
+    def write_reports(self, formats: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Render and write report formats (default: all registered renderers)"""
+        with file_lock(PROJECTION_LOCK_FILE):
+            return write_reports(load_log(), formats=formats)
+    
+    def dashboard(self) -> Path:
+        """Render the HTML dashboard from the current status snapshot"""
+        status = read_status_snapshot()["status"]
+        if "daily" not in status:
+            # status.json predates daily aggregates - project them once
+            self.rebuild()
+            status = read_status_snapshot()["status"]
+        rendered = render_reports({"status": status, "log_data": None}, ["dashboard"])
+        write_report_exports(rendered)
+        return DASHBOARD_FILE
+    
+    def ingest_tests(self, report_path: str, report_format: Optional[str] = None) -> TestIngestResult:
+        """Ingest a Vitest JSON, JUnit XML or Playwright JSON report"""
+        return ingest_test_report(report_path, report_format, self)
+    
+    def test_summary(self) -> Dict[str, Dict[str, int]]:
+        """Passed/failed/skipped tests per session from the latest ingested reports"""
+        return load_test_summary()
+    
+    def import_coverage(self, report_paths: Optional[Iterable[str]] = None) -> List[CoverageImportResult]:
+        """Import coverage reports (default: the ones in the project's coverage/ directory)"""
+        return [import_coverage_report(path) for path in (report_paths or default_coverage_reports())]
+    
+    def coverage_trend(self, session_id: Optional[str] = None) -> List[tuple]:
+        """Coverage percentages over time for a session (or the whole project)"""
+        return coverage_trend(session_id)
+    
+    def attribute(self, paths: Iterable[str]) -> AttributionResult:
+        """Map changed file paths to the sessions whose deliverables they are"""
+        return attribute_paths(paths)
+    
+    def impacted_tests(self, session_id: str) -> ImpactResult:
+        """Minimal set of test files exercising a session's deliverables"""
+        return select_impacted_tests(session_id)
+    
+    def verify(self, session_ids: Optional[Iterable[str]] = None) -> List[DeliverableCheck]:
+        """Check deliverable files of the given sessions (default: every started session)"""
+        return verify_deliverables(session_ids)
+    
+    def context_bundle(self, session_id: Optional[str] = None, token_budget: int = CONTEXT_TOKEN_BUDGET,
+                       byte_budget: Optional[int] = None, log_limit: int = CONTEXT_LOG_ENTRIES) -> ContextBundle:
+        """Build the handoff bundle for a session (default: the active one)"""
+        return build_context_bundle(session_id, token_budget, byte_budget, log_limit)
+    
+    def bundle_report(self, dist_dir: Optional[str] = None,
+                      budgets: Optional[Dict[str, int]] = None) -> BundleReport:
+        """Measure the Vite build and log size regressions on session 4.3"""
+        return bundle_report(dist_dir, budgets, self)
+    
+    def metrics(self) -> str:
+        """OpenMetrics text for the current status and command latencies"""
+        return render_openmetrics(read_status_snapshot()["status"])
+    
+    def write_metrics(self) -> Path:
+        """Write the metrics textfile (Prometheus text format, for node_exporter's textfile collector)"""
+        write_report_exports({"openmetrics": render_openmetrics_textfile(read_status_snapshot())})
+        return METRICS_FILE
+    
+    def progress_report(self) -> str:
+        """Render the progress report markdown from the current status snapshot"""
+        return generate_progress_report(read_status_snapshot()["status"])
+    
+    def next_steps(self) -> str:
+        """Render the next steps markdown from the current status snapshot"""
+        return generate_next_steps(read_status_snapshot()["status"])
+
+# ============================================================
+# 🌐 STATUS SERVER
+# Optional localhost-only JSON API for dashboards and editor plugins.
+# Responses carry an ETag derived from the snapshot generation, so a
+# poll with If-None-Match is answered 304 without touching the log;
+# /events pushes new entries as server-sent events by tailing the
+# shard files from remembered offsets.
+# ============================================================
+
+class ShardTail:
+    """Follow appends to the shard files from remembered byte offsets"""
+    
+    def __init__(self):
+        self.offsets = {}
+        if SHARD_DIR.exists():
+            for path in SHARD_DIR.glob("*.jsonl"):
+                self.offsets[path.name] = path.stat().st_size
+    
+    def read_new_entries(self):
+        """Entries appended since the last call, in merge order"""
+        entries = []
+        if not SHARD_DIR.exists():
+            return entries
+        for item in os.scandir(SHARD_DIR):
+            if not item.name.endswith(".jsonl"):
+                continue
+            size = item.stat().st_size
+            if item.name.startswith(SHARD_COMPACTED_PREFIX) and item.name not in self.offsets:
+                # Compacted shards only hold entries that were already streamed
+                self.offsets[item.name] = size
+            offset = self.offsets.get(item.name, 0)
+            if size <= offset:
+                continue
+            with open(item.path, "rb") as shard:
+                shard.seek(offset)
+                data = shard.read(size - offset)
+            # Only consume complete lines - a line still being written is picked up next time
+            complete = data.rfind(b"\n") + 1
+            self.offsets[item.name] = offset + complete
+            for line in data[:complete].splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                entry.setdefault("agent", item.name[:-len(".jsonl")])
+                entries.append(entry)
+        return sorted(entries, key=_log_order_key)
+
+def recent_entries(limit=20, session_id=None):
+    """The newest log entries, optionally for one session"""
+    recent = deque(maxlen=limit)
+    for entry in iter_log():
+        if session_id is None or entry.get("session_id") == session_id:
+            recent.append(entry)
+    return list(recent)
+
+def is_local_host(value):
+    """Whether a Host header ("localhost:8765") or an Origin ("http://localhost:5173") names this machine"""
+    url = urlparse(value if "://" in value else f"//{value}")
+    try:
+        url.port
+    except ValueError:
+        return False
+    return url.scheme in ("", "http", "https") and url.hostname in SERVER_LOCAL_HOSTNAMES
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Read-only JSON endpoints over the published status snapshot"""
+    
+    server_version = "ExamKlarTDD/1.0"
+    
+    def log_message(self, format, *args):
+        # Keep the console quiet - editors poll frequently
+        pass
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        
+        # A page on another site that rebinds its DNS name to 127.0.0.1 still sends its own Host
+        if not is_local_host(self.headers.get("Host", "")):
+            self._send_json(403, {"error": "Only requests to localhost are served"})
+            return
+        
+        if parts == ["events"]:
+            self._stream_events()
+            return
+        if parts == ["metrics"]:
+            # Command latencies change without a new status generation - never cached
+            self._send_text(200, render_openmetrics(read_status_snapshot()["status"]), OPENMETRICS_CONTENT_TYPE)
+            return
+        
+        snapshot = read_status_snapshot()
+        status = snapshot["status"]
+        fingerprint = f"{snapshot['generation']}|{status.get('last_updated')}|{self.path}"
+        etag = f'"{hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._send_common_headers(etag)
+            self.end_headers()
+            return
+        
+        if parts in ([], ["status"]):
+            body = status
+        elif parts == ["available"]:
+            body = [asdict(SessionInfo.from_roadmap(session_id)) for session_id in snapshot["available"]]
+        elif parts == ["sessions"]:
+            body = status.get("sessions", {})
+        elif len(parts) == 2 and parts[0] == "sessions" and parts[1] in ROADMAP_SESSIONS:
+            body = {
+                **asdict(SessionInfo.from_roadmap(parts[1])),
+                "completed": parts[1] in status["completed_sessions"],
+                "stats": status.get("sessions", {}).get(parts[1], {"entries": 0, "tdd_cycles": 0, "phases": {}})
+            }
+        elif parts == ["entries"]:
+            limit = query.get("limit", ["20"])[0]
+            if not limit.isdigit():
+                self._send_json(400, {"error": f"limit must be a non-negative integer, not {limit!r}"})
+                return
+            body = recent_entries(int(limit), query.get("session", [None])[0])
+        else:
+            self._send_json(404, {"error": f"Not found: {url.path}"})
+            return
+        self._send_json(200, body, etag)
+    
+    def _send_common_headers(self, etag=None):
+        origin = self.headers.get("Origin", "")
+        # Browsers may only read the API from local dev servers (e.g. Vite on localhost:5173)
+        if origin and is_local_host(origin):
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+    
+    def _send_json(self, code, body, etag=None):
+        self._send_text(code, json.dumps(body, ensure_ascii=False, indent=2), "application/json; charset=utf-8", etag)
+    
+    def _send_text(self, code, text, content_type, etag=None):
+        payload = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self._send_common_headers(etag)
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def _stream_events(self):
+        """Push new entries (and status generation changes) as server-sent events"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self._send_common_headers()
+        self.end_headers()
+        
+        tail = ShardTail()
+        generation = read_status_snapshot()["generation"]
+        last_write = time.monotonic()
+        try:
+            while True:
+                messages = [f"id: {get_entry_id(entry)}\nevent: entry\ndata: {json.dumps(entry, ensure_ascii=False)}\n\n"
+                            for entry in tail.read_new_entries()]
+                snapshot = read_status_snapshot()
+                if snapshot["generation"] != generation:
+                    generation = snapshot["generation"]
+                    messages.append(f"event: status\ndata: {json.dumps(snapshot['status'], ensure_ascii=False)}\n\n")
+                if not messages and time.monotonic() - last_write >= SSE_KEEPALIVE_SECONDS:
+                    messages.append(": keep-alive\n\n")
+                if messages:
+                    self.wfile.write("".join(messages).encode("utf-8"))
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                time.sleep(SSE_POLL_SECONDS)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away
+            return
+
+def serve_status(port=SERVER_PORT):
+    """Serve the JSON status API on localhost until interrupted"""
+    server = ThreadingHTTPServer((SERVER_HOST, port), StatusRequestHandler)
+    server.daemon_threads = True
+    print(f"🌐 Serving TDD status on http://{SERVER_HOST}:{port}/ (Ctrl-C to stop)")
+    print(f"   Endpoints: /status /available /sessions /sessions/<id> /entries?limit=N /events")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Status server stopped")
+    finally:
+        server.server_close()
+
+def pop_flag(args, flag):
+    """Remove a boolean flag from an argument list, returning whether it was present"""
+    if flag not in args:
+        return False
+    args.remove(flag)
+    return True
+
+def pop_option(args, option, default=None):
+    """Remove an option and its value from an argument list, returning the value"""
+    if option not in args or args.index(option) + 1 >= len(args):
+        return default
+    position = args.index(option)
+    value = args[position + 1]
+    del args[position:position + 2]
+    return value
 
 def main():
     """CLI interface for TDD system"""
-    initialize_tdd_system()
+    args = sys.argv[1:]
+    profile_mode = os.environ.get("TDD_PROFILE", "")
+    use_cprofile = pop_flag(args, "--cprofile") or profile_mode == "cprofile"
+    if pop_flag(args, "--profile") or use_cprofile or profile_mode not in ("", "0"):
+        start_profiling(use_cprofile)
+    
+    command = args[0] if args and args[0] in CLI_COMMANDS else ("log" if args else "status")
+    started = time.perf_counter()
+    try:
+        with profile_stage("command"):
+            run_command(args)
+    finally:
+        if command not in ("serve", "watch"):
+            record_command_latency(command, time.perf_counter() - started)
+        summary = finish_profiling()
+        if summary:
+            print(f"⏱️  Profile: {summary}", file=sys.stderr)
+
+CLI_COMMANDS = {"status", "available", "search", "rebuild", "undo", "revert", "merge", "report",
+                "dashboard", "ingest-tests", "coverage", "attribute", "impact", "verify", "watch", "context", "bundle-report", "validate", "metrics", "serve"}
+
+def run_command(args):
+    """Dispatch one CLI command"""
+    agent_id = pop_option(args, "--agent")
+    rules = pop_option(args, "--rules")
+    try:
+        store = TDDStore(agent_id, rules)
+    except ValueError as error:
+        print(f"❌ {error}")
+        return
+    if store.recovered:
+        print(f"♻️  Recovered {store.recovered} interrupted update(s) from the journal")
     
-    if len(sys.argv) < 2:
-        show_status()
+    if not args:
+        show_status(store)
         return
     
-    command = sys.argv[1]
+    command = args.pop(0)
     
     if command == "status":
-        show_status()
+        show_status(store)
     elif command == "available":
-        available = get_available_sessions()
-        print(f"\n🚀 Available Sessions ({len(available)}):")
-        for session_id in available:
-            session = ROADMAP_SESSIONS[session_id]
-            print(f"  {session_id}: {session['title']} ({session['duration']}min)")
-    elif len(sys.argv) >= 3:
+        show_available(store)
+    elif command == "search":
+        if pop_flag(args, "--reindex"):
+            print(f"🔎 Search index rebuilt: {store.reindex()} entries")
+        limit = int(pop_option(args, "--limit", 10))
+        if args:
+            show_search_results(" ".join(args), limit, store)
+    elif command == "rebuild":
+        result = store.rebuild(full=pop_flag(args, "--full"))
+        print(f"🧮 Rebuilt status from {result.events} events "
+              f"({result.replayed} replayed after checkpoint, {result.elapsed_ms:.1f} ms)")
+        print(f"💾 Context files: {len(result.writes['written'])} written, "
+              f"{len(result.writes['skipped'])} unchanged (write skipped)")
+    elif command == "undo" or (command == "revert" and args):
+        result = store.revert(args[0] if command == "revert" else None)
+        if result.reverted:
+            print(f"↩️  Reverted {result.event['reverts']} [{result.target['session_id']}]: "
+                  f"{result.target.get('action', '')}")
+        else:
+            print(f"❌ {result.error}")
+    elif command == "merge" and args:
+        result = store.merge(args[0])
+        if result.error:
+            print(f"❌ {result.error}")
+        elif result.imported:
+            print(f"🔀 Merged {result.imported} new entries from {result.source} "
+                  f"({result.already_present} already present, {result.elapsed_ms:.1f} ms)")
+        else:
+            print(f"🔀 Nothing to merge: all {result.already_present} entries from {result.source} are already present")
+    elif command == "report":
+        formats = pop_option(args, "--format")
+        try:
+            writes = store.write_reports(formats.split(",") if formats else None)
+        except ValueError as error:
+            print(f"❌ {error}")
+            return
+        for name in writes["written"]:
+            print(f"🖨️  Wrote {TDD_DIR / name}")
+        print(f"💾 Reports: {len(writes['written'])} written, "
+              f"{len(writes['skipped'])} unchanged (write skipped)")
+    elif command == "dashboard":
+        print(f"📈 Dashboard written to {store.dashboard()}")
+    elif command == "ingest-tests" and args:
+        report_format = pop_option(args, "--format")
+        for report_path in args:
+            try:
+                result = store.ingest_tests(report_path, report_format)
+            except (OSError, ValueError, ElementTree.ParseError) as error:
+                print(f"❌ {report_path}: {error}")
+                continue
+            print(f"🧪 Ingested {result.total} {result.format} test(s) from {result.source}: "
+                  f"{result.passed} passed, {result.failed} failed, {result.skipped} skipped "
+                  f"({result.unattributed} not attributed to a session)")
+            for session_id, summary in sorted(result.sessions.items()):
+                print(f"   {session_id}: {summary['passed']} passed, {summary['failed']} failed")
+            for logged in result.logged:
+                if logged.logged:
+                    print(f"   [{logged.session_id}] {logged.action}")
+                elif logged.error:
+                    print(f"   ❌ [{logged.session_id}] {logged.error}")
+    elif command == "coverage":
+        minimum = TDD_RULE_SETS[store.rules]["minimum_coverage"]
+        try:
+            results = store.import_coverage(args)
+        except (OSError, ValueError, KeyError) as error:
+            print(f"❌ {error}")
+            return
+        if not results:
+            print(f"❌ No coverage reports found in {COVERAGE_DIR} - run: npm run test:coverage")
+        for result in results:
+            if result.skipped:
+                print(f"⏭️  {result.report} unchanged since the last import")
+                continue
+            print(f"📈 Imported {result.files} file(s) from {result.report} ({result.format}): "
+                  f"{result.total if result.total is not None else '-'}% overall")
+            for session_id, percent in sorted(result.sessions.items()):
+                trend = store.coverage_trend(session_id)
+                change = f" ({percent - trend[-2][1]:+.1f})" if len(trend) > 1 and percent is not None else ""
+                mark = "✅" if percent is not None and percent >= minimum else "⚠️ "
+                print(f"   {mark} {session_id}: {percent}%{change} (minimum {minimum}%)")
+    elif command == "attribute":
+        claimed = pop_option(args, "--session")
+        action = pop_option(args, "--log")
+        if args == ["-"] or (not args and not sys.stdin.isatty()):
+            # git diff --name-only | python3 newtdd.py attribute
+            args = sys.stdin.read().split()
+        result = store.attribute(args)
+        for path, session_ids in result.paths.items():
+            print(f"   {path} → {', '.join(session_ids) if session_ids else 'no session'}")
+        print(f"🗂️  {len(result.paths) - len(result.unattributed)}/{len(result.paths)} file(s) attributed to "
+              f"{len(result.sessions)} session(s): {', '.join(sorted(result.sessions)) or '-'}")
+        if claimed:
+            if result.check_claim(claimed):
+                print(f"✅ {claimed} touched {len(result.sessions[claimed])} of its deliverable file(s)")
+            else:
+                print(f"⚠️  None of the changed files are deliverables of {claimed}")
+        if action:
+            targets = [claimed] if claimed else sorted(result.sessions)
+            if len(targets) != 1:
+                print(f"❌ Cannot tag the action: changes match {len(targets)} sessions - pass --session ID")
+            else:
+                log_session(targets[0], action, store=store)
+    elif command == "impact" and args:
+        run_tests = pop_flag(args, "--run")
+        session_id = args[0] if args else ""
+        if session_id not in ROADMAP_SESSIONS:
+            print(f"❌ Unknown session: {session_id}")
+            return
+        result = store.impacted_tests(session_id)
+        print(f"🎯 {len(result.tests)} test file(s) exercise {session_id}'s deliverables "
+              f"({result.scanned} files in the import graph):")
+        for test_path in result.tests:
+            print(f"   {test_path}")
+        if run_tests and result.tests:
+            try:
+                ingested = run_impacted_tests(result, store)
+            except OSError as error:
+                print(f"❌ {error}")
+                return
+            print(f"🧪 {ingested.passed} passed, {ingested.failed} failed, {ingested.skipped} skipped")
+            for logged in ingested.logged:
+                if logged.logged:
+                    print(f"   [{logged.session_id}] {logged.action}")
+    elif command == "verify":
+        unknown = [session_id for session_id in args if session_id not in ROADMAP_SESSIONS]
+        if unknown:
+            print(f"❌ Unknown session(s): {', '.join(unknown)}")
+            return
+        checks = store.verify(args or None)
+        for check in checks:
+            icon = "❌" if "missing" in check.problems else "⚠️ " if check.problems else "✅"
+            details = "; ".join(check.problems + check.notes)
+            print(f"{icon} [{check.session_id}] {check.path}"
+                  f"{f' (test: {check.test_path})' if check.test_path and check.test_path != check.path else ''}"
+                  f"{f' - {details}' if details else ''}")
+        print(f"🔍 {sum(1 for check in checks if not check.problems)}/{len(checks)} deliverable(s) verified")
+    elif command == "watch":
+        reports = pop_option(args, "--reports")
+        try:
+            watch_project(reports.split(",") if reports else None, pop_flag(args, "--run"), store)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+    elif command == "context":
+        token_budget = int(pop_option(args, "--tokens", CONTEXT_TOKEN_BUDGET))
+        byte_budget = pop_option(args, "--bytes")
+        log_limit = int(pop_option(args, "--entries", CONTEXT_LOG_ENTRIES))
+        to_stdout = pop_flag(args, "--stdout")
+        try:
+            bundle = store.context_bundle(args[0] if args else None, token_budget,
+                                          int(byte_budget) if byte_budget else None, log_limit)
+        except ValueError as error:
+            print(f"❌ {error}")
+            return
+        if to_stdout:
+            print(bundle.content)
+        else:
+            print(f"🧳 Context for session {bundle.session_id} written to {bundle.path}: "
+                  f"{bundle.size}/{bundle.budget} {bundle.unit}, {len(bundle.files)} file(s)"
+                  f"{f', {len(bundle.omitted)} omitted' if bundle.omitted else ''}")
+    elif command == "bundle-report":
+        dist_dir = pop_option(args, "--dist")
+        overrides = {}
+        try:
+            while (budget := pop_option(args, "--budget")) is not None:
+                metric, _, size = budget.partition("=")
+                if not size.isdigit():
+                    raise ValueError(f"Budgets are given as metric=bytes, not {budget}")
+                overrides[metric] = int(size)
+            report = store.bundle_report(dist_dir, overrides)
+        except ValueError as error:
+            print(f"❌ {error}")
+            return
+        print(f"📦 Bundle at {report.commit}: {len(report.chunks)} file(s)")
+        largest = sorted(report.chunks.items(), key=lambda item: item[1]["gzip"], reverse=True)
+        for path, sizes in largest[:BUNDLE_LISTED_CHUNKS]:
+            brotli_size = format_bytes(sizes["brotli"]) if sizes["brotli"] is not None else "-"
+            print(f"   {path}: {format_bytes(sizes['raw'])} raw, {format_bytes(sizes['gzip'])} gzip, "
+                  f"{brotli_size} brotli")
+        for metric, budget in report.budgets.items():
+            change = ""
+            if report.previous and metric in report.previous:
+                change = f" ({report.totals[metric] - report.previous[metric]:+,} B since {report.previous_commit})"
+            mark = "❌" if report.totals[metric] > budget else "✅"
+            print(f"{mark} {metric}: {format_bytes(report.totals[metric])} / {format_bytes(budget)}{change}")
+        if report.regressions:
+            logged = sum(result.logged for result in report.logged)
+            print(f"⚠️  {len(report.regressions)} regression(s), {logged} logged on session {BUNDLE_SESSION}")
+    elif command == "validate":
+        violations = store.validate()
+        for violation in violations:
+            print(f"{'🚨' if violation.rejected else '⚠️ '} [{violation.session_id}] {violation.entry_id}: "
+                  f"{violation.from_phase} → {violation.to_phase}: {violation.rule}")
+        print(f"🚦 {len(violations)} TDD rule violation(s) under {store.rules} rules")
+    elif command == "metrics":
+        if pop_flag(args, "--stdout"):
+            print(store.metrics(), end="")
+        else:
+            print(f"📊 Metrics written to {store.write_metrics()} (also served at /metrics by serve)")
+    elif command == "serve":
+        serve_status(int(pop_option(args, "--port", SERVER_PORT)))
+    elif args:
         session_id = command
-        action = " ".join(sys.argv[2:])
-        log_session(session_id, action)
+        idempotency_key = pop_option(args, "--key", os.environ.get("TDD_IDEMPOTENCY_KEY"))
+        dedup = not pop_flag(args, "--no-dedup")
+        log_session(session_id, " ".join(args), idempotency_key, dedup, store=store)
     else:
-        print("Usage: python3 newtdd.py [session_id] [action_description]")
+        print("Usage: python3 newtdd.py [session_id] [action_description] [--key KEY] [--no-dedup] [--agent ID] "
+              "[--rules strict|lenient]")
         print("       python3 newtdd.py status")
         print("       python3 newtdd.py available")
+        print("       python3 newtdd.py search <query> [--limit N] [--reindex]")
+        print("       python3 newtdd.py rebuild [--full]")
+        print("       python3 newtdd.py undo")
+        print("       python3 newtdd.py revert <entry_id>")
+        print("       python3 newtdd.py merge <other .tdd directory>")
+        print("       python3 newtdd.py report [--format " + ",".join(REPORT_RENDERERS) + "]")
+        print("       python3 newtdd.py dashboard")
+        print("       python3 newtdd.py ingest-tests <report.json|report.xml>... [--format vitest|junit|playwright]")
+        print("       python3 newtdd.py coverage [lcov.info|coverage-summary.json|coverage-final.json]...")
+        print("       python3 newtdd.py attribute [paths... | - < git diff --name-only] [--session ID] [--log ACTION]")
+        print("       python3 newtdd.py impact <session_id> [--run]")
+        print("       python3 newtdd.py verify [session_id...]")
+        print("       python3 newtdd.py watch [--run] [--reports test-results.json,junit.xml,...]")
+        print("       python3 newtdd.py context [session_id] [--tokens N | --bytes N] [--entries N] [--stdout]")
+        print("       python3 newtdd.py bundle-report [--dist dir] [--budget total|js|css|largest_chunk=bytes ...]")
+        print("       python3 newtdd.py validate [--rules strict|lenient]")
+        print("       python3 newtdd.py metrics [--stdout]")
+        print("       python3 newtdd.py serve [--port N]")
+        print("Any command: --profile (or TDD_PROFILE=1) writes a trace to .tdd/profiles/, --cprofile adds cProfile stats")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Session attribution of test files: by name, through imports, or not at all"""
+
+
+def write(newtdd, path, source):
+    target = newtdd.PROJECT_ROOT / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(source, encoding="utf-8")
+
+
+def project(newtdd):
+    write(newtdd, "src/types/onboarding.ts", "export interface OnboardingData { name: string }\n")
+    write(newtdd, "src/types/index.ts", "export * from './onboarding'\nexport interface User { id: string }\n")
+    write(newtdd, "src/stores/onboardingStore.ts",
+          "import type { OnboardingData } from '../types'\nexport const useOnboardingStore = () => null\n")
+    write(newtdd, "src/components/Quiz.tsx",
+          "import type { User } from '../types'\nexport function Quiz() { return null }\n")
+
+
+def sessions(newtdd, path):
+    return newtdd.attribute_paths([path]).paths[path]
+
+
+def test_type_only_modules_are_detected(newtdd):
+    project(newtdd)
+    graph = newtdd.load_import_graph()
+    assert graph.type_only == {"src/types/onboarding.ts", "src/types/index.ts"}
+
+
+def test_test_matching_no_deliverable_gets_no_sessions(newtdd):
+    project(newtdd)
+    write(newtdd, "tests/performance.test.tsx", "import { Quiz } from '../src/components/Quiz'\n")
+    write(newtdd, "tests/deployment.test.ts", "import { describe } from 'vitest'\n")
+    assert sessions(newtdd, "tests/performance.test.tsx") == []
+    assert sessions(newtdd, "tests/deployment.test.ts") == []
+
+
+def test_walk_does_not_pass_through_type_only_modules(newtdd):
+    project(newtdd)
+    write(newtdd, "tests/components/Quiz.test.tsx",
+          "import type { User } from '../../src/types'\nimport { Quiz } from '../../src/components/Quiz'\n")
+    write(newtdd, "tests/stores/store.test.ts",
+          "import { useOnboardingStore } from '../../src/stores/onboardingStore'\n")
+    write(newtdd, "src/types/__tests__/types.test.ts", "import type { OnboardingData } from '../index'\n")
+    assert sessions(newtdd, "tests/components/Quiz.test.tsx") == []
+    assert sessions(newtdd, "tests/stores/store.test.ts") == ["1.2"]
+    assert sessions(newtdd, "src/types/__tests__/types.test.ts") == ["1.1"]
+
+
+def test_impacted_tests_of_one_session(newtdd):
+    project(newtdd)
+    write(newtdd, "tests/stores/store.test.ts",
+          "import { useOnboardingStore } from '../../src/stores/onboardingStore'\n")
+    write(newtdd, "src/stores/__tests__/onboardingStore.test.ts", "import { describe } from 'vitest'\n")
+    write(newtdd, "tests/components/Quiz.test.tsx", "import { Quiz } from '../../src/components/Quiz'\n")
+    write(newtdd, "tests/performance.test.tsx", "import { describe } from 'vitest'\n")
+    impact = newtdd.select_impacted_tests("1.2")
+    assert impact.tests == ["src/stores/__tests__/onboardingStore.test.ts", "tests/stores/store.test.ts"]
+    assert newtdd.select_impacted_tests("4.3").tests == []
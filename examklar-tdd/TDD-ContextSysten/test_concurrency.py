@@ -0,0 +1,33 @@
+"""Concurrent writers: status and snapshots always catch up with the log"""
+
+import json
+import subprocess
+import sys
+
+WRITER = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import newtdd
+store = newtdd.TDDStore(agent_id=sys.argv[2])
+for round_number in range(int(sys.argv[3])):
+    [result] = store.log_batch([newtdd.LogRequest("1.1", f"note {sys.argv[2]} {round_number}", dedup=False)])
+    assert result.logged, result.error
+"""
+
+
+def test_concurrent_writers_leave_no_stale_projection(newtdd):
+    workspace = newtdd.WORKSPACE_ROOT
+    writers = [subprocess.Popen([sys.executable, "-c", WRITER, str(workspace), f"agent{number}", "20"])
+               for number in range(4)]
+    assert [writer.wait(timeout=120) for writer in writers] == [0, 0, 0, 0]
+
+    logged = len(newtdd.load_log())
+    assert logged == 80
+    assert json.loads(newtdd.CURRENT_STATUS_FILE.read_text())["event_count"] == logged
+    snapshot = newtdd.read_status_snapshot()
+    assert snapshot["status"]["event_count"] == logged
+
+    # Every newer generation holds at least as many events as the one before it
+    counts = [json.loads(newtdd._snapshot_file(generation).read_text())["status"]["event_count"]
+              for generation in newtdd._snapshot_generations()]
+    assert counts == sorted(counts)
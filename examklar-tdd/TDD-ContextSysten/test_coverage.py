@@ -0,0 +1,66 @@
+"""Coverage ingestion: the streamed JSON object reader and per-session coverage"""
+
+import json
+import os
+
+import pytest
+
+SUMMARY = {
+    "total": {"lines": {"covered": 8, "total": 12}},
+    "src/stores/onboardingStore.ts": {"lines": {"covered": 6, "total": 8}},
+    "src/components/Quiz.tsx": {"lines": {"covered": 2, "total": 4}},
+}
+
+LCOV = """SF:{root}/src/types/onboarding.ts
+LF:10
+LH:9
+end_of_record
+SF:{root}/src/stores/onboardingStore.ts
+LF:8
+LH:4
+end_of_record
+"""
+
+
+def write_report(newtdd, name, content):
+    path = newtdd.PROJECT_ROOT / "coverage" / name
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk", [4, 31, 1 << 16])
+def test_object_reader_is_independent_of_chunk_boundaries(newtdd, monkeypatch, chunk):
+    path = write_report(newtdd, "coverage-summary.json", json.dumps(SUMMARY, indent=2))
+    monkeypatch.setattr(newtdd, "JSON_STREAM_CHUNK", chunk)
+    assert dict(newtdd.iter_json_object(path)) == SUMMARY
+
+
+@pytest.mark.parametrize("cut", [0, 30, -2])
+def test_truncated_coverage_report_is_an_error(newtdd, monkeypatch, cut):
+    path = write_report(newtdd, "coverage-summary.json", json.dumps(SUMMARY)[:cut])
+    monkeypatch.setattr(newtdd, "JSON_STREAM_CHUNK", 8)
+    with pytest.raises(ValueError):
+        list(newtdd.iter_json_object(path))
+
+
+def test_summary_report_is_attributed_per_session(newtdd):
+    path = write_report(newtdd, "coverage-summary.json", json.dumps(SUMMARY))
+    result = newtdd.import_coverage_report(path)
+    assert (result.format, result.files, result.total) == ("summary", 2, 66.67)
+    assert result.sessions == {"1.2": 75.0}
+
+
+def test_unchanged_lcov_report_is_skipped(newtdd):
+    path = write_report(newtdd, "lcov.info", LCOV.format(root=newtdd.PROJECT_ROOT))
+    first = newtdd.import_coverage_report(path)
+    assert first.sessions == {"1.1": 90.0, "1.2": 50.0}
+    assert newtdd.import_coverage_report(path).skipped
+
+    # Touched but identical content is recognised by its hash
+    os.utime(path, ns=(0, 0))
+    assert newtdd.import_coverage_report(path).skipped
+
+    path.write_text(LCOV.format(root=newtdd.PROJECT_ROOT).replace("LH:4", "LH:8"), encoding="utf-8")
+    assert newtdd.import_coverage_report(path).sessions["1.2"] == 100.0
+    assert [total for _, total in newtdd.coverage_trend("1.2")] == [50.0, 100.0]
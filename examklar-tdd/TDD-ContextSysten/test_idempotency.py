@@ -0,0 +1,56 @@
+"""Idempotent logging: keys are claimed before the write and released when it fails"""
+
+import pytest
+
+
+def test_retry_with_the_same_key_is_logged_once(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    first = store.log("1.1", "🔴 RED: type test fails", idempotency_key="call-1")
+    retry = store.log("1.1", "🔴 RED: type test fails (retried)", idempotency_key="call-1")
+    assert first.logged
+    assert retry.duplicate and not retry.logged
+    assert len(newtdd.load_log()) == 1
+
+
+def test_retry_overlapping_a_running_call_is_a_duplicate(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    # The first call has claimed its key and is still writing
+    assert newtdd.claim_idempotency_digests(newtdd.get_idempotency_digests("1.1", "🔴 RED: type test fails"))
+    retry = store.log("1.1", "🔴 RED: type test fails")
+    assert retry.duplicate
+    assert newtdd.load_log() == []
+
+
+def test_failed_write_releases_the_key(newtdd, monkeypatch):
+    store = newtdd.TDDStore(agent_id="tester")
+
+    def disk_full(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(newtdd, "update_status", disk_full)
+        with pytest.raises(OSError):
+            store.log("1.1", "🔴 RED: type test fails", idempotency_key="call-1")
+    assert newtdd.load_log() == []
+
+    retry = store.log("1.1", "🔴 RED: type test fails", idempotency_key="call-1")
+    assert retry.logged
+    assert store.log("1.1", "🔴 RED: type test fails", idempotency_key="call-1").duplicate
+
+
+def test_rejected_entry_does_not_keep_its_key(newtdd):
+    store = newtdd.TDDStore(agent_id="tester", rules="strict")
+    for _ in range(2):
+        result = store.log("1.1", "🟢 GREEN: types compile", idempotency_key="call-1")
+        assert not result.duplicate
+        assert "TDD VIOLATION" in result.error
+
+
+def test_released_slot_keeps_later_keys_reachable(newtdd):
+    newtdd.TDDStore(agent_id="tester")
+    digests = [digest * newtdd.DEDUP_TABLE_SLOTS + 7 for digest in (1, 2, 3)]  # same home slot
+    for digest in digests:
+        newtdd.record_idempotency_digest(digest)
+    newtdd.release_idempotency_digest(digests[1])
+    assert not newtdd.is_duplicate_call([digests[1]])
+    assert newtdd.is_duplicate_call([digests[2]])
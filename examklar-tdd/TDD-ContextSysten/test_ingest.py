@@ -0,0 +1,101 @@
+"""Test report ingestion: streamed JSON and JUnit readers, and the RED/GREEN entries they log"""
+
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+
+def vitest_report(newtdd, *statuses):
+    return {"numTotalTests": len(statuses), "testResults": [{
+        "name": str(newtdd.PROJECT_ROOT / "src/stores/__tests__/onboardingStore.test.ts"),
+        "assertionResults": [{"fullName": f"store case {number}", "status": status}
+                             for number, status in enumerate(statuses)]
+    }, {
+        "name": "tests/performance.test.tsx",
+        "assertionResults": [{"title": "renders fast", "status": "pending"}]
+    }]}
+
+
+def write_report(newtdd, name, content):
+    path = newtdd.PROJECT_ROOT / name
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("chunk", [3, 17, 1 << 16])
+def test_vitest_reader_is_independent_of_chunk_boundaries(newtdd, monkeypatch, chunk):
+    path = write_report(newtdd, "test-results.json", vitest_report(newtdd, "passed", "failed"))
+    monkeypatch.setattr(newtdd, "JSON_STREAM_CHUNK", chunk)
+    assert list(newtdd._iter_vitest_tests(path)) == [
+        ("src/stores/__tests__/onboardingStore.test.ts", "store case 0", "P"),
+        ("src/stores/__tests__/onboardingStore.test.ts", "store case 1", "F"),
+        ("tests/performance.test.tsx", "renders fast", "S"),
+    ]
+
+
+@pytest.mark.parametrize("cut", [0, 10, 60, -3])
+def test_truncated_json_report_is_an_error(newtdd, monkeypatch, cut):
+    content = json.dumps(vitest_report(newtdd, "passed", "failed"))
+    path = write_report(newtdd, "test-results.json", content[:cut])
+    monkeypatch.setattr(newtdd, "JSON_STREAM_CHUNK", 16)
+    with pytest.raises(ValueError):
+        list(newtdd._iter_vitest_tests(path))
+
+
+def test_playwright_reader_walks_nested_suites(newtdd):
+    report = {"config": {}, "suites": [{"file": "onboarding.spec.ts", "specs": [], "suites": [{
+        "specs": [{"title": "completes onboarding", "tests": [
+            {"projectName": "chromium", "status": "expected"},
+            {"projectName": "webkit", "status": "unexpected"},
+            {"projectName": "firefox", "status": "skipped"},
+        ]}]
+    }]}]}
+    path = write_report(newtdd, "playwright-results.json", report)
+    assert newtdd.detect_test_report_format(path) == "playwright"
+    assert list(newtdd._iter_playwright_tests(path)) == [
+        ("e2e/onboarding.spec.ts", "completes onboarding [chromium]", "P"),
+        ("e2e/onboarding.spec.ts", "completes onboarding [webkit]", "F"),
+        ("e2e/onboarding.spec.ts", "completes onboarding [firefox]", "S"),
+    ]
+
+
+JUNIT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="src/stores/__tests__/onboardingStore.test.ts">
+    <testcase name="persists"/>
+    <testcase name="resets"><failure message="expected 1"/></testcase>
+    <testcase name="migrates"><skipped/></testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def test_junit_reader(newtdd):
+    path = write_report(newtdd, "junit.xml", JUNIT)
+    assert list(newtdd._iter_junit_tests(path)) == [
+        ("src/stores/__tests__/onboardingStore.test.ts", "persists", "P"),
+        ("src/stores/__tests__/onboardingStore.test.ts", "resets", "F"),
+        ("src/stores/__tests__/onboardingStore.test.ts", "migrates", "S"),
+    ]
+
+
+def test_truncated_junit_report_is_an_error(newtdd):
+    path = write_report(newtdd, "junit.xml", JUNIT[:JUNIT.index("<skipped/>")])
+    with pytest.raises(ElementTree.ParseError):
+        list(newtdd._iter_junit_tests(path))
+
+
+def test_failing_then_passing_report_logs_red_then_green_without_completing(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    failing = newtdd.ingest_test_report(write_report(newtdd, "test-results.json",
+                                                     vitest_report(newtdd, "passed", "failed")), store=store)
+    assert (failing.passed, failing.failed, failing.skipped, failing.unattributed) == (1, 1, 1, 1)
+    assert [result.entry["tdd_phase"] for result in failing.logged] == ["RED"]
+
+    passing = newtdd.ingest_test_report(write_report(newtdd, "test-results.json",
+                                                     vitest_report(newtdd, "passed", "passed")), store=store)
+    assert [result.entry["tdd_phase"] for result in passing.logged] == ["GREEN"]
+    assert all(result.entry["source"] == "tests" for result in failing.logged + passing.logged)
+    assert store.current_phase("1.2") == "GREEN"
+    assert "1.2" not in store.status().completed_sessions
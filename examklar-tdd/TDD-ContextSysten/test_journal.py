@@ -0,0 +1,99 @@
+"""Write-ahead journal recovery: torn tails, uncommitted transactions and replays"""
+
+import json
+
+
+def log(newtdd, session_id, action, agent="tester"):
+    store = newtdd.TDDStore(agent_id=agent)
+    [result] = store.log_batch([newtdd.LogRequest(session_id, action, dedup=False)])
+    assert result.logged, result.error
+    return result.entry
+
+
+def uncommitted_transaction(newtdd, entry, agent="tester"):
+    """Journal an append as a crashed writer would: the record is there, the commit marker is not"""
+    shard = newtdd._shard_file(agent).relative_to(newtdd.TDD_DIR).as_posix()
+    ops = [{"op": "append_shard", "file": shard, "entries": [entry]}]
+    journal_path = newtdd._journal_file(agent)
+    journal_path.parent.mkdir(exist_ok=True)
+    newtdd._append_journal_record(journal_path, {"txn": "txn-1", "ops": ops, "checksum": newtdd._journal_checksum(ops)})
+    return journal_path
+
+
+def test_torn_journal_tail_is_dropped(newtdd):
+    entry = log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    journal_path = newtdd._journal_file("tester")
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        journal.write('{"txn": "torn", "ops": [{"op": "wri')
+
+    transactions, torn = newtdd.read_journal(journal_path)
+    assert torn
+    assert [transaction["committed"] for transaction in transactions] == [True]
+
+    assert newtdd.recover_journal() == 1
+    assert not journal_path.exists()
+    assert [e["entry_id"] for e in newtdd.load_log()] == [entry["entry_id"]]
+
+
+def test_uncommitted_transaction_is_replayed(newtdd):
+    log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    entry = {
+        "entry_id": "crashed00001", "session_id": "1.1", "action": "🟢 GREEN: store passes",
+        "tdd_phase": "GREEN", "timestamp": newtdd.get_timestamp(), "agent": "tester", "lamport": 2
+    }
+    journal_path = uncommitted_transaction(newtdd, entry)
+
+    assert newtdd.recover_journal() == 1
+    assert not journal_path.exists()
+    assert [e["entry_id"] for e in newtdd.load_log()][-1] == "crashed00001"
+    status = json.loads(newtdd.CURRENT_STATUS_FILE.read_text())
+    assert status["sessions"]["1.1"]["entries"] == 2
+    assert newtdd.recover_journal() == 0
+
+
+def test_replayed_append_is_idempotent(newtdd):
+    entry = log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    shard_path = newtdd._shard_file("tester")
+
+    # The append already reached the shard before the crash
+    uncommitted_transaction(newtdd, entry)
+    assert newtdd.recover_journal() == 1
+    newtdd.append_to_shard(shard_path, [entry], replay=True)
+
+    assert [e["entry_id"] for e in newtdd.load_log()] == [entry["entry_id"]]
+
+
+def test_append_after_torn_shard_line_starts_a_new_line(newtdd):
+    entry = log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    shard_path = newtdd._shard_file("tester")
+    with open(shard_path, "a", encoding="utf-8") as shard:
+        shard.write('{"entry_id": "torn')
+
+    second = log(newtdd, "1.1", "🟢 GREEN: store passes")
+    assert [e["entry_id"] for e in newtdd.load_log()] == [entry["entry_id"], second["entry_id"]]
+
+
+def test_committed_but_unflushed_append_is_restored(newtdd):
+    first = log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    second = log(newtdd, "1.1", "🟢 GREEN: store passes")
+    journal_path = newtdd._journal_file("tester")
+    assert all(transaction["committed"] for transaction in newtdd.read_journal(journal_path)[0])
+
+    # Power loss after the commit record: the shard's last append never reached the disk
+    shard_path = newtdd._shard_file("tester")
+    lines = shard_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    shard_path.write_text("".join(lines[:-1]), encoding="utf-8")
+    assert [e["entry_id"] for e in newtdd.load_log()] == [first["entry_id"]]
+
+    assert newtdd.recover_journal() == 1
+    assert not journal_path.exists()
+    assert [e["entry_id"] for e in newtdd.load_log()] == [first["entry_id"], second["entry_id"]]
+    status = json.loads(newtdd.CURRENT_STATUS_FILE.read_text())
+    assert status["sessions"]["1.1"]["entries"] == 2
+
+
+def test_flushed_state_needs_no_recovery(newtdd):
+    log(newtdd, "1.1", "🔴 RED: wrote failing store test")
+    assert newtdd.recover_journal() == 0
+    # Recovery flushed the idle journal, so there is nothing left to replay
+    assert not newtdd._journal_file("tester").exists()
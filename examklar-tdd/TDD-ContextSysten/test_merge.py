@@ -0,0 +1,40 @@
+"""Merging .tdd directories: the merged order does not depend on the direction"""
+
+import shutil
+
+
+def log(newtdd, agent, *actions):
+    store = newtdd.TDDStore(agent_id=agent)
+    results = store.log_batch([newtdd.LogRequest("1.1", action, dedup=False) for action in actions])
+    assert all(result.logged for result in results)
+
+
+def entry_ids(newtdd):
+    return [newtdd.get_entry_id(entry) for entry in newtdd.load_log()]
+
+
+def clone(load_newtdd, source, name):
+    copy = load_newtdd(name)
+    shutil.copytree(source.TDD_DIR, copy.TDD_DIR, dirs_exist_ok=True)
+    return copy
+
+
+def test_merge_is_symmetric_and_drops_duplicates(load_newtdd):
+    a = load_newtdd("a")
+    b = load_newtdd("b")
+    log(a, "alice", "🔴 RED: store test fails", "🟢 GREEN: store passes")
+    log(b, "bob", "🔴 RED: persistence test fails", "🟢 GREEN: persistence passes", "🔵 REFACTOR: tidy store")
+    a_before = clone(load_newtdd, a, "a_before")
+    b_before = clone(load_newtdd, b, "b_before")
+
+    into_a = a.merge_tdd_directory(b.TDD_DIR)
+    into_b = b_before.merge_tdd_directory(a_before.TDD_DIR)
+    assert (into_a.imported, into_b.imported) == (3, 2)
+    assert entry_ids(a) == entry_ids(b_before)
+    assert len(set(entry_ids(a))) == 5
+
+    again = a.merge_tdd_directory(b.TDD_DIR)
+    assert again.merged
+    assert again.imported == 0
+    assert again.already_present == 3
+    assert len(entry_ids(a)) == 5
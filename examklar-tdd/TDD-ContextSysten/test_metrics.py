@@ -0,0 +1,51 @@
+"""Metrics exposition: counters only grow, and both text formats parse"""
+
+import json
+
+import pytest
+
+
+def log(newtdd, *actions):
+    store = newtdd.TDDStore(agent_id="tester")
+    assert all(result.logged for result in store.log_batch(
+        [newtdd.LogRequest("1.1", action, dedup=False) for action in actions]))
+    return store
+
+
+def samples(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            values[name] = float(value)
+    return values
+
+
+def status(newtdd):
+    return json.loads(newtdd.CURRENT_STATUS_FILE.read_text())
+
+
+def test_undo_lowers_the_gauge_but_not_the_counter(newtdd):
+    store = log(newtdd, "🔴 RED: store test fails", "🟢 GREEN: store passes")
+    before = samples(newtdd.render_openmetrics(status(newtdd)))
+    assert store.revert().reverted
+    after = samples(newtdd.render_openmetrics(status(newtdd)))
+
+    assert before['tdd_live_entries{classification="classified"}'] == 2
+    assert after['tdd_live_entries{classification="classified"}'] == 1
+    assert after["tdd_log_events_total"] == before["tdd_log_events_total"] + 1
+    assert not any("day=" in name for name in after)
+
+
+def test_exposition_parses(newtdd):
+    parser = pytest.importorskip("prometheus_client.parser")
+    openmetrics_parser = pytest.importorskip("prometheus_client.openmetrics.parser")
+    log(newtdd, "🔴 RED: store test fails", "🟢 GREEN: store passes")
+
+    prometheus = {family.name: family.type for family in parser.text_string_to_metric_families(
+        newtdd.render_openmetrics(status(newtdd), prometheus=True))}
+    openmetrics = {family.name: family.type for family in openmetrics_parser.text_string_to_metric_families(
+        newtdd.render_openmetrics(status(newtdd)))}
+    for families in (prometheus, openmetrics):
+        assert families["tdd_log_events"] == "counter"
+        assert families["tdd_live_entries"] == "gauge"
@@ -0,0 +1,60 @@
+"""Event-sourced status: revert events, checkpoints and replay from them"""
+
+
+def log(store, newtdd, *requests):
+    results = store.log_batch([newtdd.LogRequest(session_id, action, dedup=False) for session_id, action in requests])
+    assert all(result.logged for result in results)
+    return [result.entry for result in results]
+
+
+def test_revert_is_undone_in_the_projection(newtdd):
+    store = newtdd.TDDStore(agent_id="alice")
+    first, second = log(store, newtdd, ("1.1", "🔴 RED: type test fails"), ("1.2", "🔴 RED: store test fails"))
+    assert store.status().completed_sessions == ["1.1", "1.2"]
+
+    undo = newtdd.TDDStore(agent_id="bob").revert(second["entry_id"])
+    assert undo.reverted
+    status = store.status().raw
+    assert status["completed_sessions"] == ["1.1"]
+    assert "1.2" not in status["sessions"]
+    assert status["agents"] == {"alice": 1}
+    assert status["aggregates"] == {"live_entries": 1, "reverted_entries": 1, "completed_minutes": 45}
+    assert [entry["entry_id"] for entry in newtdd.get_live_entries()] == [first["entry_id"]]
+
+    again = store.revert(second["entry_id"])
+    assert not again.reverted
+    assert "already reverted" in again.error
+
+
+def test_checkpoints_replay_like_a_full_projection(newtdd, monkeypatch):
+    monkeypatch.setattr(newtdd, "CHECKPOINT_INTERVAL", 3)
+    monkeypatch.setattr(newtdd, "CHECKPOINTS_KEPT", 2)
+    store = newtdd.TDDStore(agent_id="alice")
+    entries = []
+    for number in range(4):
+        entries += log(store, newtdd, ("1.1", f"🔴 RED: case {number}"), ("1.1", f"🟢 GREEN: case {number}"))
+    store.revert(entries[3]["entry_id"])
+
+    checkpoints = sorted(path.name for path in newtdd.CHECKPOINT_DIR.glob("checkpoint_*.json"))
+    assert checkpoints == ["checkpoint_000000006.json", "checkpoint_000000009.json"]
+
+    log_data = newtdd.load_log()
+    assert newtdd.load_nearest_checkpoint(log_data)["event_count"] == 9
+    replayed = newtdd.build_status(newtdd.project_log(log_data))
+    full = newtdd.build_status(newtdd.project_log(log_data, use_checkpoints=False))
+    assert replayed == full
+    assert full["event_count"] == 9
+    assert full["sessions"]["1.1"]["entries"] == 7
+
+
+def test_checkpoint_is_ignored_once_the_log_no_longer_matches(newtdd, monkeypatch):
+    monkeypatch.setattr(newtdd, "CHECKPOINT_INTERVAL", 2)
+    store = newtdd.TDDStore(agent_id="alice")
+    log(store, newtdd, ("1.1", "🔴 RED: case"), ("1.1", "🟢 GREEN: case"))
+    log_data = newtdd.load_log()
+    assert newtdd.load_nearest_checkpoint(log_data)["event_count"] == 2
+
+    # An entry merged in ahead of the checkpoint's last event invalidates it
+    log_data.insert(1, {**log_data[0], "entry_id": "merged000001"})
+    assert newtdd.load_nearest_checkpoint(log_data)["event_count"] == 0
+    assert newtdd.build_status(newtdd.project_log(log_data))["sessions"]["1.1"]["entries"] == 3
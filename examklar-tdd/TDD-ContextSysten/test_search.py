@@ -0,0 +1,54 @@
+"""Full-text search: tokenizing, BM25 ranking, the delta file and reverted entries"""
+
+
+def log(store, newtdd, session_id, action):
+    [result] = store.log_batch([newtdd.LogRequest(session_id, action, dedup=False)])
+    assert result.logged
+    return result.entry["entry_id"]
+
+
+def ranking(store, query):
+    return [(hit.entry_id, hit.score) for hit in store.search(query)]
+
+
+def test_tokenizer_splits_camel_case_and_stems(newtdd):
+    assert newtdd.tokenize_search_text("OnboardingStore tests") == ["onboardingstor", "onboard", "stor", "test"]
+    assert newtdd.tokenize_search_text("testene er grønne") == ["test", "grønn"]
+
+
+def test_bm25_prefers_the_denser_match(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    store_twice = log(store, newtdd, "1.2", "🔴 RED: store test for store persistence")
+    store_once = log(store, newtdd, "1.2", "🟢 GREEN: store works after rewriting the persistence layer and types")
+    toast = log(store, newtdd, "1.3", "🔵 REFACTOR: toast hook cleanup")
+
+    assert [entry_id for entry_id, _ in ranking(store, "store")] == [store_twice, store_once]
+    assert [entry_id for entry_id, _ in ranking(store, "toasts")] == [toast]
+    assert store.search("nothing matches this") == []
+
+
+def test_delta_fold_ranks_like_a_full_rebuild(newtdd, monkeypatch):
+    monkeypatch.setattr(newtdd, "SEARCH_DELTA_LIMIT", 3)
+    store = newtdd.TDDStore(agent_id="tester")
+    for number in range(5):
+        log(store, newtdd, "1.2", f"🔴 RED: store test {number} persistence" + " store" * number)
+
+    # The first entry builds the index, the next three fill the delta and are folded in,
+    # and the last one still waits in the delta file
+    assert len(newtdd._read_search_delta()) == 1
+    incremental = ranking(store, "store persistence")
+    assert len(incremental) == 5
+
+    assert store.reindex() == 5
+    assert not newtdd.SEARCH_DELTA_FILE.exists()
+    assert ranking(store, "store persistence") == incremental
+
+
+def test_reverted_entries_are_not_found(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    kept = log(store, newtdd, "1.2", "🔴 RED: store test")
+    reverted = log(store, newtdd, "1.2", "🟢 GREEN: store passes")
+    assert store.revert(reverted).reverted
+    assert [entry_id for entry_id, _ in ranking(store, "store")] == [kept]
+    store.reindex()
+    assert [entry_id for entry_id, _ in ranking(store, "store")] == [kept]
@@ -0,0 +1,72 @@
+"""Status server: ETag revalidation, the Host check and CORS for local origins"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def server(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    store.log("1.1", "🔴 RED: type test fails")
+    httpd = newtdd.ThreadingHTTPServer(("127.0.0.1", 0), newtdd.StatusRequestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield store, httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(port, path, host=None, **headers):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.putrequest("GET", path, skip_host=True)
+    connection.putheader("Host", host or f"localhost:{port}")
+    for name, value in headers.items():
+        connection.putheader(name.replace("_", "-"), value)
+    connection.endheaders()
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_etag_revalidation(server):
+    store, port = server
+    response, body = get(port, "/status")
+    etag = response.getheader("ETag")
+    assert response.status == 200 and etag
+    assert json.loads(body)["completed_sessions"] == ["1.1"]
+
+    response, body = get(port, "/status", If_None_Match=etag)
+    assert (response.status, body) == (304, b"")
+
+    # A new entry publishes a new generation, so the old tag no longer matches
+    store.log("1.2", "🔴 RED: store test fails")
+    response, body = get(port, "/status", If_None_Match=etag)
+    assert response.status == 200
+    assert response.getheader("ETag") != etag
+
+
+@pytest.mark.parametrize("host", ["evil.example:8765", "localhost.evil.example", "127.0.0.1.nip.io", ""])
+def test_foreign_host_is_refused(server, host):
+    _, port = server
+    response, _ = get(port, "/status", host=host or " ")
+    assert response.status == 403
+
+
+def test_cors_only_for_local_origins(server):
+    _, port = server
+    response, _ = get(port, "/available", Origin="http://localhost:5173")
+    assert response.getheader("Access-Control-Allow-Origin") == "http://localhost:5173"
+    response, _ = get(port, "/available", Origin="http://localhost.evil.example")
+    assert response.getheader("Access-Control-Allow-Origin") is None
+
+
+def test_bad_entries_limit_is_a_client_error(server):
+    _, port = server
+    assert get(port, "/entries?limit=abc")[0].status == 400
+    response, body = get(port, "/entries?limit=1")
+    assert response.status == 200
+    assert len(json.loads(body)) == 1
@@ -0,0 +1,60 @@
+"""Status snapshots: generation numbers, the CURRENT pointer and old generations"""
+
+import json
+
+
+def test_reader_falls_back_to_status_json_before_any_snapshot(newtdd):
+    newtdd.TDDStore(agent_id="tester")
+    snapshot = newtdd.read_status_snapshot()
+    assert snapshot["generation"] == 0
+    assert snapshot["status"]["completed_sessions"] == []
+
+
+def test_each_publish_moves_current_forward_and_keeps_a_few(newtdd, monkeypatch):
+    monkeypatch.setattr(newtdd, "SNAPSHOTS_KEPT", 2)
+    newtdd.TDDStore(agent_id="tester")
+    generations = [newtdd.publish_status_snapshot({"completed_sessions": [], "marker": number})
+                   for number in range(4)]
+
+    assert generations == [1, 2, 3, 4]
+    assert newtdd.SNAPSHOT_POINTER_FILE.read_text() == "4"
+    assert newtdd._snapshot_generations() == [3, 4]
+    snapshot = newtdd.read_status_snapshot()
+    assert (snapshot["generation"], snapshot["status"]["marker"]) == (4, 3)
+
+
+def test_a_claimed_generation_is_never_overwritten(newtdd, monkeypatch):
+    newtdd.TDDStore(agent_id="tester")
+    newtdd.publish_status_snapshot({"completed_sessions": [], "marker": "first"})
+    newtdd.publish_status_snapshot({"completed_sessions": [], "marker": "second"})
+
+    # A writer that listed the generations before the second publish tries to claim 2 as well
+    listings = iter([[1]])
+    real_generations = newtdd._snapshot_generations
+    monkeypatch.setattr(newtdd, "_snapshot_generations", lambda: next(listings, None) or real_generations())
+    assert newtdd.publish_status_snapshot({"completed_sessions": [], "marker": "third"}) == 3
+
+    claimed = json.loads(newtdd._snapshot_file(2).read_text())
+    assert claimed["status"]["marker"] == "second"
+    assert newtdd.read_status_snapshot()["status"]["marker"] == "third"
+    assert not list(newtdd.SNAPSHOT_DIR.glob(".*.tmp"))
+
+
+def test_logging_publishes_a_snapshot(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    before = store.status().generation
+    store.log("1.1", "🔴 RED: type test fails")
+    status = store.status()
+    assert status.generation > before
+    assert status.completed_sessions == ["1.1"]
+
+
+def test_reports_read_the_published_snapshot(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    store.log("1.1", "🔴 RED: type test fails")
+    # status.json lags behind (e.g. mid-rewrite); the API follows the snapshot like status/serve
+    newtdd.CURRENT_STATUS_FILE.write_text(json.dumps({**store.status().raw, "completed_sessions": []}))
+
+    assert "1.2" in store.next_steps()
+    assert "1/" in store.progress_report()
+    assert newtdd.get_available_sessions() == [session.session_id for session in store.available_sessions()]
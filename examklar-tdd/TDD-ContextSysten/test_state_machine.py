@@ -0,0 +1,65 @@
+"""Per-session TDD state machine: strict and lenient rules, and state after reverts"""
+
+
+def phases(newtdd, rule_set, *steps):
+    """Violations (as rule text or None) for a sequence of (session, phase) steps"""
+    machine = newtdd.TDDStateMachine(rule_set)
+    outcomes = []
+    for session_id, tdd_phase in steps:
+        violation = machine.check(session_id, tdd_phase)
+        outcomes.append(violation)
+        if not (violation and machine.rules["reject_violations"]):
+            machine.advance(session_id, tdd_phase)
+    return outcomes, machine
+
+
+def test_strict_rules(newtdd):
+    outcomes, machine = phases(newtdd, "strict", ("1.1", "GREEN"), ("1.1", "RED"), ("1.1", "GREEN"),
+                               ("1.1", "GREEN"), ("1.1", "REFACTOR"), ("1.1", "REFACTOR"))
+    assert [bool(outcome) for outcome in outcomes] == [True, False, False, True, False, True]
+    assert "Must start with RED" in outcomes[0]
+    assert machine.states["1.1"] == ["REFACTOR", 1]
+
+
+def test_lenient_rules_warn_without_blocking(newtdd):
+    outcomes, machine = phases(newtdd, "lenient", ("1.1", "GREEN"), ("1.1", "GREEN"),
+                               ("1.1", "REFACTOR"), ("1.1", "REFACTOR"), ("1.1", "GREEN"))
+    assert outcomes[:4] == [None, None, None, None]
+    assert "GREEN phase must follow RED" in outcomes[4]
+    assert machine.current_phase("1.1") == "GREEN"
+
+
+def test_sessions_move_independently(newtdd):
+    outcomes, machine = phases(newtdd, "strict", ("1.1", "RED"), ("1.2", "RED"), ("1.1", "GREEN"), ("1.2", "REFACTOR"))
+    assert [bool(outcome) for outcome in outcomes] == [False, False, False, True]
+    assert (machine.current_phase("1.1"), machine.current_phase("1.2")) == ("GREEN", "RED")
+
+
+def test_strict_store_rejects_a_violating_entry(newtdd):
+    store = newtdd.TDDStore(agent_id="tester", rules="strict")
+    [result] = store.log_batch([newtdd.LogRequest("1.1", "🟢 GREEN: store passes")])
+    assert not result.logged
+    assert "TDD VIOLATION" in result.error
+    assert newtdd.load_log() == []
+
+
+def test_revert_recomputes_phase_and_streak(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    results = store.log_batch([newtdd.LogRequest("1.1", action, dedup=False) for action in (
+        "🔴 RED: store test fails", "🟢 GREEN: store passes",
+        "🔵 REFACTOR: extract helper", "🔵 REFACTOR: rename fields")])
+    entry_ids = [result.entry["entry_id"] for result in results]
+    assert store.status().raw["sessions"]["1.1"]["tdd_state"] == {"phase": "REFACTOR", "refactor_streak": 2}
+
+    # Reverting an entry inside the REFACTOR run shortens the streak, not just the tail
+    assert store.revert(entry_ids[2]).reverted
+    assert store.status().raw["sessions"]["1.1"]["tdd_state"] == {"phase": "REFACTOR", "refactor_streak": 1}
+    assert store.revert(entry_ids[3]).reverted
+    assert store.current_phase("1.1") == "GREEN"
+
+    # The projection (and so every checkpoint) keeps only the phase and streak per session
+    state = newtdd.project_log(newtdd.load_log(), use_checkpoints=False)
+    assert set(state["sessions"]["1.1"]) <= {"entries", "completing_entries", "phases", "first_entry",
+                                             "last_entry", "burn_day", "tdd_state"}
+    assert newtdd.rebuild_state(full=True).events == 6
+    assert store.status().raw["sessions"]["1.1"]["tdd_state"] == {"phase": "GREEN", "refactor_streak": 0}
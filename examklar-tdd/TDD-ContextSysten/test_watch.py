@@ -0,0 +1,30 @@
+"""Watch mode: a report caught mid-write is skipped and ingested on its next write"""
+
+import json
+
+
+def vitest_report(newtdd, status):
+    return json.dumps({"testResults": [{
+        "name": str(newtdd.PROJECT_ROOT / "src/stores/__tests__/onboardingStore.test.ts"),
+        "assertionResults": [{"fullName": "store persists", "status": status}]
+    }]})
+
+
+def test_half_written_report_is_skipped_then_ingested(newtdd):
+    store = newtdd.TDDStore(agent_id="tester")
+    report = newtdd.PROJECT_ROOT / "test-results.json"
+    paths = {str(report)}
+
+    for partial in ("", vitest_report(newtdd, "failed")[:40]):
+        report.write_text(partial, encoding="utf-8")
+        errors = []
+        _, ingested, _ = newtdd.handle_watch_changes(paths, paths, False, store, errors)
+        assert ingested == []
+        assert len(errors) == 1
+
+    report.write_text(vitest_report(newtdd, "failed"), encoding="utf-8")
+    errors = []
+    _, ingested, _ = newtdd.handle_watch_changes(paths, paths, False, store, errors)
+    assert errors == []
+    assert [result.failed for result in ingested] == [1]
+    assert store.current_phase("1.2") == "RED"
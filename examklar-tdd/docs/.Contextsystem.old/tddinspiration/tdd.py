@@ -10,7 +10,7 @@ Usage:
 
 Features:
 - Project-agnostic design
-- Automatic project structure detection
+- Automatic project structure detection (mixed-language roots and monorepos)
 - Strict TDD phase enforcement
 - Dynamic test command detection
 - Centralized context management
@@ -18,8 +18,10 @@ Features:
 
 import os
 import sys
+import copy
 import json
 import argparse
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -36,59 +38,116 @@ class TDDPhase:
 class ProjectDetector:
     """Detects project type and configuration"""
     
+    # Marker file -> (language, type, test commands, build commands), in order of precedence
+    MARKERS = {
+        "pyproject.toml": ("python", "python-poetry",
+                           ["poetry run pytest tests/ -v", "poetry run pytest tests/ --cov=src"],
+                           ["poetry install", "poetry build"]),
+        "requirements.txt": ("python", "python-pip",
+                             ["python -m pytest tests/ -v", "python -m pytest tests/ --cov=src"],
+                             ["pip install -r requirements.txt"]),
+        "package.json": ("node", "nodejs",
+                         ["npm test", "npm run test:coverage"],
+                         ["npm install", "npm run build"]),
+        "Cargo.toml": ("rust", "rust",
+                       ["cargo test", "cargo test --verbose"],
+                       ["cargo build", "cargo build --release"]),
+        "go.mod": ("go", "go",
+                   ["go test ./...", "go test -v ./..."],
+                   ["go build", "go mod tidy"]),
+    }
+    COMMON_DIRS = ("src", "tests", "test", "lib", "docs", "examples")
+    SKIPPED_DIRS = {"node_modules", ".git", ".venv", "venv", "__pycache__", "target", "dist", "build", ".tdd"}
+    
+    # Directory -> (mtime_ns, config); adding or removing a marker changes the directory mtime
+    _cache: Dict[str, Tuple[int, Dict]] = {}
+    _cache_lock = threading.Lock()
+    
     @staticmethod
     def detect_project_type(project_path: Path) -> Dict[str, any]:
-        """Detect project type and return configuration"""
+        """Detect project type and return configuration (one directory listing, cached by mtime)"""
+        key = os.fspath(project_path)
+        if not os.path.isdir(key):
+            return ProjectDetector._config_from_listing({})
+        mtime = os.stat(key).st_mtime_ns
+        with ProjectDetector._cache_lock:
+            cached = ProjectDetector._cache.get(key)
+        if cached and cached[0] == mtime:
+            return copy.deepcopy(cached[1])
+        
+        with os.scandir(key) as entries:
+            names = {entry.name: entry.is_dir() for entry in entries}
+        config = ProjectDetector._config_from_listing(names)
+        with ProjectDetector._cache_lock:
+            ProjectDetector._cache[key] = (mtime, config)
+        return copy.deepcopy(config)
+    
+    @staticmethod
+    def _config_from_listing(names: Dict[str, bool]) -> Dict[str, any]:
+        """Match every marker against one directory listing (name -> is directory)"""
         config = {
             "type": "unknown",
+            "types": [],
             "test_commands": [],
             "build_commands": [],
             "dependencies": [],
             "structure": {}
         }
         
-        # Python project detection
-        if (project_path / "pyproject.toml").exists():
-            config["type"] = "python-poetry"
-            config["test_commands"] = [
-                "poetry run pytest tests/ -v",
-                "poetry run pytest tests/ --cov=src"
-            ]
-            config["build_commands"] = ["poetry install", "poetry build"]
-            
-        elif (project_path / "requirements.txt").exists():
-            config["type"] = "python-pip"
-            config["test_commands"] = [
-                "python -m pytest tests/ -v",
-                "python -m pytest tests/ --cov=src"
-            ]
-            config["build_commands"] = ["pip install -r requirements.txt"]
-            
-        # Node.js project detection
-        elif (project_path / "package.json").exists():
-            config["type"] = "nodejs"
-            config["test_commands"] = ["npm test", "npm run test:coverage"]
-            config["build_commands"] = ["npm install", "npm run build"]
-            
-        # Rust project detection
-        elif (project_path / "Cargo.toml").exists():
-            config["type"] = "rust"
-            config["test_commands"] = ["cargo test", "cargo test --verbose"]
-            config["build_commands"] = ["cargo build", "cargo build --release"]
-            
-        # Go project detection
-        elif (project_path / "go.mod").exists():
-            config["type"] = "go"
-            config["test_commands"] = ["go test ./...", "go test -v ./..."]
-            config["build_commands"] = ["go build", "go mod tidy"]
+        # Mixed-language roots get every language, but only the first marker per language
+        languages = set()
+        for marker, (language, project_type, test_commands, build_commands) in ProjectDetector.MARKERS.items():
+            if names.get(marker) is False and language not in languages:
+                languages.add(language)
+                config["types"].append(project_type)
+                config["test_commands"] += test_commands
+                config["build_commands"] += build_commands
+        if config["types"]:
+            config["type"] = config["types"][0]
             
         # Detect common directories
-        common_dirs = ["src", "tests", "test", "lib", "docs", "examples"]
-        for dir_name in common_dirs:
-            if (project_path / dir_name).exists():
+        for dir_name in ProjectDetector.COMMON_DIRS:
+            if names.get(dir_name):
                 config["structure"][dir_name] = True
                 
         return config
+    
+    @staticmethod
+    def _scan_projects(root: Path) -> Dict[Path, Dict[str, bool]]:
+        """Listing (name -> is directory) of every directory under root with a marker file
+        
+        Each directory is listed once; unreadable directories are skipped.
+        """
+        projects = {}
+        pending = [os.fspath(root)]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    names = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries}
+            except OSError:
+                # Permission denied, or removed while we were walking
+                continue
+            for name, is_dir in names.items():
+                if is_dir and name not in ProjectDetector.SKIPPED_DIRS and not name.startswith("."):
+                    pending.append(os.path.join(directory, name))
+            if any(names.get(marker) is False for marker in ProjectDetector.MARKERS):
+                projects[Path(directory)] = names
+        return projects
+    
+    @staticmethod
+    def find_projects(root: Path) -> List[Path]:
+        """Directories under root that contain a marker file, listing each directory once"""
+        return sorted(ProjectDetector._scan_projects(root))
+    
+    @staticmethod
+    def detect_projects(root: Path) -> Dict[str, Dict[str, any]]:
+        """Detect every project under a monorepo root from the listings of a single walk"""
+        projects = ProjectDetector._scan_projects(root)
+        return {
+            project.relative_to(root).as_posix(): ProjectDetector._config_from_listing(projects[project])
+            for project in sorted(projects)
+        }
 
 
 class TDDContextManager:
@@ -593,6 +652,7 @@ Examples:
   tdd.py myproject "wrote failing test" # Log action
   tdd.py .                            # Initialize current directory
   tdd.py . "implemented feature"       # Log action in current directory
+  tdd.py . --detect                   # List the projects in a monorepo
 
 Strict TDD Rules:
   - RED phase (failing test) must come first
@@ -612,8 +672,20 @@ Strict TDD Rules:
         help="Action description (if omitted, initializes project)"
     )
     
+    parser.add_argument(
+        "--detect",
+        action="store_true",
+        help="List every project found under project_name and its type"
+    )
+    
     args = parser.parse_args()
     
+    if args.detect:
+        root = Path.cwd() / args.project_name
+        for project, config in ProjectDetector.detect_projects(root).items():
+            print(f"📦 {project}: {', '.join(config['types'])}")
+        return
+    
     # Determine workspace root
     workspace_root = Path.cwd()
     